@@ -0,0 +1,135 @@
+"""Admission control for OSCAR traffic
+
+OSCAR is a single Tomcat, so every outgoing request takes a slot: at most
+OSCAR_MAX_IN_FLIGHT requests run at once, at most OSCAR_MAX_IN_FLIGHT_PER_SESSION
+per session, and when slots are scarce waiters are admitted by priority class
+(REALTIME phone-call lookups, then INTERACTIVE chat, then BACKGROUND batch work),
+first-come first-served within a class.
+
+The priority of the current call is carried in a context variable; set it with
+`with admission.priority(admission.REALTIME): ...`. The per-session cap is
+keyed by the OAuth scope (the chat session id) unless an owner is set with
+`with admission.owner(call_sid): ...`. Every phone call and background job
+signs as the single "service" scope, so each sets its own owner.
+"""
+
+import contextlib
+import contextvars
+import itertools
+import os
+import threading
+import time
+import metrics
+
+REALTIME, INTERACTIVE, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {REALTIME: "realtime", INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+MAX_IN_FLIGHT = int(os.getenv("OSCAR_MAX_IN_FLIGHT", "16"))
+PER_SCOPE_MAX = int(os.getenv("OSCAR_MAX_IN_FLIGHT_PER_SESSION", "6"))
+ADMISSION_TIMEOUT = float(os.getenv("OSCAR_ADMISSION_TIMEOUT", "30"))
+
+
+class AdmissionTimeout(Exception):
+    """No slot was free within the admission timeout"""
+
+
+_current_priority = contextvars.ContextVar("oscar_priority", default=INTERACTIVE)
+
+
+_current_owner = contextvars.ContextVar("oscar_owner", default=None)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def current_owner() -> str | None:
+    return _current_owner.get()
+
+
+@contextlib.contextmanager
+def priority(level: int):
+    """Run the enclosed OSCAR calls (and threads started with a copied context) at `level`"""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+@contextlib.contextmanager
+def owner(key: str):
+    """Count the enclosed OSCAR calls against `key`'s per-session cap instead of their scope's"""
+    token = _current_owner.set(key)
+    try:
+        yield
+    finally:
+        _current_owner.reset(token)
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, per_scope_max: int = PER_SCOPE_MAX):
+        self.max_in_flight = max_in_flight
+        self.per_scope_max = per_scope_max
+        self.in_flight = 0
+        self._per_scope: dict[str, int] = {}
+        self._waiting: list[tuple[int, int, str]] = []  # (priority, seq, scope)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _scope_full(self, scope: str) -> bool:
+        return self._per_scope.get(scope, 0) >= self.per_scope_max
+
+    def _can_admit(self, entry: tuple[int, int, str]) -> bool:
+        if self.in_flight >= self.max_in_flight or self._scope_full(entry[2]):
+            return False
+        # Let an earlier or higher-priority waiter go first unless its own scope is capped
+        return not any(other < entry and not self._scope_full(other[2]) for other in self._waiting)
+
+    def acquire(self, scope: str, level: int | None = None, timeout: float = ADMISSION_TIMEOUT) -> bool:
+        """Wait for a slot; False if none was free within `timeout` seconds"""
+        level = current_priority() if level is None else level
+        entry = (level, next(self._seq), scope)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiting.append(entry)
+            try:
+                while not self._can_admit(entry):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        metrics.incr(f"oscar.admission.rejected.{PRIORITY_NAMES.get(level, level)}")
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(entry)
+                self._cond.notify_all()
+            self.in_flight += 1
+            self._per_scope[scope] = self._per_scope.get(scope, 0) + 1
+            return True
+
+    def release(self, scope: str):
+        with self._cond:
+            self.in_flight -= 1
+            self._per_scope[scope] -= 1
+            if not self._per_scope[scope]:
+                del self._per_scope[scope]
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, scope: str, level: int | None = None, timeout: float = ADMISSION_TIMEOUT):
+        """Context manager yielding True with a slot held, or False if admission timed out.
+        The per-session cap applies to the current owner if one is set, else to `scope`."""
+        key = current_owner() or scope
+        admitted = self.acquire(key, level, timeout)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release(key)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"in_flight": self.in_flight, "waiting": len(self._waiting), "max_in_flight": self.max_in_flight}
+
+
+controller = AdmissionController()
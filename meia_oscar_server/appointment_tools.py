@@ -1,7 +1,14 @@
 """OSCAR Appointment/Scheduling Tools"""
 
-from typing import Optional
+from typing import List, Optional
 from tools import oscar_request, handle_response
+import admission
+import availability
+import parallel
+import resilience
+import schedule_cache
+
+MAX_BULK = 200
 
 
 def get_daily_appointments(date: str, tool_context, provider_no: Optional[str] = None) -> dict:
@@ -16,9 +23,82 @@ def get_daily_appointments(date: str, tool_context, provider_no: Optional[str] =
         id, demographicNo, providerNo, appointmentDate, startTime, endTime, duration,
         status, type, reason, notes, demographicName, providerName
     """
+    return _read_day(date, tool_context, provider_no)
+
+
+def _read_day(date: str, tool_context, provider_no: Optional[str] = None, fresh: bool = False):
+    """A day's appointments, from schedule_cache unless `fresh`; a fresh read still refreshes the cache"""
+    cacheable = date != "today"
+    if cacheable:
+        if not fresh:
+            cached = schedule_cache.get(provider_no, date)
+            if cached is not None:
+                return cached
+        read_version = schedule_cache.version(provider_no, date)
     endpoint = f"/ws/services/schedule/{provider_no}/day/{date}" if provider_no else f"/ws/services/schedule/day/{date}"
     resp = oscar_request("GET", endpoint, tool_context.state.get("session_id"))
-    return handle_response(resp, "get_daily_appointments")
+    result = handle_response(resp, "get_daily_appointments")
+    if cacheable and resp.ok and isinstance(result, list):
+        schedule_cache.put(provider_no, date, result, read_version)
+    return result
+
+
+def get_available_slots(provider_no: str, date: str, tool_context, duration: int = availability.SLOT_MINUTES) -> dict:
+    """Get open appointment start times for a provider on a day, within clinic hours.
+
+    Args:
+        provider_no: Provider ID (use get_providers or get_current_provider to find)
+        date: Date in YYYY-MM-DD format, "today" or "tomorrow" (past times today are skipped)
+        duration: Appointment length in minutes that must fit (default 15)
+
+    Returns:
+        dict with date, provider_no, duration and slots: free start times in HH:MM (24-hour).
+        Weekends have no slots.
+    """
+    date = availability.resolve_date(date)
+    if not date:
+        return {"error": availability.DATE_ERROR}
+    if not availability.is_clinic_day(date):
+        return {"date": date, "provider_no": provider_no, "duration": duration, "slots": [],
+                "note": "The clinic is closed on weekends"}
+    booked = get_daily_appointments(date, tool_context, provider_no)
+    if isinstance(booked, dict) and "error" in booked:
+        return booked
+    if isinstance(booked, dict):
+        booked = booked.get("content", [])
+    return {"date": date, "provider_no": provider_no, "duration": duration,
+            "slots": availability.day_slots(booked, date, duration)}
+
+
+def search_available_slots(start_date: str, end_date: str, tool_context, provider_nos: Optional[List[str]] = None,
+                           limit: int = 5, duration: int = availability.SLOT_MINUTES) -> dict:
+    """Find the earliest open appointment slots across several days and providers in one call.
+
+    Args:
+        start_date: First date to search, YYYY-MM-DD, "today" or "tomorrow"
+        end_date: Last date to search, YYYY-MM-DD (at most 14 days after start_date; weekends are skipped)
+        provider_nos: Provider IDs to search (optional, defaults to every doctor)
+        limit: Number of slots to return (default 5)
+        duration: Appointment length in minutes that must fit (default 15)
+
+    Returns:
+        dict with slots: earliest open slots first, each with date, time (HH:MM) and provider_no;
+        searched dates/providers, and unavailable provider-days that could not be loaded
+    """
+    if not provider_nos:
+        resp = oscar_request("GET", "/ws/services/providerService/providers_json", tool_context.state.get("session_id"))
+        if not resp.ok:
+            return {"error": resp.status_code, "text": resp.text}
+        data = resp.json()
+        providers = data.get("content", []) if isinstance(data, dict) else data
+        provider_nos = [str(p.get("providerNo")) for p in providers
+                        if p.get("providerNo") and p.get("providerType", "doctor") == "doctor"]
+
+    def fetch_day(provider_no: str, date: str):
+        booked = get_daily_appointments(date, tool_context, provider_no)
+        return booked.get("content", booked) if isinstance(booked, dict) and "error" not in booked else booked
+
+    return availability.search(fetch_day, provider_nos, start_date, end_date, limit, duration)
 
 
 def get_appointment_statuses(tool_context) -> dict:
@@ -85,7 +165,12 @@ def create_appointment(patient_id: int, provider_no: str, date: str, start_time:
         data["type"] = appointment_type
 
     resp = oscar_request("POST", "/ws/services/schedule/add", tool_context.state.get("session_id"), json=data)
-    return handle_response(resp, "create_appointment")
+    result = handle_response(resp, "create_appointment")
+    if resp.ok:
+        schedule_cache.add(provider_no, date, result)
+    elif resilience.response_sent(resp):
+        schedule_cache.invalidate(provider_no, date)  # may have been booked after all
+    return result
 
 
 def update_appointment_status(appointment_id: int, status: str, tool_context) -> dict:
@@ -102,21 +187,77 @@ def update_appointment_status(appointment_id: int, status: str, tool_context) ->
     """
     resp = oscar_request("POST", f"/ws/services/schedule/appointment/{appointment_id}/updateStatus",
                          tool_context.state.get("session_id"), json={"status": status})
+    if resp.ok:
+        schedule_cache.update(appointment_id, status=status)
+    elif resilience.response_sent(resp):
+        schedule_cache.drop(appointment_id)
     return handle_response(resp, "update_appointment_status")
 
 
-def get_patient_appointment_history(patient_id: int, tool_context) -> dict:
+def update_appointment_statuses_bulk(tool_context, updates: Optional[List[dict]] = None, status: Optional[str] = None,
+                                     date: Optional[str] = None, provider_no: Optional[str] = None,
+                                     from_statuses: Optional[List[str]] = None) -> dict:
+    """Update many appointment statuses in one call, e.g. end-of-day No Show or Billed processing.
+
+    Either pass updates explicitly, or select a day's appointments by their current status.
+
+    Args:
+        updates: List of {"appointment_id": int, "status": str} (up to 200)
+        status: New status code for every appointment matched by the day filter (e.g. "N", "B")
+        date: Day to select from, YYYY-MM-DD or "today" (day filter)
+        provider_no: Only this provider's appointments (day filter, optional)
+        from_statuses: Current status codes to select, e.g. ["t"] for not yet arrived (day filter, required)
+
+    Returns:
+        dict with updated and failed counts and results: one row per appointment with
+        appointment_id, status, success and error details for failed rows
+    """
+    if updates is None:
+        if not (status and date and from_statuses):
+            return {"error": "Pass updates, or status, date and from_statuses to select from a day"}
+        # Straight from OSCAR: a cached copy can miss arrivals marked in OSCAR's own UI
+        day = _read_day(date, tool_context, provider_no, fresh=True)
+        if isinstance(day, dict) and "error" in day:
+            return day
+        day = day.get("content", []) if isinstance(day, dict) else day
+        wanted = {str(s)[:1] for s in from_statuses if s}
+        updates = [{"appointment_id": a.get("id"), "status": status} for a in day
+                   if str(a.get("status") or "")[:1] in wanted and a.get("id") is not None]
+    if len(updates) > MAX_BULK:
+        return {"error": f"At most {MAX_BULK} appointments per call"}
+
+    def update(row: dict) -> dict:
+        if row.get("appointment_id") is None or not row.get("status"):
+            return {"error": "Missing appointment_id or status"}
+        return update_appointment_status(row["appointment_id"], row["status"], tool_context)
+
+    with admission.priority(admission.BACKGROUND):
+        outcomes = parallel.gather({str(i): (lambda row=row: update(row)) for i, row in enumerate(updates)})
+    results = []
+    for i, row in enumerate(updates):
+        outcome = outcomes[str(i)]
+        ok = not (isinstance(outcome, dict) and "error" in outcome)
+        entry = {"appointment_id": row.get("appointment_id"), "status": row.get("status"), "success": ok}
+        if not ok:
+            entry["error"] = outcome
+        results.append(entry)
+    updated = sum(r["success"] for r in results)
+    return {"updated": updated, "failed": len(results) - updated, "results": results}
+
+
+def get_patient_appointment_history(patient_id: int, tool_context, full_detail: bool = False) -> dict:
     """Get appointment history for a patient.
 
     Args:
         patient_id: Patient demographic ID
+        full_detail: Return every record and field from OSCAR instead of the compact summary (default False)
 
     Returns:
         dict with array of past and future appointments for the patient,
         each containing id, appointmentDate, startTime, providerName, status, reason
     """
     resp = oscar_request("POST", f"/ws/services/schedule/{patient_id}/appointmentHistory", tool_context.state.get("session_id"))
-    return handle_response(resp, "get_patient_appointment_history")
+    return handle_response(resp, "get_patient_appointment_history", full=full_detail)
 
 
 def delete_appointment(appointment_id: int, tool_context) -> dict:
@@ -129,20 +270,28 @@ def delete_appointment(appointment_id: int, tool_context) -> dict:
         dict with success: True on success, or error/text on failure
     """
     resp = oscar_request("POST", "/ws/services/schedule/deleteAppointment", tool_context.state.get("session_id"), json={"id": appointment_id})
+    if resp.ok:
+        schedule_cache.remove(appointment_id)
+    elif resilience.response_sent(resp):
+        schedule_cache.drop(appointment_id)
     return {"success": True, "status": resp.status_code} if resp.ok else {"error": resp.status_code, "text": resp.text}
 
 
 APPOINTMENT_TOOLS = [
-    get_daily_appointments, get_appointment_statuses, get_appointment_types,
-    create_appointment, update_appointment_status, get_patient_appointment_history, delete_appointment
+    get_daily_appointments, get_available_slots, search_available_slots, get_appointment_statuses, get_appointment_types,
+    create_appointment, update_appointment_status, update_appointment_statuses_bulk, get_patient_appointment_history,
+    delete_appointment
 ]
 
 APPOINTMENT_TOOL_DESCRIPTIONS = {
     "get_daily_appointments": "Fetching daily appointments...",
+    "get_available_slots": "Finding open appointment slots...",
+    "search_available_slots": "Searching open appointment slots...",
     "get_appointment_statuses": "Fetching appointment statuses...",
     "get_appointment_types": "Fetching appointment types...",
     "create_appointment": "Creating appointment...",
     "update_appointment_status": "Updating appointment status...",
+    "update_appointment_statuses_bulk": "Updating appointment statuses...",
     "get_patient_appointment_history": "Fetching patient appointment history...",
     "delete_appointment": "Deleting appointment...",
 }
@@ -0,0 +1,162 @@
+"""Free appointment slots from a provider's day schedule
+
+OSCAR returns booked appointments only. Booked appointments are merged into
+sorted busy intervals and subtracted from clinic hours, so tools can hand the
+model open slots instead of leaving it to work them out.
+
+    CLINIC_OPEN      opening time, HH:MM (default 09:00)
+    CLINIC_CLOSE     closing time, HH:MM (default 17:00)
+    SLOT_MINUTES     slot length in minutes (default 15)
+    CLINIC_TIMEZONE  used to skip past slots today (default America/Los_Angeles)
+
+search() looks across several days and providers at once: day schedules are
+fetched concurrently (the fetchers read through schedule_cache.py) and the
+earliest open slots are returned. Weekends are skipped.
+"""
+
+import bisect
+import heapq
+import os
+import re
+from datetime import date as Date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import parallel
+
+CLINIC_OPEN = os.getenv("CLINIC_OPEN", "09:00")
+CLINIC_CLOSE = os.getenv("CLINIC_CLOSE", "17:00")
+SLOT_MINUTES = int(os.getenv("SLOT_MINUTES", "15"))
+TZ = ZoneInfo(os.getenv("CLINIC_TIMEZONE", "America/Los_Angeles"))
+MAX_SEARCH_DAYS = 14
+MAX_DAY_FETCHES = 100
+MAX_RESULTS = 20
+DATE_ERROR = 'Dates must be YYYY-MM-DD, "today" or "tomorrow"'
+
+_TIME = re.compile(r"^\s*(\d{1,2}):(\d{2})(?::\d{2}(?:\.\d+)?)?\s*([AaPp][Mm])?\s*$")
+
+
+def parse_time(value) -> int | None:
+    """Minutes after midnight from "10:00 AM", "10:00" or "10:00:00"; None if unreadable"""
+    match = _TIME.match(str(value or ""))
+    if not match:
+        return None
+    hour, minute, period = int(match.group(1)), int(match.group(2)), match.group(3)
+    if period:
+        hour = hour % 12 + (12 if period.upper() == "PM" else 0)
+    return hour * 60 + minute
+
+
+def format_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def is_cancelled(appointment: dict) -> bool:
+    return str(appointment.get("status") or "").upper().startswith("C")
+
+
+def busy_intervals(appointments: list) -> list[tuple[int, int]]:
+    """Sorted, merged (start, end) minute intervals covered by non-cancelled appointments"""
+    intervals = []
+    for appt in appointments:
+        if not isinstance(appt, dict) or is_cancelled(appt):
+            continue
+        start = parse_time(appt.get("startTime"))
+        if start is None:
+            continue
+        duration = str(appt.get("duration") or "").strip()
+        if duration.isdigit() and int(duration) > 0:
+            end = start + int(duration)
+        else:
+            end = parse_time(appt.get("endTime"))
+            if end is None:
+                end = start + SLOT_MINUTES
+            elif (end + 1) % 5 == 0:
+                end += 1  # OSCAR stores inclusive end times (10:00-10:14)
+        intervals.append((start, max(end, start + 1)))
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(appointments: list, duration: int = SLOT_MINUTES, slot: int = SLOT_MINUTES,
+               open_time: str | None = None, close_time: str | None = None, not_before: int | None = None) -> list[str]:
+    """Start times (HH:MM) on the slot grid where `duration` minutes fit between booked appointments.
+    Opening hours default to CLINIC_OPEN/CLINIC_CLOSE as they are at call time."""
+    busy = busy_intervals(appointments)
+    starts = [s for s, _ in busy]
+    opens, closes = parse_time(open_time or CLINIC_OPEN), parse_time(close_time or CLINIC_CLOSE)
+    slots = []
+    for t in range(opens, closes - duration + 1, slot):
+        if not_before is not None and t < not_before:
+            continue
+        # Only the last busy interval starting before t + duration can overlap [t, t + duration)
+        i = bisect.bisect_left(starts, t + duration) - 1
+        if i < 0 or busy[i][1] <= t:
+            slots.append(format_time(t))
+    return slots
+
+
+def resolve_date(date) -> str | None:
+    """YYYY-MM-DD for `date` ("today", "tomorrow" or YYYY-MM-DD); None if it is not a date"""
+    value = str(date or "").strip().lower()
+    today = datetime.now(TZ).date()
+    if value in ("today", "tomorrow"):
+        return (today + timedelta(days=value == "tomorrow")).isoformat()
+    try:
+        return Date.fromisoformat(value).isoformat()
+    except ValueError:
+        return None
+
+
+def is_clinic_day(date: str) -> bool:
+    """Whether the clinic is open on `date` (YYYY-MM-DD): Monday to Friday"""
+    return Date.fromisoformat(date).weekday() < 5
+
+
+def day_slots(appointments: list, date: str, duration: int = SLOT_MINUTES) -> list[str]:
+    """Free slots on `date`, skipping times already past if it is today"""
+    now = datetime.now(TZ)
+    not_before = now.hour * 60 + now.minute if date == now.date().isoformat() else None
+    return free_slots(appointments, duration, not_before=not_before)
+
+
+def clinic_dates(start: str, end: str) -> list[str]:
+    """Weekdays from start (or today, if later) to end inclusive, at most MAX_SEARCH_DAYS calendar days.
+    Both dates must be valid (see resolve_date)."""
+    first, last = Date.fromisoformat(resolve_date(start)), Date.fromisoformat(resolve_date(end))
+    first = max(first, datetime.now(TZ).date())
+    last = min(last, first + timedelta(days=MAX_SEARCH_DAYS - 1))
+    days = (first + timedelta(days=i) for i in range((last - first).days + 1))
+    return [d.isoformat() for d in days if is_clinic_day(d.isoformat())]
+
+
+def search(fetch_day, provider_nos: list[str], start: str, end: str, limit: int = 5,
+           duration: int = SLOT_MINUTES) -> dict:
+    """Earliest `limit` open slots across providers and weekdays from start to end.
+
+    fetch_day(provider_no, date) returns that day's booked appointments, or None/an error
+    dict if OSCAR could not be read; such days are listed under "unavailable".
+    """
+    if not resolve_date(start) or not resolve_date(end):
+        return {"error": DATE_ERROR}
+    limit = max(1, min(limit, MAX_RESULTS))
+    dates = clinic_dates(start, end)
+    keys = [(p, d) for d in dates for p in dict.fromkeys(provider_nos)]
+    if len(keys) > MAX_DAY_FETCHES:
+        return {"error": f"Search covers {len(keys)} provider-days; narrow it to at most {MAX_DAY_FETCHES}"}
+    days = parallel.gather({f"{p}|{d}": (lambda p=p, d=d: fetch_day(p, d)) for p, d in keys})
+    candidates, unavailable = [], []
+    for p, d in keys:
+        appointments = days[f"{p}|{d}"]
+        if not isinstance(appointments, list):
+            unavailable.append({"provider_no": p, "date": d})
+            continue
+        candidates.extend((d, t, p) for t in day_slots(appointments, d, duration))
+    slots = [{"date": d, "time": t, "provider_no": p} for d, t, p in heapq.nsmallest(limit, candidates)]
+    result = {"slots": slots, "searched": {"dates": dates, "provider_nos": list(dict.fromkeys(provider_nos))}}
+    if unavailable:
+        result["unavailable"] = unavailable
+    return result
@@ -4,18 +4,25 @@ import asyncio
 import base64
 import json
 import os
+import threading
 from datetime import datetime, timezone
 import websockets
 
 # Minimum audio energy threshold (0-127 scale, higher = stricter)
 # AUDIO_ENERGY_THRESHOLD = 60  # Disabled - relying on server VAD
+import admission
+import availability
 import oscar_client
+import oscar_logging
+import parallel
+import patient_index
 import store
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 STAFF_PHONE = os.getenv("STAFF_PHONE")
+MAX_PREFETCH = 3  # patients sharing a caller's number whose charts are warmed at call start
 
 SYSTEM_PROMPT = """
 You are a clinic assistant handling phone calls.
@@ -43,8 +50,9 @@ The following tools require identity verification:
 
 1. First use get_providers to list available doctors
 2. Ask which doctor they want to see
-3. Use get_day_schedule with provider_no and date to see booked appointments
-4. Suggest times that are NOT already booked (clinic hours are typically 9am-5pm)
+3. Use get_available_slots with provider_no and date to get open times, or find_available_slots
+   when the caller is flexible about the day or doctor ("anyone this week?")
+4. Suggest a few of the open times to the caller
 5. Use book_appointment with the chosen slot
 
 == Identity Verification ==
@@ -137,26 +145,65 @@ TOOLS = [
             },
             "required": ["provider_no", "date"]
         }
+    },
+    {
+        "type": "function",
+        "name": "get_available_slots",
+        "description": "Get open 15-minute appointment start times (HH:MM) for a doctor on a date, within clinic hours.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "provider_no": {"type": "string", "description": "Provider number from get_providers"},
+                "date": {"type": "string", "description": "Date in YYYY-MM-DD format"}
+            },
+            "required": ["provider_no", "date"]
+        }
+    },
+    {
+        "type": "function",
+        "name": "find_available_slots",
+        "description": "Find the earliest open appointment slots across a date range (weekdays, up to 14 days) for one doctor or any doctor.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "start_date": {"type": "string", "description": "First date in YYYY-MM-DD format"},
+                "end_date": {"type": "string", "description": "Last date in YYYY-MM-DD format"},
+                "provider_no": {"type": "string", "description": "Provider number from get_providers; omit for any doctor"},
+                "limit": {"type": "integer", "description": "Number of slots to return (default 5)"}
+            },
+            "required": ["start_date", "end_date"]
+        }
     }
 ]
 
 
 class CallSession:
-    def __init__(self, stream_sid: str, call_sid: str, send_audio_callback, clear_audio_callback):
+    def __init__(self, stream_sid: str, call_sid: str, send_audio_callback, clear_audio_callback,
+                 caller_number: str | None = None):
         self.stream_sid = stream_sid
         self.call_sid = call_sid
+        self.caller_number = caller_number
         self.send_audio = send_audio_callback
         self.clear_audio = clear_audio_callback
         self.ws = None
+        self.loop: asyncio.AbstractEventLoop | None = None
         self.is_active = False
         self.response_task = None
         self.verified_demographic_no: int | None = None
         self.verified_patient_name: str | None = None
+        self.upcoming_cache: dict[int, list] = {}  # demographicNo -> upcoming appointments, for this call
+        self.upcoming_changes: dict[int, int] = {}  # demographicNo -> bookings/cancellations made this call
+        self.upcoming_lock = threading.Lock()
+        self.patient_cache: dict[int, dict] = {}  # demographicNo -> demographics prefetched from caller ID
+        self.prefetch_task = None
 
     async def start(self):
+        if self.caller_number:
+            self.prefetch_task = asyncio.create_task(asyncio.to_thread(self._prefetch_caller))
         url = "wss://api.openai.com/v1/realtime?model=gpt-realtime"
         headers = {"Authorization": f"Bearer {OPENAI_API_KEY}", "OpenAI-Beta": "realtime=v1"}
         self.ws = await websockets.connect(url, additional_headers=headers)
+        self.loop = asyncio.get_running_loop()
         self.is_active = True
 
         # Get custom instructions from clinic config
@@ -216,7 +263,10 @@ class CallSession:
         args = json.loads(event.get("arguments", "{}"))
         
         print(f"[Tool] {name} called with args: {args}")
-        result = self._execute_tool(name, args)
+        # OSCAR calls are blocking; run them off the loop so audio keeps streaming.
+        # The caller is waiting on the line, so these lookups go ahead of chat and batch work.
+        with admission.priority(admission.REALTIME), admission.owner(f"call:{self.call_sid}"):
+            result = await asyncio.to_thread(self._execute_tool, name, args)
         print(f"[Tool] {name} result: {result}")
         
         await self.ws.send(json.dumps({
@@ -230,7 +280,8 @@ class CallSession:
             return self._verify_patient(args.get("name", ""), args.get("date_of_birth", ""), args.get("phone"))
         
         if tool_name == "transfer_to_staff":
-            asyncio.create_task(self._transfer_to_staff())
+            # _execute_tool runs in a worker thread, so schedule the transfer on the call's loop
+            asyncio.run_coroutine_threadsafe(self._transfer_to_staff(), self.loop)
             return {"success": True, "message": "Transferring call to staff."}
         
         if tool_name == "end_call":
@@ -242,28 +293,97 @@ class CallSession:
         
         if tool_name == "get_day_schedule":
             appts = oscar_client.get_day_appointments(args.get("provider_no"), args.get("date"))
+            if appts is None:
+                return {"error": "Could not load the schedule"}
             return {"booked_appointments": appts, "note": "Available times are slots NOT in this list. Clinic hours: 9am-5pm, 15min slots."}
         
+        if tool_name == "get_available_slots":
+            date = availability.resolve_date(args.get("date"))
+            if not date:
+                return {"error": availability.DATE_ERROR}
+            if not availability.is_clinic_day(date):
+                return {"date": date, "available_slots": [], "note": "The clinic is closed on weekends"}
+            appts = oscar_client.get_day_appointments(args.get("provider_no"), date)
+            if not isinstance(appts, list):  # an unreadable day must not look empty, or booked times are offered
+                return {"error": "Could not load the schedule"}
+            return {"date": date, "available_slots": availability.day_slots(appts, date)}
+        
+        if tool_name == "find_available_slots":
+            return self._find_available_slots(args)
+        
         if not self.verified_demographic_no:
             return {"error": "Identity not verified. Please provide your name and date of birth first."}
         
         if tool_name == "get_my_appointments":
-            return {"appointments": oscar_client.get_patient_appointments(self.verified_demographic_no)}
+            appointments = self._upcoming_appointments(self.verified_demographic_no)
+            if appointments is None:
+                return {"error": "Could not load your appointments"}
+            return {"appointments": appointments}
         
         if tool_name == "book_appointment":
             result = oscar_client.create_appointment(
                 self.verified_demographic_no, args.get("provider_no", "999998"),
                 args.get("date"), args.get("time"), 15, args.get("reason", "")
             )
-            return {"success": True, "appointment": result} if result else {"error": "Failed to book appointment"}
+            if not result:
+                return {"error": "Failed to book appointment"}
+            self._forget_upcoming(self.verified_demographic_no)
+            return {"success": True, "appointment": result}
         
         if tool_name == "cancel_appointment":
             appt_id = args.get("appointment_id")
             success = oscar_client.cancel_appointment(appt_id)
-            return {"success": success} if success else {"error": "Failed to cancel appointment"}
+            if not success:
+                return {"error": "Failed to cancel appointment"}
+            self._forget_upcoming(self.verified_demographic_no)
+            return {"success": success}
         
         return {"error": f"Unknown tool: {tool_name}"}
 
+    def _upcoming_appointments(self, demographic_no: int) -> list | None:
+        with self.upcoming_lock:
+            if demographic_no in self.upcoming_cache:
+                return self.upcoming_cache[demographic_no]
+            changes = self.upcoming_changes.get(demographic_no, 0)
+        upcoming = oscar_client.get_upcoming_appointments(demographic_no)
+        if upcoming is None:
+            return None  # not cached, so the next ask tries OSCAR again
+        self._store_upcoming(demographic_no, upcoming, changes)
+        return upcoming
+
+    def _store_upcoming(self, demographic_no: int, upcoming: list, changes: int):
+        """Cache a read unless the patient's appointments changed after it started"""
+        with self.upcoming_lock:
+            if self.upcoming_changes.get(demographic_no, 0) == changes:
+                self.upcoming_cache.setdefault(demographic_no, upcoming)
+
+    def _forget_upcoming(self, demographic_no: int):
+        """Drop a patient's cached appointments after a change; a prefetch already in flight won't restore them"""
+        with self.upcoming_lock:
+            self.upcoming_cache.pop(demographic_no, None)
+            self.upcoming_changes[demographic_no] = self.upcoming_changes.get(demographic_no, 0) + 1
+
+    def _find_available_slots(self, args: dict) -> dict:
+        providers = oscar_client.get_providers()
+        names = {str(p.get("providerNo")): f"{p.get('firstName', '')} {p.get('lastName', '')}".strip() for p in providers}
+        if args.get("provider_no"):
+            provider_nos = [str(args["provider_no"])]
+        else:
+            provider_nos = [str(p.get("providerNo")) for p in providers
+                            if p.get("providerNo") and p.get("providerType", "doctor") == "doctor"]
+        if not provider_nos:
+            return {"error": "Could not load the list of providers"}
+        try:
+            limit = int(args.get("limit") or 5)
+        except (TypeError, ValueError):
+            limit = 5
+        result = availability.search(oscar_client.get_day_appointments, provider_nos,
+                                     args.get("start_date"), args.get("end_date"), limit)
+        for slot in result.get("slots", []):
+            slot["provider_name"] = names.get(slot["provider_no"], "")
+        result.pop("searched", None)
+        return result
+
     async def _transfer_to_staff(self):
         await asyncio.sleep(3)
         if not STAFF_PHONE or not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN:
@@ -295,6 +415,10 @@ class CallSession:
         except ValueError:
             return {"error": "Invalid date format."}
         
+        indexed = self._verify_from_index(name, dob, phone)
+        if indexed:
+            return indexed
+        
         parts = name.split()
         last_name = parts[-1] if parts else name
         variations = [name, name.title(), name.upper()]
@@ -332,6 +456,57 @@ class CallSession:
         
         return {"error": "Multiple patients found. Please provide your phone number.", "need_phone": True}
 
+    def _prefetch_caller(self):
+        """Warm demographics and upcoming appointments of the patients registered under the caller's number"""
+        candidates = patient_index.index.by_phone(self.caller_number)[:MAX_PREFETCH]
+        if not candidates:
+            return
+        with admission.owner(f"call:{self.call_sid}"):
+            self._prefetch_candidates(candidates)
+
+    def _prefetch_candidates(self, candidates: list[dict]):
+        with self.upcoming_lock:
+            changes = {p["demographicNo"]: self.upcoming_changes.get(p["demographicNo"], 0) for p in candidates}
+        calls = {}
+        for p in candidates:
+            no = p["demographicNo"]
+            calls[f"details|{no}"] = lambda no=no: oscar_client.get_patient_details(no)
+            calls[f"upcoming|{no}"] = lambda no=no: oscar_client.get_upcoming_appointments(no)
+        results = parallel.gather(calls)
+        for p in candidates:
+            no = p["demographicNo"]
+            details, upcoming = results[f"details|{no}"], results[f"upcoming|{no}"]
+            if isinstance(details, dict) and "error" not in details:
+                self.patient_cache[no] = details
+            if isinstance(upcoming, list):  # a failure is not cached; get_my_appointments asks OSCAR again
+                self._store_upcoming(no, upcoming, changes[no])
+        oscar_logging.event("call.prefetched", patients=len(self.patient_cache), candidates=len(candidates))
+
+    def _verify_from_index(self, name: str, dob: str, phone: str | None) -> dict | None:
+        """Match the spoken name against the local patient index and confirm with one OSCAR fetch.
+        None means fall back to quickSearch (index not built yet, new patient, or stale entry); the
+        fresh chart must still match both the name and the date of birth."""
+        if not patient_index.index.ready:
+            return None
+        matches = [p for p in patient_index.index.search(name) if p["dob"] == dob]
+        if len(matches) > 1 and (phone or self.caller_number):
+            digits = patient_index.phone_digits(phone or self.caller_number)
+            matches = [p for p in matches if digits and digits in p["phone"]]
+        if len(matches) > 1:
+            return {"error": "Multiple patients found. Please provide your phone number.", "need_phone": True}
+        if not matches:
+            return None
+        details = self.patient_cache.get(matches[0]["demographicNo"]) or oscar_client.get_patient_details(matches[0]["demographicNo"])
+        if not details:
+            return None
+        patient_index.index.upsert(details)
+        if patient_index.dob_of(details) != dob or \
+                not patient_index.name_matches(name, details.get("firstName"), details.get("lastName")):
+            return None
+        self.verified_demographic_no = matches[0]["demographicNo"]
+        self.verified_patient_name = name
+        return {"success": True, "message": f"Identity verified. Hello {name}, how can I help you today?"}
+
     async def process_audio(self, mulaw_b64: str):
         if not self.is_active or not self.ws:
             return
@@ -339,6 +514,8 @@ class CallSession:
 
     async def stop(self):
         self.is_active = False
+        if self.prefetch_task:
+            self.prefetch_task.cancel()
         if self.response_task:
             self.response_task.cancel()
         if self.ws:
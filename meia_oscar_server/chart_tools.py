@@ -0,0 +1,53 @@
+"""OSCAR Composite Chart Tools"""
+
+from typing import List, Optional
+from demographic_tools import get_patient_details, get_patient_allergies
+from rx_tools import get_patient_medications
+from measurement_tools import get_patient_measurements
+from appointment_tools import get_patient_appointment_history
+import parallel
+
+DEFAULT_MEASUREMENT_TYPES = ["BP", "HR", "WT", "HT", "BMI", "TEMP", "A1C", "LDL", "EGFR"]
+
+
+def get_patient_chart_snapshot(patient_id: int, tool_context, measurement_types: Optional[List[str]] = None) -> dict:
+    """Get a one-call summary of a patient's chart: demographics, allergies, current medications,
+    recent measurements and appointment history, fetched from OSCAR in parallel.
+
+    Prefer this over calling the individual patient tools one by one when asked to summarize a patient.
+
+    Args:
+        patient_id: Patient demographic ID
+        measurement_types: Measurement type codes to include (optional, defaults to common vitals and labs:
+            BP, HR, WT, HT, BMI, TEMP, A1C, LDL, EGFR)
+
+    Returns:
+        dict with demographics, allergies, medications, measurements and appointments sections.
+        Sections that could not be fetched are omitted and listed in errors with the reason.
+    """
+    types = measurement_types or DEFAULT_MEASUREMENT_TYPES
+    results = parallel.gather({
+        "demographics": lambda: get_patient_details(patient_id, tool_context),
+        "allergies": lambda: get_patient_allergies(patient_id, tool_context),
+        "medications": lambda: get_patient_medications(patient_id, tool_context),
+        "measurements": lambda: get_patient_measurements(patient_id, types, tool_context),
+        "appointments": lambda: get_patient_appointment_history(patient_id, tool_context),
+    })
+
+    snapshot = {"patient_id": patient_id}
+    errors = {}
+    for section, result in results.items():
+        if isinstance(result, dict) and "error" in result:
+            errors[section] = result
+        else:
+            snapshot[section] = result
+    if errors:
+        snapshot["errors"] = errors
+    return snapshot
+
+
+CHART_TOOLS = [get_patient_chart_snapshot]
+
+CHART_TOOL_DESCRIPTIONS = {
+    "get_patient_chart_snapshot": "Fetching patient chart summary...",
+}
@@ -1,7 +1,10 @@
 """OSCAR Demographic/Patient Tools"""
 
-from typing import Optional
+from typing import List, Optional
 from tools import oscar_request, handle_response
+import parallel
+
+MAX_BATCH = 100
 
 
 def search_patients(query: str, tool_context) -> dict:
@@ -21,11 +24,12 @@ def search_patients(query: str, tool_context) -> dict:
     return handle_response(resp, "search_patients")
 
 
-def get_patient_details(patient_id: int, tool_context) -> dict:
+def get_patient_details(patient_id: int, tool_context, full_detail: bool = False) -> dict:
     """Get complete patient demographics by ID.
 
     Args:
         patient_id: Patient demographic ID (demographicNo)
+        full_detail: Return every record and field from OSCAR instead of the compact summary (default False)
 
     Returns:
         dict containing:
@@ -34,7 +38,7 @@ def get_patient_details(patient_id: int, tool_context) -> dict:
         - statusLists: patient status flags
     """
     resp = oscar_request("GET", f"/ws/services/demographics/{patient_id}", tool_context.state.get("session_id"))
-    return handle_response(resp, "get_patient_details")
+    return handle_response(resp, "get_patient_details", full=full_detail)
 
 
 def get_patient_allergies(patient_id: int, tool_context) -> dict:
@@ -51,6 +55,36 @@ def get_patient_allergies(patient_id: int, tool_context) -> dict:
     return handle_response(resp, "get_patient_allergies")
 
 
+def get_patient_details_batch(patient_ids: List[int], tool_context) -> dict:
+    """Get demographics for many patients in one call (e.g. everyone on today's day sheet).
+
+    Args:
+        patient_ids: List of patient demographic IDs (up to 100)
+
+    Returns:
+        dict keyed by patient ID (as a string), each value the same compact record
+        get_patient_details returns, or error/text for that patient
+    """
+    if len(patient_ids) > MAX_BATCH:
+        return {"error": f"At most {MAX_BATCH} patients per batch"}
+    return parallel.map_keyed(lambda pid: get_patient_details(pid, tool_context), patient_ids)
+
+
+def get_patient_allergies_batch(patient_ids: List[int], tool_context) -> dict:
+    """Get active allergies for many patients in one call.
+
+    Args:
+        patient_ids: List of patient demographic IDs (up to 100)
+
+    Returns:
+        dict keyed by patient ID (as a string), each value that patient's active allergies
+        (as from get_patient_allergies), or error/text for that patient
+    """
+    if len(patient_ids) > MAX_BATCH:
+        return {"error": f"At most {MAX_BATCH} patients per batch"}
+    return parallel.map_keyed(lambda pid: get_patient_allergies(pid, tool_context), patient_ids)
+
+
 def create_patient(first_name: str, last_name: str, date_of_birth: str, sex: str, tool_context,
                    hin: Optional[str] = None, address: Optional[str] = None, city: Optional[str] = None,
                    province: Optional[str] = None, postal: Optional[str] = None, phone: Optional[str] = None,
@@ -103,11 +137,14 @@ def create_patient(first_name: str, last_name: str, date_of_birth: str, sex: str
     return handle_response(resp, "create_patient")
 
 
-DEMOGRAPHIC_TOOLS = [search_patients, get_patient_details, get_patient_allergies, create_patient]
+DEMOGRAPHIC_TOOLS = [search_patients, get_patient_details, get_patient_allergies, get_patient_details_batch,
+                     get_patient_allergies_batch, create_patient]
 
 TOOL_DESCRIPTIONS = {
     "search_patients": "Searching patient database...",
     "get_patient_details": "Retrieving patient details...",
     "get_patient_allergies": "Fetching patient allergies...",
+    "get_patient_details_batch": "Retrieving details for multiple patients...",
+    "get_patient_allergies_batch": "Fetching allergies for multiple patients...",
     "create_patient": "Creating new patient record...",
 }
@@ -0,0 +1,121 @@
+"""Hedged requests for read-only OSCAR endpoints on the phone assistant's speaking path
+
+Opt-in (OSCAR_HEDGING=1). For HEDGED_ENDPOINTS, if the first attempt has not
+answered within the endpoint's observed latency percentile, a second identical
+request is sent and whichever returns first wins. Hedges are capped at
+OSCAR_HEDGE_BUDGET of eligible requests so a slow OSCAR is not hit twice as hard.
+
+    OSCAR_HEDGING            1 to enable (default 0)
+    OSCAR_HEDGE_PERCENTILE   latency percentile that triggers a hedge (default 95)
+    OSCAR_HEDGE_BUDGET       max fraction of eligible requests that may be hedged (default 0.1)
+"""
+
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import admission
+import metrics
+
+ENABLED = os.getenv("OSCAR_HEDGING", "0") == "1"
+PERCENTILE = float(os.getenv("OSCAR_HEDGE_PERCENTILE", "95"))
+BUDGET = float(os.getenv("OSCAR_HEDGE_BUDGET", "0.1"))
+MIN_SAMPLES = 20
+WINDOW = 200
+
+# Hedge key -> endpoint pattern. Only idempotent GETs belong here.
+HEDGED_ENDPOINTS = {
+    "quickSearch": re.compile(r"^/ws/services/demographics/quickSearch$"),
+    "schedule_day": re.compile(r"^/ws/services/schedule/(?:[^/]+/)?day/[^/]+$"),
+}
+
+
+class LatencyWindow:
+    """Latencies (seconds) of the most recent requests for one endpoint"""
+
+    def __init__(self, size: int = WINDOW):
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class Hedger:
+    def __init__(self, enabled: bool = ENABLED, percentile: float = PERCENTILE, budget: float = BUDGET):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.windows = {key: LatencyWindow() for key in HEDGED_ENDPOINTS}
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+        # A primary and its hedge for every admissible request, so a hedge never queues behind its primary
+        self._executor = ThreadPoolExecutor(max_workers=2 * admission.MAX_IN_FLIGHT, thread_name_prefix="oscar-hedge")
+
+    def eligible(self, method: str, endpoint: str) -> str | None:
+        """Hedge key for this request, or None if it must not be hedged"""
+        if not self.enabled or method.upper() != "GET":
+            return None
+        return next((key for key, pattern in HEDGED_ENDPOINTS.items() if pattern.match(endpoint)), None)
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                metrics.incr("oscar.hedge.over_budget")
+                return False
+            self.hedges += 1
+            return True
+
+    def _timed(self, key: str, fn):
+        """Call fn() and record its latency; failures (e.g. timeouts) count too, so a slow OSCAR raises the threshold"""
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            self.windows[key].record(time.monotonic() - started)
+
+    def run(self, key: str, fn):
+        """Call fn(), hedging with a second fn() if the first is slower than the latency threshold"""
+        with self._lock:
+            self.requests += 1
+        metrics.incr("oscar.hedge.eligible")
+        threshold = self.windows[key].percentile(self.percentile)
+        if threshold is None:
+            return self._timed(key, fn)
+
+        primary = self._executor.submit(contextvars.copy_context().run, self._timed, key, fn)
+        done, _ = wait([primary], timeout=threshold)
+        if done or not self._take_budget():
+            return primary.result()
+
+        metrics.incr("oscar.hedge.sent")
+        hedge = self._executor.submit(contextvars.copy_context().run, self._timed, key, fn)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner or not pending:
+                winner = winner or done.pop()
+                metrics.incr("oscar.hedge.won" if winner is hedge else "oscar.hedge.primary_won")
+                return winner.result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"enabled": self.enabled, "eligible": self.requests, "hedged": self.hedges,
+                    "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+                    "wins": metrics.get("oscar.hedge.won")}
+
+
+hedger = Hedger()
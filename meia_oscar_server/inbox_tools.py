@@ -3,11 +3,12 @@
 from tools import oscar_request, handle_response
 
 
-def get_my_inbox(tool_context, limit: int = 20) -> dict:
+def get_my_inbox(tool_context, limit: int = 20, full_detail: bool = False) -> dict:
     """Get unacknowledged inbox items (labs, documents, reports) for current provider.
 
     Args:
         limit: Maximum items to return (default 20)
+        full_detail: Return every record and field from OSCAR instead of the compact summary (default False)
 
     Returns:
         dict with array of inbox items, each containing:
@@ -15,7 +16,7 @@ def get_my_inbox(tool_context, limit: int = 20) -> dict:
     """
     resp = oscar_request("GET", "/ws/services/inbox/mine", tool_context.state.get("session_id"),
                          params={"limit": limit})
-    return handle_response(resp, "get_my_inbox")
+    return handle_response(resp, "get_my_inbox", full=full_detail)
 
 
 def get_inbox_count(tool_context) -> dict:
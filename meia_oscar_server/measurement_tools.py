@@ -2,6 +2,10 @@
 
 from typing import List, Optional
 from tools import oscar_request, handle_response
+import parallel
+import write_queue
+
+MAX_BATCH = 100
 
 
 def get_patient_measurements(patient_id: int, types: List[str], tool_context) -> dict:
@@ -25,6 +29,22 @@ def get_patient_measurements(patient_id: int, types: List[str], tool_context) ->
     return handle_response(resp, "get_patient_measurements")
 
 
+def get_patient_measurements_batch(patient_ids: List[int], types: List[str], tool_context) -> dict:
+    """Get the same measurement types for many patients in one call.
+
+    Args:
+        patient_ids: List of patient demographic IDs (up to 100)
+        types: List of measurement type codes, same as get_patient_measurements (e.g. ["BP", "A1C"])
+
+    Returns:
+        dict keyed by patient ID (as a string), each value that patient's measurements,
+        or error/text for that patient
+    """
+    if len(patient_ids) > MAX_BATCH:
+        return {"error": f"At most {MAX_BATCH} patients per batch"}
+    return parallel.map_keyed(lambda pid: get_patient_measurements(pid, types, tool_context), patient_ids)
+
+
 def save_measurement(patient_id: int, measurement_type: str, value: str, date_observed: str,
                      tool_context, comments: Optional[str] = None) -> dict:
     """Save a measurement/vital sign for a patient.
@@ -40,19 +60,31 @@ def save_measurement(patient_id: int, measurement_type: str, value: str, date_ob
         comments: Additional notes (optional)
 
     Returns:
-        dict with saved measurement details including id, type, dataField, dateObserved
+        dict with saved measurement details including id, type, dataField, dateObserved.
+        When the write queue is enabled: dict with queued=True and the queue entry id.
     """
     data = {"type": measurement_type, "dataField": value, "dateObserved": date_observed}
     if comments:
         data["comments"] = comments
 
-    resp = oscar_request("POST", f"/ws/services/measurements/{patient_id}/save", tool_context.state.get("session_id"), json=data)
+    session_id = tool_context.state.get("session_id")
+    if write_queue.ENABLED:
+        return write_queue.queue.enqueue("measurement", patient_id, session_id, {"patient_id": patient_id, "data": data})
+    return _write_measurement(session_id, {"patient_id": patient_id, "data": data})
+
+
+def _write_measurement(session_id: str, payload: dict) -> dict:
+    resp = oscar_request("POST", f"/ws/services/measurements/{payload['patient_id']}/save", session_id, json=payload["data"])
     return handle_response(resp, "save_measurement")
 
 
-MEASUREMENT_TOOLS = [get_patient_measurements, save_measurement]
+write_queue.register("measurement", _write_measurement)
+
+
+MEASUREMENT_TOOLS = [get_patient_measurements, get_patient_measurements_batch, save_measurement]
 
 MEASUREMENT_TOOL_DESCRIPTIONS = {
     "get_patient_measurements": "Fetching patient measurements...",
+    "get_patient_measurements_batch": "Fetching measurements for multiple patients...",
     "save_measurement": "Saving measurement...",
 }
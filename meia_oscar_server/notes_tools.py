@@ -4,9 +4,61 @@ Note: Direct notes API requires HTTP session attributes not available via OAuth.
 This module uses a tickler-based workaround to save encounter notes.
 """
 
-import sys
-from datetime import datetime
-from tools import oscar_request
+import contextvars
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from tools import oscar_request, current_provider_no
+import admission
+import oscar_logging
+import resilience
+import tickler_reaper
+import write_queue
+
+SEARCH_PAGE = 50
+
+
+def _find_temp_tickler(session_id: str, patient_id: int, provider_no: str, marker: str):
+    """Find the temp tickler by marker. Returns (tickler_id, error); pages past SEARCH_PAGE results."""
+    today = datetime.now().date()
+    query = {"demographicNo": str(patient_id), "status": "A", "assignee": provider_no,
+             "serviceStartDate": today.isoformat(), "serviceEndDate": (today + timedelta(days=1)).isoformat()}
+    start = 0
+    while True:
+        resp = oscar_request("POST", "/ws/services/tickler/search", session_id,
+                             params={"startIndex": start, "limit": SEARCH_PAGE}, json=query)
+        if not resp.ok:
+            return None, {"error": resp.status_code, "text": resp.text}
+        data = resp.json()
+        page = data.get("content", [])
+        for t in page:
+            if t.get("message") == marker:
+                return t.get("id"), None
+        start += len(page)
+        if len(page) < SEARCH_PAGE or start >= data.get("total", float("inf")):
+            return None, {"error": "Could not find created tickler", "marker": marker}
+
+
+def _complete_temp_tickler(session_id: str, tickler_id: int, marker: str):
+    """Complete the temp tickler; it does not affect the saved note.
+    If this fails the tickler stays tracked and tickler_reaper completes it later."""
+    with admission.priority(admission.BACKGROUND):
+        try:
+            resp = oscar_request("POST", "/ws/services/tickler/complete", session_id, json={"ticklers": [tickler_id]})
+            ok, status = resp.ok, resp.status_code
+        except Exception as e:
+            ok, status = False, str(e)
+    if ok:
+        tickler_reaper.temp_ticklers.resolve(marker)
+    else:
+        oscar_logging.event("save_note.complete_failed", level=logging.WARNING, tickler_id=tickler_id, status=status)
+
+
+def _complete_in_background(session_id: str, tickler_id: int, marker: str):
+    """_complete_temp_tickler off the request path"""
+    threading.Thread(target=contextvars.copy_context().run, args=(_complete_temp_tickler, session_id, tickler_id, marker),
+                     daemon=True).start()
 
 
 def save_note(patient_id: int, note_text: str, tool_context) -> dict:
@@ -27,19 +79,43 @@ def save_note(patient_id: int, note_text: str, tool_context) -> dict:
         note_text: The note content (plain text or formatted text)
 
     Returns:
-        dict with noteId of created note on success, or error details on failure
+        dict with noteId of created note on success, or error details on failure.
+        When the write queue is enabled: dict with queued=True and the queue entry id;
+        the note syncs to OSCAR in the background (see get_pending_writes).
     """
-    import uuid
     session_id = tool_context.state.get("session_id")
-    unique_marker = f"_temp_{uuid.uuid4().hex[:8]}_"
+    payload = {"patient_id": patient_id, "note_text": note_text}
+    if write_queue.ENABLED:
+        # Fixed marker so a retried write finds the temp tickler an earlier attempt created
+        payload["marker"] = _new_marker()
+        return write_queue.queue.enqueue("note", patient_id, session_id, payload)
+    return _write_note(session_id, payload)
+
+
+def _new_marker() -> str:
+    return f"_temp_{uuid.uuid4().hex[:8]}_"
+
+
+def _write_note(session_id: str, payload: dict) -> dict:
+    patient_id, note_text = payload["patient_id"], payload["note_text"]
+    queued = "marker" in payload
+    unique_marker = payload.get("marker") or _new_marker()
     
-    # Get current provider ID
-    resp = oscar_request("GET", "/ws/services/providerService/provider/me", session_id)
-    if not resp.ok:
-        return {"error": resp.status_code, "text": "Failed to get current provider"}
-    provider_no = resp.json().get("providerNo")
+    # Provider number recorded at login
+    provider_no = current_provider_no(session_id)
+    if not provider_no:
+        return {"error": "Failed to get current provider"}
+    
+    if queued:
+        # A queued write may be a retry; reuse the temp tickler an earlier attempt created
+        tickler_id, error = _find_temp_tickler(session_id, patient_id, provider_no, unique_marker)
+        if tickler_id is not None:
+            return _save_tickler_note(session_id, patient_id, note_text, tickler_id, unique_marker, queued)
+        if "marker" not in error:
+            return error  # search failed; do not risk a second temp tickler
     
-    # 1. Create temp tickler with unique marker
+    # 1. Create temp tickler with unique marker (tracked first, so the reaper can find it if we die mid-way)
+    tickler_reaper.temp_ticklers.track(unique_marker, patient_id, provider_no)
     tickler_data = {
         "demographicNo": patient_id,
         "taskAssignedTo": provider_no,
@@ -55,22 +131,14 @@ def save_note(patient_id: int, note_text: str, tool_context) -> dict:
     if not create_result.get("success"):
         return {"error": "Tickler creation failed", "details": create_result}
     
-    # 2. Search for the tickler we just created
-    resp = oscar_request("POST", "/ws/services/tickler/search", session_id,
-                         params={"startIndex": 0, "limit": 50},
-                         json={"demographicNo": str(patient_id), "status": "A"})
-    if not resp.ok:
-        return {"error": resp.status_code, "text": resp.text}
-    
-    tickler_id = None
-    for t in resp.json().get("content", []):
-        if t.get("message") == unique_marker:
-            tickler_id = t.get("id")
-            break
-    
-    if not tickler_id:
-        return {"error": "Could not find created tickler", "marker": unique_marker}
-    
+    # 2. Find the tickler we just created (tickler/add does not return its id)
+    tickler_id, error = _find_temp_tickler(session_id, patient_id, provider_no, unique_marker)
+    if error:
+        return error
+    return _save_tickler_note(session_id, patient_id, note_text, tickler_id, unique_marker, queued)
+
+
+def _save_tickler_note(session_id: str, patient_id: int, note_text: str, tickler_id, marker: str, queued: bool) -> dict:
     # 3. Save note via ticklerSaveNote
     note_data = {
         "note": note_text,
@@ -79,16 +147,36 @@ def save_note(patient_id: int, note_text: str, tool_context) -> dict:
     }
     resp = oscar_request("POST", "/ws/services/notes/ticklerSaveNote", session_id, json=note_data)
     result = resp.json() if resp.ok else {"error": resp.status_code, "text": resp.text}
+    if queued and not resp.ok and not resilience.was_sent(result):
+        return result  # the queue retries; leave the temp tickler active for it
     
-    # 4. Complete temp tickler
-    oscar_request("POST", "/ws/services/tickler/complete", session_id, json={"ticklers": [int(tickler_id)]})
+    # 4. Complete temp tickler. The queue worker is already off the request path, and its
+    # detached credentials are dropped as soon as this returns, so it completes inline.
+    if queued:
+        _complete_temp_tickler(session_id, int(tickler_id), marker)
+    else:
+        _complete_in_background(session_id, int(tickler_id), marker)
     
-    print(f"[save_note] {result}", flush=True, file=sys.stderr)
+    oscar_logging.log_result("save_note", result)
     return result
 
 
-NOTES_TOOLS = [save_note]
+write_queue.register("note", _write_note)
+
+
+def get_pending_writes(tool_context) -> dict:
+    """Get chart writes (notes, measurements) from this session that have not synced to OSCAR yet.
+
+    Returns:
+        dict with pending and failed counts and entries, each containing:
+        id, kind, patient_id, status (pending/synced/failed), attempts, queued_at, last_error, result
+    """
+    return write_queue.queue.status(tool_context.state.get("session_id"))
+
+
+NOTES_TOOLS = [save_note, get_pending_writes]
 
 NOTES_TOOL_DESCRIPTIONS = {
     "save_note": "Saving encounter note...",
+    "get_pending_writes": "Checking unsynced chart writes...",
 }
@@ -1,13 +1,20 @@
 """OSCAR API client using stored service tokens for phone system"""
 
+import logging
 import os
-import requests
-from requests_oauthlib import OAuth1
+from datetime import datetime
+import availability
+import oscar_http
+import oscar_logging
+import resilience
+import schedule_cache
+import signing
 import store
 
 OSCAR_URL = os.getenv("OSCAR_URL", "https://ec2-16-52-150-143.ca-central-1.compute.amazonaws.com:8443/oscar")
 CONSUMER_KEY = os.getenv("OSCAR_CONSUMER_KEY", "ocf56sfzwdd21ma7")
 CONSUMER_SECRET = os.getenv("OSCAR_CONSUMER_SECRET", "3bbcwhshleje74mu")
+SCOPE = "service"  # Pool scope for phone-system requests made with the service tokens
 
 
 def _get_auth():
@@ -17,43 +24,88 @@ def _get_auth():
     secret = config.get("service_token_secret")
     if not token or not secret:
         return None
-    return OAuth1(CONSUMER_KEY, CONSUMER_SECRET, token, secret)
+    return signing.signers.get(SCOPE, CONSUMER_KEY, CONSUMER_SECRET, token, secret)
 
 
 def search_patients(query: str) -> list:
     """Search patients by name (LastName,FirstName format)"""
     auth = _get_auth()
     if not auth:
-        print("[oscar_client] No auth tokens available")
+        oscar_logging.event("oscar_client.no_auth", level=logging.WARNING)
         return []
     # OSCAR quickSearch expects LastName,FirstName format
     # Convert "FirstName LastName" to "LastName,FirstName"
     parts = query.strip().split()
     if len(parts) == 2:
         query = f"{parts[1]},{parts[0]}"  # LastName,FirstName
-    print(f"[oscar_client] Searching with query='{query}'")
-    resp = requests.get(f"{OSCAR_URL}/ws/services/demographics/quickSearch", params={"query": query}, auth=auth, verify=False)
-    print(f"[oscar_client] Response: {resp.status_code} {resp.text[:200] if resp.text else ''}")
+    oscar_logging.event("oscar_client.search_patients", query=query)
+    resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/demographics/quickSearch", SCOPE, params={"query": query}, auth=auth)
+    oscar_logging.log_response("oscar_client.search_patients", resp, "GET", "/ws/services/demographics/quickSearch")
     return resp.json().get("content", []) if resp.ok else []
 
 
+def list_demographics(offset: int = 0, limit: int = 500) -> dict | None:
+    """One page of all demographics ({"content": [...], "total": n}), for the local patient index"""
+    auth = _get_auth()
+    if not auth:
+        return None
+    resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/demographics", SCOPE,
+                              params={"offset": offset, "limit": limit}, auth=auth)
+    oscar_logging.log_response("oscar_client.list_demographics", resp, "GET", "/ws/services/demographics")
+    return resp.json() if resp.ok else None
+
+
 def get_patient_details(demographic_no: int) -> dict | None:
     """Get patient details including DOB for verification"""
     auth = _get_auth()
     if not auth:
         return None
-    resp = requests.get(f"{OSCAR_URL}/ws/services/demographics/{demographic_no}", auth=auth, verify=False)
+    resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/demographics/{demographic_no}", SCOPE, auth=auth)
     return resp.json() if resp.ok else None
 
 
-def get_patient_appointments(demographic_no: int) -> list:
-    """Get patient's upcoming appointments"""
+def get_patient_appointments(demographic_no: int) -> list | None:
+    """Get patient's appointment history; None if OSCAR could not be read"""
     auth = _get_auth()
     if not auth:
-        return []
-    resp = requests.post(f"{OSCAR_URL}/ws/services/schedule/{demographic_no}/appointmentHistory", auth=auth, verify=False)
-    print(f"[oscar_client] get_patient_appointments: {resp.status_code} {resp.text[:500] if resp.text else ''}")
-    return resp.json() if resp.ok else []
+        return None
+    resp = oscar_http.request("POST", f"{OSCAR_URL}/ws/services/schedule/{demographic_no}/appointmentHistory", SCOPE, auth=auth)
+    oscar_logging.log_response("oscar_client.get_patient_appointments", resp, "POST", "/ws/services/schedule/appointmentHistory")
+    return resp.json() if resp.ok else None
+
+
+def _appointment_date(value) -> str | None:
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=availability.TZ).date().isoformat()
+    return str(value)[:10] if value else None
+
+
+def get_upcoming_appointments(demographic_no: int, limit: int = 10) -> list | None:
+    """Patient's upcoming, non-cancelled appointments, soonest first, in a compact form for the phone model.
+    None if the appointment history could not be read or has an unexpected shape."""
+    history = get_patient_appointments(demographic_no)
+    if isinstance(history, dict):
+        history = history.get("content", history.get("appointments"))
+    if not isinstance(history, list):
+        return None
+    now = datetime.now(availability.TZ)
+    today, minute_now = now.date().isoformat(), now.hour * 60 + now.minute
+    upcoming = []
+    for appt in history:
+        if not isinstance(appt, dict):
+            continue
+        date = _appointment_date(appt.get("appointmentDate"))
+        start = availability.parse_time(appt.get("startTime"))
+        if not date or availability.is_cancelled(appt) or date < today:
+            continue
+        if date == today and start is not None and start < minute_now:
+            continue
+        upcoming.append({"id": appt.get("id"), "date": date,
+                         "time": availability.format_time(start) if start is not None else appt.get("startTime"),
+                         "provider": appt.get("providerName") or appt.get("providerNo"),
+                         "reason": appt.get("reason") or "", "status": appt.get("status")})
+    upcoming.sort(key=lambda a: (a["date"], str(a["time"])))
+    return upcoming[:limit]
 
 
 def create_appointment(demographic_no: int, provider_no: str, date: str, start_time: str, duration: int = 15, reason: str = "") -> dict | None:
@@ -77,10 +129,16 @@ def create_appointment(demographic_no: int, provider_no: str, date: str, start_t
     }
     if reason:
         data["reason"] = reason
-    print(f"[oscar_client] create_appointment: {data}")
-    resp = requests.post(f"{OSCAR_URL}/ws/services/schedule/add", json=data, auth=auth, verify=False)
-    print(f"[oscar_client] create_appointment response: {resp.status_code} {resp.text[:500] if resp.text else ''}")
-    return resp.json() if resp.ok else None
+    oscar_logging.event("oscar_client.create_appointment", provider_no=provider_no, date=date, start_time=time_12h)
+    resp = oscar_http.request("POST", f"{OSCAR_URL}/ws/services/schedule/add", SCOPE, json=data, auth=auth)
+    oscar_logging.log_response("oscar_client.create_appointment", resp, "POST", "/ws/services/schedule/add")
+    if not resp.ok:
+        if resilience.response_sent(resp):
+            schedule_cache.invalidate(provider_no, date)  # may have been booked after all
+        return None
+    result = resp.json()
+    schedule_cache.add(provider_no, date, result)
+    return result
 
 
 def get_appointment(appointment_no: int) -> dict | None:
@@ -88,8 +146,8 @@ def get_appointment(appointment_no: int) -> dict | None:
     auth = _get_auth()
     if not auth:
         return None
-    resp = requests.get(f"{OSCAR_URL}/ws/services/schedule/appointment/{appointment_no}", auth=auth, verify=False)
-    print(f"[oscar_client] get_appointment({appointment_no}): {resp.status_code} {resp.text[:500] if resp.text else ''}")
+    resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/schedule/appointment/{appointment_no}", SCOPE, auth=auth)
+    oscar_logging.log_response("oscar_client.get_appointment", resp, "GET", "/ws/services/schedule/appointment")
     return resp.json() if resp.ok else None
 
 
@@ -98,7 +156,11 @@ def cancel_appointment(appointment_no: int) -> bool:
     auth = _get_auth()
     if not auth:
         return False
-    resp = requests.post(f"{OSCAR_URL}/ws/services/schedule/deleteAppointment", json={"id": appointment_no}, auth=auth, verify=False)
+    resp = oscar_http.request("POST", f"{OSCAR_URL}/ws/services/schedule/deleteAppointment", SCOPE, json={"id": appointment_no}, auth=auth)
+    if resp.ok:
+        schedule_cache.remove(appointment_no)
+    elif resilience.response_sent(resp):
+        schedule_cache.drop(appointment_no)
     return resp.ok
 
 
@@ -107,19 +169,51 @@ def get_providers() -> list:
     auth = _get_auth()
     if not auth:
         return []
-    resp = requests.get(f"{OSCAR_URL}/ws/services/providerService/providers_json", auth=auth, verify=False)
-    print(f"[oscar_client] get_providers: {resp.status_code} {resp.text[:500] if resp.text else ''}")
+    resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/providerService/providers_json", SCOPE, auth=auth)
+    oscar_logging.log_response("oscar_client.get_providers", resp, "GET", "/ws/services/providerService/providers_json")
     if resp.ok:
         data = resp.json()
         return data.get("content", []) if isinstance(data, dict) else data
     return []
 
 
-def get_day_appointments(provider_no: str, date: str) -> list:
-    """Get existing appointments for a provider on a date (to determine busy times)"""
+def get_day_appointments(provider_no: str, date: str) -> list | None:
+    """Get existing appointments for a provider on a date (to determine busy times); None if unavailable"""
+    cached = schedule_cache.get(provider_no, date)
+    if cached is not None:
+        return cached
     auth = _get_auth()
     if not auth:
-        return []
-    resp = requests.get(f"{OSCAR_URL}/ws/services/schedule/{provider_no}/day/{date}", auth=auth, verify=False)
-    print(f"[oscar_client] get_day_appointments: {resp.status_code} {resp.text[:500] if resp.text else ''}")
-    return resp.json() if resp.ok else []
+        return None
+    read_version = schedule_cache.version(provider_no, date)
+    resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/schedule/{provider_no}/day/{date}", SCOPE, auth=auth)
+    oscar_logging.log_response("oscar_client.get_day_appointments", resp, "GET", "/ws/services/schedule/day")
+    if not resp.ok:
+        return None
+    appointments = resp.json()
+    if isinstance(appointments, dict):
+        appointments = appointments.get("content")
+    if not isinstance(appointments, list):
+        return None
+    schedule_cache.put(provider_no, date, appointments, read_version)
+    return appointments
+
+
+def search_ticklers(query: dict, start: int = 0, limit: int = 50) -> dict | None:
+    """Get one page of ticklers matching `query` ({"content": [...], "total": n})"""
+    auth = _get_auth()
+    if not auth:
+        return None
+    resp = oscar_http.request("POST", f"{OSCAR_URL}/ws/services/tickler/search", SCOPE,
+                              params={"startIndex": start, "limit": limit}, json=query, auth=auth)
+    oscar_logging.log_response("oscar_client.search_ticklers", resp, "POST", "/ws/services/tickler/search")
+    return resp.json() if resp.ok else None
+
+
+def complete_ticklers(tickler_ids: list) -> bool:
+    """Mark ticklers as completed"""
+    auth = _get_auth()
+    if not auth:
+        return False
+    resp = oscar_http.request("POST", f"{OSCAR_URL}/ws/services/tickler/complete", SCOPE, json={"ticklers": tickler_ids}, auth=auth)
+    return resp.ok
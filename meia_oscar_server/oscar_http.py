@@ -0,0 +1,195 @@
+"""Shared HTTP transport for OSCAR requests
+
+Keeps one keep-alive requests.Session per (OSCAR host, scope) so repeated tool
+calls reuse the TCP + TLS connection instead of handshaking every time. The
+scope is the caller's session ID (or "service" for the phone system) so that
+cookie jars are never shared between providers.
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from cache import TTLCache
+from singleflight import SingleFlight
+import admission
+import hedging
+import metrics
+import resilience
+
+POOL_SIZE = int(os.getenv("OSCAR_POOL_SIZE", "10"))
+POOL_IDLE_TIMEOUT = float(os.getenv("OSCAR_POOL_IDLE_TIMEOUT", "120"))
+REFERENCE_TTL = float(os.getenv("OSCAR_REFERENCE_TTL", "3600"))
+REFERENCE_CACHE_SIZE = int(os.getenv("OSCAR_REFERENCE_CACHE_SIZE", "256"))
+
+# Reference data that changes rarely: endpoint -> (ttl seconds, shared across scopes).
+# Shared entries are clinic-wide; the rest (e.g. provider/me) are cached per session.
+REFERENCE_ENDPOINTS = {
+    "/ws/services/schedule/statuses": (REFERENCE_TTL, True),
+    "/ws/services/schedule/types": (REFERENCE_TTL, True),
+    "/ws/services/providerService/providers_json": (REFERENCE_TTL, True),
+    "/ws/services/providerService/provider/me": (REFERENCE_TTL, False),
+}
+
+
+class SessionPool:
+    """Pool of keep-alive sessions keyed by (host, scope), dropped after sitting idle."""
+
+    def __init__(self, pool_size: int = POOL_SIZE, idle_timeout: float = POOL_IDLE_TIMEOUT):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self._sessions: dict[tuple[str, str], tuple[requests.Session, float]] = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.verify = False
+        return session
+
+    def _evict_idle(self, now: float):
+        for key, (session, last_used) in list(self._sessions.items()):
+            if now - last_used > self.idle_timeout:
+                del self._sessions[key]
+                session.close()
+
+    def get(self, url: str, scope: str = "") -> requests.Session:
+        """Get the pooled session for the host of `url` within `scope`"""
+        parts = urlsplit(url)
+        key = (f"{parts.scheme}://{parts.netloc}", scope)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._sessions.get(key)
+            session = entry[0] if entry else self._new_session()
+            self._sessions[key] = (session, now)
+        return session
+
+    def close(self, scope: str | None = None):
+        """Close pooled sessions for a scope, or all of them if scope is None"""
+        with self._lock:
+            for key in [k for k in self._sessions if scope is None or k[1] == scope]:
+                self._sessions.pop(key)[0].close()
+
+
+pool = SessionPool()
+reference_cache = TTLCache(maxsize=REFERENCE_CACHE_SIZE, default_ttl=REFERENCE_TTL)
+inflight = SingleFlight()
+breakers: dict[str, resilience.CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def endpoint_of(url: str) -> str:
+    """Strip the OSCAR base URL, e.g. https://host/oscar/ws/services/x -> /ws/services/x"""
+    path = urlsplit(url).path
+    i = path.find("/ws/")
+    return path[i:] if i >= 0 else path
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def breaker_for(url: str) -> resilience.CircuitBreaker:
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        if host not in breakers:
+            breakers[host] = resilience.CircuitBreaker(host)
+        return breakers[host]
+
+
+def _attempt(method: str, url: str, scope: str, **kwargs) -> requests.Response:
+    with admission.controller.slot(scope) as admitted:
+        if not admitted:
+            raise admission.AdmissionTimeout()
+        return pool.get(url, scope).request(method, url, **kwargs)
+
+
+def _send(method: str, url: str, scope: str, **kwargs) -> requests.Response:
+    """Send with per-endpoint timeouts, jittered retries for GETs, a per-host circuit breaker
+    and an admission slot (see admission.py) held for each attempt. Eligible reads are hedged
+    (see hedging.py).
+
+    Transport failures come back as a synthetic 503 rather than an exception.
+    """
+    endpoint = endpoint_of(url)
+    kwargs.setdefault("timeout", resilience.timeout_for(endpoint, method))
+    breaker = breaker_for(url)
+    hedge_key = hedging.hedger.eligible(method, endpoint)
+    attempts = 1 + (resilience.RETRIES if method.upper() == "GET" else 0)
+    for attempt in range(attempts):
+        if attempt:
+            metrics.incr("oscar.retries")
+            time.sleep(resilience.backoff(attempt - 1))
+        if not breaker.allow():
+            return resilience.unavailable_response(url, "circuit open")
+        try:
+            if hedge_key:
+                resp = hedging.hedger.run(hedge_key, lambda: _attempt(method, url, scope, **kwargs))
+            else:
+                resp = _attempt(method, url, scope, **kwargs)
+        except admission.AdmissionTimeout:
+            breaker.record_abandoned()
+            return resilience.unavailable_response(url, "too many concurrent OSCAR requests")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            breaker.record_failure()
+            metrics.incr("oscar.timeouts" if isinstance(e, requests.Timeout) else "oscar.connection_errors")
+            resp = resilience.unavailable_response(url, type(e).__name__, sent=not resilience.never_sent(e))
+            continue
+        except BaseException:
+            breaker.record_abandoned()
+            raise
+        if resp.status_code in resilience.RETRY_STATUSES:
+            breaker.record_failure()
+            continue
+        breaker.record_success()
+        return resp
+    return resp
+
+
+def _fetch_shared(method: str, url: str, scope: str, **kwargs) -> requests.Response:
+    resp = _send(method, url, scope, **kwargs)
+    resp.content  # Buffer the body so every waiter can read it
+    return resp
+
+
+def request(method: str, url: str, scope: str = "", **kwargs) -> requests.Response:
+    """Send a request to OSCAR over the pooled session for `scope`.
+
+    GETs are coalesced: concurrent identical reads (same URL, params and scope) share one
+    in-flight request. Successful GETs of REFERENCE_ENDPOINTS are then served from
+    reference_cache until their TTL expires.
+    """
+    kwargs.setdefault("verify", False)
+    if method.upper() != "GET":
+        return _send(method, url, scope, **kwargs)
+
+    params = _freeze(kwargs.get("params"))
+    reference = REFERENCE_ENDPOINTS.get(endpoint_of(url))
+    if reference:
+        ttl, shared = reference
+        cache_key = (url, params, "" if shared else scope)
+        resp = reference_cache.get(cache_key)
+        if resp is not None:
+            return resp
+
+    resp = inflight.do((url, params, scope), lambda: _fetch_shared(method, url, scope, **kwargs))
+    if reference and resp.ok:
+        reference_cache.set(cache_key, resp, ttl)
+    return resp
+
+
+def invalidate_reference(endpoint: str | None = None):
+    """Drop cached reference data for one endpoint (e.g. "/ws/services/schedule/types"), or all of it"""
+    if endpoint is None:
+        reference_cache.clear()
+    else:
+        reference_cache.invalidate_where(lambda key: endpoint_of(key[0]) == endpoint)
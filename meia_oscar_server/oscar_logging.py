@@ -0,0 +1,137 @@
+"""Structured, bounded logging for OSCAR traffic
+
+Every record is one JSON line on stderr. Records are handed to a background
+QueueListener so request threads never block on stderr writes. Response
+bodies are optional, truncated, sampled and PHI-redacted:
+
+    OSCAR_LOG_LEVEL        DEBUG / INFO (default) / WARNING ...
+    OSCAR_LOG_BODY_CHARS   body bytes to include, 0 for metadata-only (default 200)
+    OSCAR_LOG_SAMPLE_RATE  fraction of successful responses logged (default 1.0); errors are always logged
+    OSCAR_LOG_REDACT       redact patient identifiers from logged bodies (default 1)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+
+LOG_LEVEL = os.getenv("OSCAR_LOG_LEVEL", "INFO").upper()
+BODY_CHARS = int(os.getenv("OSCAR_LOG_BODY_CHARS", "200"))
+SAMPLE_RATE = float(os.getenv("OSCAR_LOG_SAMPLE_RATE", "1.0"))
+REDACT = os.getenv("OSCAR_LOG_REDACT", "1") != "0"
+
+PHI_KEYS = {
+    "firstname", "lastname", "name", "demographicname", "dob", "dateofbirth", "dobyear", "dobmonth", "dobday",
+    "hin", "phone", "phone2", "cellphone", "alternativephone", "email", "address", "city", "postal", "chartno",
+    "patientname", "note", "message", "reason", "notes", "description", "comments", "datafield", "query",
+}
+# The closing quote is optional: a value cut off by body truncation is redacted too
+_PHI_JSON_FIELD = re.compile(r'("(?:%s)"\s*:\s*)("(?:[^"\\]|\\.)*"?|-?\d+)' % "|".join(PHI_KEYS), re.IGNORECASE)
+_LONG_DIGITS = re.compile(r"\d[\d\- ]{6,}\d")
+REDACTED = "[REDACTED]"
+
+log = logging.getLogger("oscar")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {"ts": round(record.created, 3), "level": record.levelname, "event": record.getMessage()}
+        data.update(getattr(record, "fields", {}))
+        return json.dumps(data, default=str)
+
+
+def _configure():
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    records = queue.SimpleQueue()
+    log.addHandler(logging.handlers.QueueHandler(records))
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+_configure()
+
+
+def redact(value):
+    """Replace patient identifiers in a parsed JSON value"""
+    if isinstance(value, dict):
+        return {k: REDACTED if k.lower() in PHI_KEYS else redact(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        return _LONG_DIGITS.sub(REDACTED, value)
+    return value
+
+
+def redact_text(text: str) -> str:
+    """Replace patient identifiers in raw (possibly truncated) JSON text"""
+    return _LONG_DIGITS.sub(REDACTED, _PHI_JSON_FIELD.sub(lambda m: f'{m.group(1)}"{REDACTED}"', text))
+
+
+def _body(content: bytes) -> str | None:
+    if BODY_CHARS <= 0 or not content:
+        return None
+    snippet = content[:BODY_CHARS].decode("utf-8", "replace") + ("..." if len(content) > BODY_CHARS else "")
+    return redact_text(snippet) if REDACT else snippet
+
+
+def _preview(value, items: int = 3):
+    """Trim lists so a body preview never serializes a whole history"""
+    if isinstance(value, dict):
+        return {k: _preview(v, items) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_preview(v, items) for v in value[:items]] + (["..."] if len(value) > items else [])
+    return value
+
+
+def _sampled(ok: bool) -> bool:
+    return not ok or SAMPLE_RATE >= 1 or random.random() < SAMPLE_RATE
+
+
+def event(name: str, level: int = logging.INFO, **fields):
+    """Log a structured event; PHI-named fields and long digit runs are redacted"""
+    if not log.isEnabledFor(level):
+        return
+    if REDACT:
+        fields = {k: REDACTED if k.lower() in PHI_KEYS else redact(v) for k, v in fields.items()}
+    log.log(level, name, extra={"fields": fields})
+
+
+def log_response(name: str, resp, method: str = "", endpoint: str = "", started: float | None = None):
+    """Log one OSCAR HTTP response: status, size and timing, plus an optional body snippet"""
+    level = logging.INFO if resp.ok else logging.WARNING
+    if not log.isEnabledFor(level) or not _sampled(resp.ok):
+        return
+    content = resp.content or b""
+    fields = {"method": method, "endpoint": endpoint, "status": resp.status_code, "bytes": len(content)}
+    if started is not None:
+        fields["ms"] = round((time.monotonic() - started) * 1000)
+    body = _body(content)
+    if body:
+        fields["body"] = body
+    log.log(level, name, extra={"fields": fields})
+
+
+def log_result(name: str, result):
+    """Log a tool result: its shape always, a bounded redacted rendering when bodies are enabled"""
+    ok = not (isinstance(result, dict) and "error" in result)
+    level = logging.INFO if ok else logging.WARNING
+    if not log.isEnabledFor(level) or not _sampled(ok):
+        return
+    fields = {"type": type(result).__name__}
+    if isinstance(result, (list, dict)):
+        fields["items"] = len(result)
+    if BODY_CHARS > 0:
+        preview = _preview(result)
+        text = json.dumps(redact(preview) if REDACT else preview, default=str)
+        fields["body"] = text[:BODY_CHARS] + ("..." if len(text) > BODY_CHARS else "")
+    log.log(level, name, extra={"fields": fields})
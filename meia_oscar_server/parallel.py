@@ -0,0 +1,37 @@
+"""Bounded-concurrency fan-out for blocking OSCAR calls"""
+
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+import admission
+
+MAX_WORKERS = int(os.getenv("OSCAR_FANOUT_WORKERS", "6"))
+
+
+def gather(calls: dict[str, Callable[[], Any]], max_workers: int = MAX_WORKERS) -> dict[str, Any]:
+    """Run zero-argument callables concurrently and return {key: result}.
+
+    A call that raises yields {"error": "<message>"} for its key instead of failing the whole batch.
+    Calls run in a copy of the caller's context, so the admission priority carries over.
+    """
+    if not calls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+        futures = {key: executor.submit(contextvars.copy_context().run, fn) for key, fn in calls.items()}
+    results = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            results[key] = {"error": str(e)}
+    return results
+
+
+def map_keyed(fn: Callable[[Any], Any], keys, max_workers: int = MAX_WORKERS) -> dict[str, Any]:
+    """Call fn(key) concurrently for each distinct key and return {str(key): result}.
+
+    Batch work runs at BACKGROUND admission priority so it yields to chat and phone lookups.
+    """
+    with admission.priority(admission.BACKGROUND):
+        return gather({str(k): (lambda k=k: fn(k)) for k in dict.fromkeys(keys)}, max_workers)
@@ -0,0 +1,264 @@
+"""Local patient name index for phone-call identity verification
+
+Callers spell their names over a noisy line, and quickSearch only matches
+exact prefixes, so verification used to try several spellings one OSCAR round
+trip at a time. This keeps every demographic's normalized name, phonetic
+(Soundex) keys, name trigrams, date of birth and phone digits in memory, so a
+spoken name is matched fuzzily in one lookup; the caller is then confirmed
+with a single demographic fetch. by_phone() finds the patients behind a
+caller ID so their charts can be prefetched when a call starts.
+
+The index is filled from /ws/services/demographics page by page with the
+phone-system service tokens. Each refresh continues from the last offset, so
+only newly registered patients are fetched; a full rebuild picks up edits to
+existing charts. Until the first refresh finishes (or when a name is not
+found) verification falls back to quickSearch.
+
+    PATIENT_INDEX_REFRESH       seconds between incremental refreshes, 0 to disable (default 300)
+    PATIENT_INDEX_FULL_REFRESH  seconds between full rebuilds (default 86400)
+    PATIENT_INDEX_MIN_SCORE     trigram similarity a name needs to match (default 0.45)
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+import admission
+import availability
+import metrics
+import oscar_client
+import oscar_logging
+
+REFRESH_INTERVAL = float(os.getenv("PATIENT_INDEX_REFRESH", "300"))
+FULL_REFRESH_INTERVAL = float(os.getenv("PATIENT_INDEX_FULL_REFRESH", "86400"))
+MIN_SCORE = float(os.getenv("PATIENT_INDEX_MIN_SCORE", "0.45"))
+PAGE = 500
+MAX_RESULTS = 20
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(("aehiouwy", "bfpv", "cgjkqsxz", "dt", "l", "mn", "r")) for c in letters}
+
+
+def normalize(name: str) -> list[str]:
+    """Lowercase ASCII name tokens: "José O'Neil-Smith" -> ["jose", "oneil", "smith"]"""
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    ascii_name = re.sub(r"['’.]", "", ascii_name)
+    return re.findall(r"[a-z]+", ascii_name)
+
+
+def soundex(token: str) -> str:
+    """American Soundex code ("robert" -> "r163"); "" for an empty token"""
+    if not token:
+        return ""
+    code, last = token[0], _SOUNDEX_CODES.get(token[0], "")
+    for c in token[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit not in ("0", last) and digit:
+            code += digit
+        if c not in "hw":
+            last = digit
+        if len(code) == 4:
+            break
+    return code.ljust(4, "0")
+
+
+def trigrams(tokens: list[str]) -> set[str]:
+    """Padded character trigrams of each token (as pg_trgm does)"""
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def dob_of(record: dict) -> str | None:
+    """YYYY-MM-DD from a demographic's dob/dateOfBirth (epoch millis or string) or dobYear/Month/Day"""
+    value = record.get("dob") or record.get("dateOfBirth")
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=availability.TZ).date().isoformat()
+    if value:
+        return str(value)[:10]
+    if record.get("dobYear") and record.get("dobMonth") and record.get("dobDay"):
+        return f"{int(record['dobYear']):04d}-{int(record['dobMonth']):02d}-{int(record['dobDay']):02d}"
+    return None
+
+
+def phone_digits(value) -> str:
+    return re.sub(r"\D", "", str(value or ""))[-10:]
+
+
+def _score(query_grams: set[str], query_keys: list[str], grams: set[str], keys: set[str]) -> tuple[bool, float]:
+    """(every query token sounds like one of the name's, trigram similarity)"""
+    return all(key in keys for key in query_keys), len(query_grams & grams) / len(query_grams | grams)
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """At most one inserted, deleted or changed letter ("jon" ~ "john", "smyth" ~ "smith")"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def _token_matches(spoken: str, field: str | None) -> bool:
+    """A spoken token against one chart name field: close spelling, or one slip in a same-sounding name"""
+    spoken_grams = trigrams([spoken])
+    for token in normalize(field):
+        grams = trigrams([token])
+        similarity = len(spoken_grams & grams) / len(spoken_grams | grams)
+        if similarity >= MIN_SCORE or (soundex(spoken) == soundex(token) and _within_one_edit(spoken, token)):
+            return True
+    return False
+
+
+def name_matches(name: str, first_name: str | None, last_name: str | None) -> bool:
+    """Whether a spoken "First Last" names this chart, for confirming an identity.
+
+    Stricter than search(): a first and a last name are both required and each must match its own
+    field, so "Jane Smith" does not confirm John Smith even though Jane and John share a Soundex code.
+    """
+    tokens = normalize(name)
+    if len(tokens) < 2:
+        return False
+    return _token_matches(tokens[0], first_name) and _token_matches(tokens[-1], last_name)
+
+
+class PatientIndex:
+    def __init__(self):
+        self._patients: dict[int, dict] = {}
+        self._by_trigram: dict[str, set[int]] = {}
+        self._by_soundex: dict[str, set[int]] = {}
+        self._by_phone: dict[str, set[int]] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.offset = 0
+        self.ready = False
+        self.refreshed_at: float | None = None
+
+    # ---- building ----
+
+    def _remove(self, demographic_no: int):
+        old = self._patients.pop(demographic_no, None)
+        if not old:
+            return
+        for gram in old["trigrams"]:
+            self._by_trigram.get(gram, set()).discard(demographic_no)
+        for key in old["soundex"]:
+            self._by_soundex.get(key, set()).discard(demographic_no)
+        if old["phone"]:
+            self._by_phone.get(old["phone"], set()).discard(demographic_no)
+
+    def upsert(self, record: dict):
+        """Add or replace one demographic (as returned by OSCAR)"""
+        if record.get("demographicNo") is None:
+            return
+        demographic_no = int(record["demographicNo"])
+        tokens = normalize(f"{record.get('firstName', '')} {record.get('lastName', '')}")
+        entry = {
+            "demographicNo": demographic_no, "firstName": record.get("firstName"), "lastName": record.get("lastName"),
+            "dob": dob_of(record), "phone": phone_digits(record.get("phone")),
+            "trigrams": trigrams(tokens), "soundex": {soundex(t) for t in tokens},
+        }
+        with self._lock:
+            self._remove(demographic_no)
+            self._patients[demographic_no] = entry
+            for gram in entry["trigrams"]:
+                self._by_trigram.setdefault(gram, set()).add(demographic_no)
+            for key in entry["soundex"]:
+                self._by_soundex.setdefault(key, set()).add(demographic_no)
+            if entry["phone"]:
+                self._by_phone.setdefault(entry["phone"], set()).add(demographic_no)
+
+    def refresh(self, full: bool = False) -> int | None:
+        """Fetch demographics from OSCAR from the last offset (or from 0 when `full`).
+        Returns how many records were read; None if OSCAR could not be read."""
+        with self._refresh_lock, admission.priority(admission.BACKGROUND), admission.owner("patient-index"):
+            offset, seen = (0, set()) if full else (self.offset, None)
+            while True:
+                data = oscar_client.list_demographics(offset, PAGE)
+                if data is None:
+                    metrics.incr("patient_index.refresh_failed")
+                    return None
+                page = data.get("content", [])
+                for record in page:
+                    self.upsert(record)
+                    if seen is not None and record.get("demographicNo") is not None:
+                        seen.add(int(record["demographicNo"]))
+                offset += len(page)
+                if len(page) < PAGE or offset >= data.get("total", float("inf")):
+                    break
+            with self._lock:
+                if seen is not None:
+                    for demographic_no in set(self._patients) - seen:
+                        self._remove(demographic_no)  # merged or deleted since the last rebuild
+                read = offset - (0 if full else self.offset)
+                self.offset, self.ready, self.refreshed_at = offset, True, time.time()
+        metrics.incr("patient_index.refreshes")
+        return read
+
+    # ---- lookup ----
+
+    def search(self, name: str, limit: int = MAX_RESULTS) -> list[dict]:
+        """Patients whose name sounds or is spelled like `name`, best match first"""
+        tokens = normalize(name)
+        if not tokens:
+            return []
+        query_grams, query_keys = trigrams(tokens), [soundex(t) for t in tokens]
+        with self._lock:
+            candidates = set()
+            for gram in query_grams:
+                candidates |= self._by_trigram.get(gram, set())
+            for key in query_keys:
+                candidates |= self._by_soundex.get(key, set())
+            scored = []
+            for demographic_no in candidates:
+                entry = self._patients[demographic_no]
+                sounds_alike, similarity = _score(query_grams, query_keys, entry["trigrams"], entry["soundex"])
+                if similarity >= MIN_SCORE or sounds_alike:
+                    scored.append((sounds_alike, similarity, demographic_no))
+            scored.sort(reverse=True)
+            return [self._public(self._patients[n]) for _, _, n in scored[:limit]]
+
+    def by_phone(self, phone: str) -> list[dict]:
+        """Patients whose phone number matches `phone` (last 10 digits)"""
+        digits = phone_digits(phone)
+        if not digits:
+            return []
+        with self._lock:
+            return [self._public(self._patients[n]) for n in sorted(self._by_phone.get(digits, ()))]
+
+    def get(self, demographic_no: int) -> dict | None:
+        with self._lock:
+            entry = self._patients.get(int(demographic_no))
+            return self._public(entry) if entry else None
+
+    @staticmethod
+    def _public(entry: dict) -> dict:
+        return {k: entry[k] for k in ("demographicNo", "firstName", "lastName", "dob", "phone")}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"patients": len(self._patients), "ready": self.ready, "refreshed_at": self.refreshed_at}
+
+
+index = PatientIndex()
+
+
+async def run(interval: float = REFRESH_INTERVAL, full_interval: float = FULL_REFRESH_INTERVAL):
+    """Build the index, then refresh it every `interval` seconds until cancelled"""
+    last_full = None
+    while True:
+        full = last_full is None or time.monotonic() - last_full >= full_interval
+        try:
+            if await asyncio.to_thread(index.refresh, full) is not None and full:
+                last_full = time.monotonic()
+        except Exception as e:
+            oscar_logging.event("patient_index.error", level=logging.WARNING, error=str(e))
+        await asyncio.sleep(interval)
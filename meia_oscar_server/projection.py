@@ -0,0 +1,90 @@
+"""Compact tool results before they reach the model
+
+Every byte a tool returns becomes model input, so large OSCAR payloads are
+projected down to the fields each tool documents: nulls and empty values are
+dropped, epoch-millisecond dates become clinic-local ISO strings and long arrays are capped
+with a marker telling the model how to ask for the rest.
+"""
+
+import re
+from datetime import datetime
+import availability
+
+# tool name -> {"fields": documented fields kept on each record, "max_items": cap for record lists}
+PROJECTIONS = {
+    "get_patient_details": {
+        "fields": ["demographicNo", "title", "firstName", "lastName", "dateOfBirth", "dobYear", "dobMonth", "dobDay",
+                   "sex", "hin", "hcType", "chartNo", "address", "phone", "alternativePhone", "email", "providerNo",
+                   "patientStatus", "rosterStatus", "officialLanguage", "spokenLanguage", "contacts", "statusLists"],
+    },
+    "get_patient_appointment_history": {
+        "fields": ["id", "appointmentDate", "startTime", "endTime", "duration", "providerNo", "providerName",
+                   "status", "type", "reason", "location"],
+        "max_items": 20,
+    },
+    "get_patient_medications": {
+        "fields": ["drugId", "id", "brandName", "genericName", "dosage", "takeMin", "takeMax", "frequency",
+                   "duration", "durationUnit", "route", "quantity", "repeats", "rxDate", "startDate", "endDate",
+                   "prescribingProvider", "instructions", "longTerm", "archived"],
+        "max_items": 40,
+    },
+    "get_my_inbox": {
+        "fields": ["id", "type", "labType", "demographicNo", "demographicName", "patientName", "description",
+                   "discipline", "dateReceived", "status", "priority"],
+        "max_items": 30,
+    },
+}
+
+_DATE_KEY = re.compile(r"date|dob|time|birth", re.IGNORECASE)
+FULL_DETAIL_HINT = "Call again with full_detail=True for every record and field."
+
+
+def _iso(millis: int) -> str:
+    """Clinic-local: OSCAR stores dates as local midnight, which collapse to a plain date"""
+    dt = datetime.fromtimestamp(millis / 1000, tz=availability.TZ)
+    return dt.date().isoformat() if dt.hour == dt.minute == dt.second == 0 else dt.isoformat(timespec="minutes")
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def compact(value, key: str = ""):
+    """Drop empty values and convert epoch-millis dates, recursively"""
+    if isinstance(value, dict):
+        out = {k: compact(v, k) for k, v in value.items()}
+        return {k: v for k, v in out.items() if not _is_empty(v)}
+    if isinstance(value, list):
+        return [compact(v, key) for v in value if not _is_empty(v)]
+    if isinstance(value, int) and not isinstance(value, bool) and abs(value) >= 10**10 and _DATE_KEY.search(key):
+        return _iso(value)
+    return value
+
+
+def _project_record(record, fields: list[str] | None):
+    if not fields or not isinstance(record, dict):
+        return compact(record)
+    kept = {k: record[k] for k in fields if k in record}
+    # Unknown shape: keep everything rather than returning an empty record
+    return compact(kept if kept else record)
+
+
+def _project_records(records: list, spec: dict) -> list:
+    limit = spec.get("max_items")
+    out = [_project_record(r, spec.get("fields")) for r in (records[:limit] if limit else records)]
+    if limit and len(records) > limit:
+        out.append({"more_available": len(records) - limit, "hint": FULL_DETAIL_HINT})
+    return out
+
+
+def project(name: str, result, full: bool = False):
+    """Apply the projection registered for tool `name`; error results and full=True pass through"""
+    spec = PROJECTIONS.get(name)
+    if full or not spec or (isinstance(result, dict) and "error" in result):
+        return result
+    if isinstance(result, list):
+        return _project_records(result, spec)
+    if isinstance(result, dict) and isinstance(result.get("content"), list):
+        return {**compact({k: v for k, v in result.items() if k != "content"}),
+                "content": _project_records(result["content"], spec)}
+    return _project_record(result, spec.get("fields"))
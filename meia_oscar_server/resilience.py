@@ -0,0 +1,144 @@
+"""Timeouts, retries and circuit breaking for OSCAR calls
+
+    OSCAR_CONNECT_TIMEOUT        seconds to establish a connection (default 3.05)
+    OSCAR_READ_TIMEOUT           seconds to wait for a response (default 15, see ENDPOINT_TIMEOUTS)
+    OSCAR_RETRIES                extra attempts for idempotent GETs (default 2)
+    OSCAR_BREAKER_THRESHOLD      consecutive failures that open the breaker (default 5)
+    OSCAR_BREAKER_RESET          seconds the breaker stays open before a trial request (default 30)
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import requests
+from urllib3.exceptions import NewConnectionError
+import metrics
+import oscar_logging
+
+CONNECT_TIMEOUT = float(os.getenv("OSCAR_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("OSCAR_READ_TIMEOUT", "15"))
+RETRIES = int(os.getenv("OSCAR_RETRIES", "2"))
+BACKOFF_BASE = 0.2
+BREAKER_THRESHOLD = int(os.getenv("OSCAR_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("OSCAR_BREAKER_RESET", "30"))
+
+# Endpoint prefix -> read timeout override; the longest matching prefix wins
+ENDPOINT_TIMEOUTS = {
+    "/ws/services/demographics/quickSearch": 8,
+    "/ws/services/schedule/": 8,
+    "/ws/services/providerService/": 8,
+    "/ws/services/document/saveDocumentToDemographic": 60,
+    "/ws/oauth/": 10,
+}
+# Overrides that only apply to reads: bookings and status changes under these keep READ_TIMEOUT
+GET_ONLY_TIMEOUTS = {"/ws/services/schedule/"}
+RETRY_STATUSES = {502, 503, 504}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def timeout_for(endpoint: str, method: str = "GET") -> tuple[float, float]:
+    """(connect, read) timeout for a request to an endpoint"""
+    matches = [p for p in ENDPOINT_TIMEOUTS
+               if endpoint.startswith(p) and (method.upper() == "GET" or p not in GET_ONLY_TIMEOUTS)]
+    read = ENDPOINT_TIMEOUTS[max(matches, key=len)] if matches else READ_TIMEOUT
+    return (CONNECT_TIMEOUT, read)
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff delay before retry number `attempt` (0-based)"""
+    return random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+
+
+def never_sent(error: Exception) -> bool:
+    """True if the request cannot have reached OSCAR (connect timeout, refused, DNS failure).
+    A read timeout or dropped connection after sending may still have been processed."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    cause = error.args[0] if error.args else None  # usually urllib3's MaxRetryError
+    return isinstance(getattr(cause, "reason", cause), NewConnectionError)
+
+
+def unavailable_response(url: str, reason: str, sent: bool = False) -> requests.Response:
+    """Synthetic 503 so callers handle an unreachable OSCAR like any other failed response.
+    `sent` records whether OSCAR may have received the request, so writes know if resending is safe."""
+    resp = requests.Response()
+    resp.status_code = 503
+    resp.reason = "Service Unavailable"
+    resp.url = url
+    resp.headers["Content-Type"] = "application/json"
+    resp._content = json.dumps({"error": "OSCAR unavailable", "reason": reason, "sent": sent}).encode()
+    return resp
+
+
+def was_sent(result: dict) -> bool:
+    """Whether a failed tool result may have reached OSCAR; only synthetic 503s from an unsent request say no"""
+    if result.get("error") != 503:
+        return True
+    try:
+        body = json.loads(result.get("text") or "")
+    except ValueError:
+        return True
+    return not isinstance(body, dict) or body.get("sent") is not False
+
+
+def response_sent(resp: requests.Response) -> bool:
+    """was_sent() for a failed response: whether the write may have been applied anyway"""
+    return was_sent({"error": resp.status_code, "text": resp.text})
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and fails fast until `reset_timeout`
+    has passed; then lets one trial request through (half-open) to decide whether to close.
+    """
+
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str):
+        old, self.state = self.state, state
+        metrics.incr(f"oscar.breaker.{old}_to_{state}")
+        oscar_logging.event("oscar.breaker", level=logging.WARNING if state == OPEN else logging.INFO,
+                            breaker=self.name, previous=old, state=state, failures=self.failures)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            metrics.incr("oscar.breaker.rejected")
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_abandoned(self):
+        """The allowed request never reached OSCAR; free the half-open trial without judging it"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self._transition(OPEN)
@@ -1,10 +1,13 @@
 """OSCAR Prescription/Rx Tools"""
 
-from typing import Optional
+from typing import List, Optional
 from tools import oscar_request, handle_response
+import parallel
 
+MAX_BATCH = 100
 
-def get_patient_medications(patient_id: int, tool_context, status: str = "current") -> dict:
+
+def get_patient_medications(patient_id: int, tool_context, status: str = "current", full_detail: bool = False) -> dict:
     """Get medications for a patient.
 
     Args:
@@ -14,6 +17,7 @@ def get_patient_medications(patient_id: int, tool_context, status: str = "curren
             "archived" - discontinued/past medications
             "longterm" - long-term/chronic medications
             "all" - all medications regardless of status
+        full_detail: Return every record and field from OSCAR instead of the compact summary (default False)
 
     Returns:
         dict with array of medications, each containing:
@@ -21,7 +25,23 @@ def get_patient_medications(patient_id: int, tool_context, status: str = "curren
         startDate, endDate, prescribingProvider, instructions, archived
     """
     resp = oscar_request("GET", f"/ws/services/rx/drugs/{status}/{patient_id}", tool_context.state.get("session_id"))
-    return handle_response(resp, "get_patient_medications")
+    return handle_response(resp, "get_patient_medications", full=full_detail)
+
+
+def get_patient_medications_batch(patient_ids: List[int], tool_context, status: str = "current") -> dict:
+    """Get medications for many patients in one call.
+
+    Args:
+        patient_ids: List of patient demographic IDs (up to 100)
+        status: Medication filter, same values as get_patient_medications (default "current")
+
+    Returns:
+        dict keyed by patient ID (as a string), each value that patient's compact medication list,
+        or error/text for that patient
+    """
+    if len(patient_ids) > MAX_BATCH:
+        return {"error": f"At most {MAX_BATCH} patients per batch"}
+    return parallel.map_keyed(lambda pid: get_patient_medications(pid, tool_context, status), patient_ids)
 
 
 def get_prescriptions(patient_id: int, tool_context) -> dict:
@@ -55,10 +75,11 @@ def get_drug_history(drug_id: int, patient_id: int, tool_context) -> dict:
     return handle_response(resp, "get_drug_history")
 
 
-RX_TOOLS = [get_patient_medications, get_prescriptions, get_drug_history]
+RX_TOOLS = [get_patient_medications, get_patient_medications_batch, get_prescriptions, get_drug_history]
 
 RX_TOOL_DESCRIPTIONS = {
     "get_patient_medications": "Fetching patient medications...",
+    "get_patient_medications_batch": "Fetching medications for multiple patients...",
     "get_prescriptions": "Fetching prescriptions...",
     "get_drug_history": "Fetching drug history...",
 }
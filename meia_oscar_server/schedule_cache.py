@@ -0,0 +1,130 @@
+"""Write-through cache of day schedules keyed by (provider, date)
+
+Booking conversations re-read the same provider-day within seconds. Reads by
+get_daily_appointments and oscar_client.get_day_appointments fill the cache;
+our own writes (create, status update, delete/cancel) patch the cached days
+in place, keeping their expiry, or drop them, so a reader never sees a
+schedule older than our last change. A write that failed after it may have
+reached OSCAR (e.g. a timeout) drops the days it touches. Changes made elsewhere in OSCAR show up
+after SCHEDULE_CACHE_TTL.
+
+A read that started before a write to the same day is not stored (see version()).
+Status updates and deletes only know the appointment id, so they also advance a
+global generation that voids every read in flight.
+
+    SCHEDULE_CACHE_TTL  seconds a day schedule is served from memory (default 30)
+"""
+
+import os
+import threading
+from cache import TTLCache
+
+TTL = float(os.getenv("SCHEDULE_CACHE_TTL", "30"))
+ALL_PROVIDERS = None  # provider key for the all-provider day listing
+VERSION_TTL = 300  # longer than any read; a forgotten counter only makes put() skip storing
+
+_days = TTLCache(maxsize=512, default_ttl=TTL)
+_versions = TTLCache(maxsize=4096, default_ttl=VERSION_TTL)  # day key -> write counter
+_generation = 0  # bumped by writes that cannot name their day
+_lock = threading.Lock()
+
+
+def _key(provider_no, date: str) -> tuple:
+    return (str(provider_no) if provider_no is not None else ALL_PROVIDERS, date)
+
+
+def _copy(appointments: list) -> list:
+    return [dict(a) if isinstance(a, dict) else a for a in appointments]
+
+
+def _bump(key: tuple):
+    _versions.set(key, _versions.get(key, 0) + 1)
+
+
+def version(provider_no, date: str) -> tuple:
+    """Write counter for a day; pass it to put() so a read that raced a write is not cached"""
+    with _lock:
+        return (_generation, _versions.get(_key(provider_no, date), 0))
+
+
+def get(provider_no, date: str) -> list | None:
+    """Cached appointments for the day, or None on a miss"""
+    with _lock:
+        appointments = _days.get(_key(provider_no, date))
+        return _copy(appointments) if appointments is not None else None
+
+
+def put(provider_no, date: str, appointments: list, read_version: tuple | None = None):
+    key = _key(provider_no, date)
+    with _lock:
+        if read_version is not None and (_generation, _versions.get(key, 0)) != read_version:
+            return
+        _days.set(key, _copy(appointments))
+
+
+def invalidate(provider_no, date: str):
+    with _lock:
+        for key in (_key(provider_no, date), _key(ALL_PROVIDERS, date)):
+            _days.invalidate(key)
+            _bump(key)
+
+
+def add(provider_no, date: str, appointment: dict):
+    """Record an appointment we just created; days we cannot patch exactly are dropped"""
+    if not isinstance(appointment, dict) or appointment.get("id") is None or not appointment.get("startTime"):
+        return invalidate(provider_no, date)
+    with _lock:
+        for key in (_key(provider_no, date), _key(ALL_PROVIDERS, date)):
+            _bump(key)
+            day = _days.get(key)
+            if day is not None:
+                day.append(dict(appointment))
+
+
+def _days_with(appointment_id) -> list[tuple[tuple, list]]:
+    return [(key, day) for key, day in _days.items()
+            if any(str(a.get("id")) == str(appointment_id) for a in day if isinstance(a, dict))]
+
+
+def update(appointment_id, **fields):
+    """Patch a cached appointment in place (e.g. status after updateStatus)"""
+    global _generation
+    with _lock:
+        _generation += 1
+        for key, day in _days_with(appointment_id):
+            _bump(key)
+            for appt in day:
+                if isinstance(appt, dict) and str(appt.get("id")) == str(appointment_id):
+                    appt.update(fields)
+
+
+def remove(appointment_id):
+    """Drop a deleted/cancelled appointment from every cached day that lists it"""
+    global _generation
+    with _lock:
+        _generation += 1
+        for key, day in _days_with(appointment_id):
+            _bump(key)
+            day[:] = [a for a in day if not (isinstance(a, dict) and str(a.get("id")) == str(appointment_id))]
+
+
+def drop(appointment_id):
+    """Forget every cached day that lists the appointment (a write to it may or may not have applied)"""
+    global _generation
+    with _lock:
+        _generation += 1
+        for key, _ in _days_with(appointment_id):
+            _days.invalidate(key)
+            _bump(key)
+
+
+def clear():
+    global _generation
+    with _lock:
+        _days.clear()
+        _versions.clear()
+        _generation += 1
+
+
+def stats() -> dict:
+    return _days.stats()
@@ -12,7 +12,6 @@ from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
 from mcp.client.stdio import StdioServerParameters
 from google.genai import types
 from requests_oauthlib import OAuth1
-import requests
 import uvicorn
 import uuid
 import os
@@ -20,11 +19,21 @@ import json
 import logging
 import asyncio
 from pathlib import Path
+from xml.sax.saxutils import escape
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
 import tools
+import oscar_http
+import signing
+import metrics
+import admission
+import hedging
+import schedule_cache
+import write_queue
+import tickler_reaper
+import patient_index
 from tools import TOOL_DESCRIPTIONS
 from transcribe import EncounterTranscriber
 from call_handler import CallSession
@@ -121,14 +130,14 @@ async def auth_login():
     log.info("[/auth/login] Request received")
     session_id = str(uuid.uuid4())
     # First make a request to get JSESSIONID cookie
-    init_resp = requests.get(f"{OSCAR_URL}/ws/services/providerService/providers", verify=False)
+    init_resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/providerService/providers", session_id)
     jsessionid = init_resp.cookies.get("JSESSIONID")
     print(f"[init] Got JSESSIONID: {jsessionid}", flush=True)
     
     # Request scopes for read/write access
     params = {"scope": "read write"}
     cookies = {"JSESSIONID": jsessionid} if jsessionid else {}
-    response = requests.post(f"{OSCAR_URL}/ws/oauth/initiate", auth=oauth1(callback=f"{BACKEND_URL}/auth/callback"), params=params, cookies=cookies, verify=False)
+    response = oscar_http.request("POST", f"{OSCAR_URL}/ws/oauth/initiate", session_id, auth=oauth1(callback=f"{BACKEND_URL}/auth/callback"), params=params, cookies=cookies)
     print(f"[oauth/initiate] {response.status_code} {response.text}", flush=True)
     response.raise_for_status()
     creds = dict(x.split('=') for x in response.text.split('&'))
@@ -144,14 +153,14 @@ async def auth_callback(oauth_token: str, oauth_verifier: str):
     if not p:
         return HTMLResponse("<h1>Invalid token</h1>", status_code=400)
     cookies = {"JSESSIONID": p.get("jsessionid")} if p.get("jsessionid") else {}
-    response = requests.post(f"{OSCAR_URL}/ws/oauth/token", auth=oauth1(oauth_token, p["secret"], verifier=oauth_verifier), cookies=cookies, verify=False)
+    response = oscar_http.request("POST", f"{OSCAR_URL}/ws/oauth/token", p["session_id"], auth=oauth1(oauth_token, p["secret"], verifier=oauth_verifier), cookies=cookies)
     response.raise_for_status()
     creds = dict(x.split('=') for x in response.text.split('&'))
     sessions[p["session_id"]] = {"access_token": creds['oauth_token'], "access_token_secret": creds['oauth_token_secret'], "jsessionid": p.get("jsessionid")}
     
-    # Fetch provider ID
-    auth = oauth1(creds['oauth_token'], creds['oauth_token_secret'])
-    provider_resp = requests.get(f"{OSCAR_URL}/ws/services/providerService/provider/me", auth=auth, cookies=cookies, verify=False)
+    # Fetch provider ID; the session's signer is built here and reused by every tool call
+    auth = signing.signers.get(p["session_id"], CONSUMER_KEY, CONSUMER_SECRET, creds['oauth_token'], creds['oauth_token_secret'])
+    provider_resp = oscar_http.request("GET", f"{OSCAR_URL}/ws/services/providerService/provider/me", p["session_id"], auth=auth, cookies=cookies)
     if provider_resp.ok:
         provider_data = provider_resp.json()
         sessions[p["session_id"]]["provider_id"] = provider_data.get("providerNo")
@@ -375,6 +384,7 @@ async def enroll_contact_hub(request: Request):
     
     if session_id not in sessions:
         return JSONResponse({"error": "Not authenticated"}, status_code=401)
+    store.invalidate_clinic_config()  # Admin changes start from the stored config, not a cached copy
     
     clinic_config = store.get_clinic_config()
     if clinic_config.get("phone_number"):
@@ -416,6 +426,7 @@ async def update_contact_hub_instructions(request: Request):
     session_id = data.get("session_id")
     if session_id not in sessions:
         return JSONResponse({"error": "Not authenticated"}, status_code=401)
+    store.invalidate_clinic_config()
     
     clinic_config = store.get_clinic_config()
     clinic_config["instructions"] = data.get("instructions", "")
@@ -430,6 +441,7 @@ async def delete_phone(request: Request):
     phone_number = data.get("phone_number")
     if session_id not in sessions:
         return JSONResponse({"error": "Not authenticated"}, status_code=401)
+    store.invalidate_clinic_config()
     
     try:
         from twilio.rest import Client as TwilioClient
@@ -458,8 +470,10 @@ async def delete_phone(request: Request):
 async def call_incoming(request: Request):
     """Twilio webhook - returns TwiML to connect media stream"""
     host = request.headers.get("host", request.url.hostname)
+    form = await request.form()
+    caller = escape(form.get("From", ""), {'"': "&quot;"})
     twiml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<Response><Connect><Stream url="wss://{host}/call/" /></Connect></Response>"""
+<Response><Connect><Stream url="wss://{host}/call/"><Parameter name="from" value="{caller}" /></Stream></Connect></Response>"""
     return Response(content=twiml, media_type="application/xml")
 
 
@@ -478,6 +492,7 @@ async def call_websocket(websocket: WebSocket):
             if event == "start":
                 stream_sid = data["start"]["streamSid"]
                 call_sid = data["start"]["callSid"]
+                caller = data["start"].get("customParameters", {}).get("from") or None
                 async def send_audio(payload: str):
                     await websocket.send_json({
                         "event": "media",
@@ -486,7 +501,7 @@ async def call_websocket(websocket: WebSocket):
                     })
                 async def clear_audio():
                     await websocket.send_json({"event": "clear", "streamSid": stream_sid})
-                session = CallSession(stream_sid, call_sid, send_audio, clear_audio)
+                session = CallSession(stream_sid, call_sid, send_audio, clear_audio, caller)
                 active_calls[stream_sid] = session
                 await session.start()
                 log.info(f"[WS /call/] Started: {stream_sid}")
@@ -508,9 +523,50 @@ async def call_websocket(websocket: WebSocket):
         log.info("[WS /call/] Disconnected")
 
 
+# ============ Metrics ============
+
+@app.get("/metrics")
+async def get_metrics():
+    return JSONResponse({
+        "counters": metrics.snapshot(),
+        "breakers": {host: b.state for host, b in oscar_http.breakers.items()},
+        "reference_cache": oscar_http.reference_cache.stats(),
+        "inflight": oscar_http.inflight.stats(),
+        "admission": admission.controller.stats(),
+        "hedging": hedging.hedger.stats(),
+        "signers": signing.signers.stats(),
+        "schedule_cache": schedule_cache.stats(),
+        "patient_index": patient_index.index.stats(),
+    })
+
+
+@app.get("/write-queue")
+async def get_write_queue(session_id: str):
+    if session_id not in sessions:
+        return JSONResponse({"error": "Not authenticated"}, status_code=401)
+    return JSONResponse(write_queue.queue.status(session_id))
+
+
+background_tasks = []
+
+
+@app.on_event("startup")
+async def startup_event():
+    if write_queue.ENABLED:
+        write_queue.queue.start()
+    if tickler_reaper.INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(tickler_reaper.run()))
+    if patient_index.REFRESH_INTERVAL > 0:
+        background_tasks.append(asyncio.create_task(patient_index.run()))
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
     await medical_mcp_toolset.close()
+    write_queue.queue.stop()
+    oscar_http.pool.close()
 
 
 if __name__ == "__main__":
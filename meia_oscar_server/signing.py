@@ -0,0 +1,41 @@
+"""Per-scope OAuth1 signers
+
+Building an OAuth1 auth object sets up an oauthlib Client (key material,
+signature method, header assembly). Signers are built once per scope (a chat
+session id, or oscar_client.SCOPE for the phone system) when its tokens are
+issued or loaded, and reused; each request then only needs a fresh nonce,
+timestamp and HMAC. A signer is rebuilt if the scope's credentials change.
+"""
+
+import threading
+from requests_oauthlib import OAuth1
+
+
+class SignerCache:
+    def __init__(self):
+        self._signers: dict[str, tuple[tuple, OAuth1]] = {}
+        self._lock = threading.Lock()
+        self.built = 0
+
+    def get(self, scope: str, consumer_key: str, consumer_secret: str, token: str, token_secret: str) -> OAuth1:
+        """Signer for `scope`, built on first use or when its credentials changed"""
+        creds = (consumer_key, consumer_secret, token, token_secret)
+        with self._lock:
+            entry = self._signers.get(scope)
+            if entry and entry[0] == creds:
+                return entry[1]
+            signer = OAuth1(*creds, signature_method="HMAC-SHA1", signature_type="AUTH_HEADER")
+            self._signers[scope] = (creds, signer)
+            self.built += 1
+            return signer
+
+    def drop(self, scope: str):
+        with self._lock:
+            self._signers.pop(scope, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"signers": len(self._signers), "built": self.built}
+
+
+signers = SignerCache()
@@ -3,11 +3,14 @@
 import boto3
 import os
 import json
+import threading
+import time
 
 TABLE_NAME = os.getenv("DYNAMODB_TABLE", "meia_providers")
 CLINIC_ID = os.getenv("CLINIC_ID", "default")
 S3_BUCKET = os.getenv("S3_BUCKET", f"meia-chat-{CLINIC_ID}")
 REGION = os.getenv("AWS_REGION", "ca-central-1")
+CLINIC_CONFIG_TTL = float(os.getenv("CLINIC_CONFIG_TTL", "300"))
 dynamodb = boto3.resource("dynamodb", region_name=REGION)
 s3 = boto3.client("s3", region_name=REGION)
 table = None
@@ -158,8 +161,31 @@ The clinic's hours are 9 AM to 5 PM, Monday through Friday.
 '''
 
 
+_clinic_config: tuple[float, dict] | None = None  # (expires_at, config)
+_clinic_config_lock = threading.Lock()
+
+
+def _cache_clinic_config(config: dict):
+    global _clinic_config
+    with _clinic_config_lock:
+        _clinic_config = (time.monotonic() + CLINIC_CONFIG_TTL, dict(config))
+
+
+def invalidate_clinic_config():
+    """Drop the cached clinic config so the next read goes to DynamoDB"""
+    global _clinic_config
+    with _clinic_config_lock:
+        _clinic_config = None
+
+
 def get_clinic_config() -> dict:
-    """Get clinic config (phone, fax, instructions). Initializes default if not exists."""
+    """Get clinic config (phone, fax, instructions). Initializes default if not exists.
+
+    Cached in-process for CLINIC_CONFIG_TTL seconds; the phone system reads it before every OSCAR call.
+    """
+    with _clinic_config_lock:
+        if _clinic_config and _clinic_config[0] > time.monotonic():
+            return dict(_clinic_config[1])
     _ensure_resources()
     try:
         resp = table.get_item(Key={"provider_no": "_clinic_config"})
@@ -169,16 +195,19 @@ def get_clinic_config() -> dict:
             config["instructions"] = DEFAULT_INSTRUCTIONS
             save_clinic_config(config)
             return config
+        _cache_clinic_config(item["config"])
         return item["config"]
     except Exception:
         return {"instructions": DEFAULT_INSTRUCTIONS}
 
 
 def save_clinic_config(config: dict):
-    """Save clinic config"""
+    """Save clinic config and refresh the cached copy"""
     _ensure_resources()
+    invalidate_clinic_config()
     table.update_item(
         Key={"provider_no": "_clinic_config"},
         UpdateExpression="SET config = :c",
         ExpressionAttributeValues={":c": config}
     )
+    _cache_clinic_config(config)
@@ -1,9 +1,13 @@
 """Unit tests for call_handler.py"""
 
 import pytest
+from datetime import datetime
 from unittest.mock import patch, MagicMock, AsyncMock
+import availability
 from call_handler import CallSession
 
+LOCAL_DOB_MILLIS = int(datetime(1990, 1, 15, tzinfo=availability.TZ).timestamp() * 1000)  # as OSCAR sends a dob
+
 
 @pytest.fixture
 def session():
@@ -58,6 +62,111 @@ class TestVerifyPatient:
         assert result["success"] is True
         assert session.verified_demographic_no == 2
 
+    @patch("call_handler.oscar_client.search_patients")
+    @patch("call_handler.oscar_client.get_patient_details")
+    def test_index_match_confirmed_with_one_fetch(self, mock_details, mock_search, session):
+        from patient_index import PatientIndex
+        index = PatientIndex()
+        index.upsert({"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": LOCAL_DOB_MILLIS})
+        index.ready = True
+        mock_details.return_value = {"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": LOCAL_DOB_MILLIS}
+        with patch("call_handler.patient_index.index", index):
+            result = session._verify_patient("Jon Smyth", "1990-01-15", None)
+        assert result["success"] is True
+        assert session.verified_demographic_no == 7
+        mock_details.assert_called_once_with(7)
+        mock_search.assert_not_called()
+
+    @patch("call_handler.oscar_client.search_patients")
+    @patch("call_handler.oscar_client.get_patient_details")
+    def test_stale_index_falls_back_to_search(self, mock_details, mock_search, session):
+        from patient_index import PatientIndex
+        index = PatientIndex()
+        index.upsert({"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": LOCAL_DOB_MILLIS})
+        index.ready = True
+        mock_details.return_value = {"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": "1991-01-15"}
+        mock_search.return_value = []
+        with patch("call_handler.patient_index.index", index):
+            result = session._verify_patient("John Smith", "1990-01-15", None)
+        assert "No patient found" in result["error"]
+        assert index.get(7)["dob"] == "1991-01-15"
+
+    @patch("call_handler.oscar_client.search_patients", return_value=[])
+    @patch("call_handler.oscar_client.get_patient_details")
+    def test_family_member_with_same_dob_not_verified(self, mock_details, mock_search, session):
+        from patient_index import PatientIndex
+        index = PatientIndex()
+        record = {"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": LOCAL_DOB_MILLIS}
+        index.upsert(record)
+        index.ready = True
+        mock_details.return_value = record
+        with patch("call_handler.patient_index.index", index):
+            assert "error" in session._verify_patient("Jane Smith", "1990-01-15", None)
+            session._verify_patient("John", "1990-01-15", None)
+        assert session.verified_demographic_no is None
+        mock_search.assert_called()
+
+    @patch("call_handler.oscar_client.search_patients", return_value=[])
+    @patch("call_handler.oscar_client.get_patient_details")
+    def test_renamed_chart_falls_back_to_search(self, mock_details, mock_search, session):
+        from patient_index import PatientIndex
+        index = PatientIndex()
+        index.upsert({"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": LOCAL_DOB_MILLIS})
+        index.ready = True
+        mock_details.return_value = {"demographicNo": 7, "firstName": "Maria", "lastName": "Garcia", "dob": LOCAL_DOB_MILLIS}
+        with patch("call_handler.patient_index.index", index):
+            result = session._verify_patient("John Smith", "1990-01-15", None)
+        assert "No patient found" in result["error"]
+        assert session.verified_demographic_no is None
+        assert index.get(7)["lastName"] == "Garcia"
+
+
+class TestCallerPrefetch:
+    @patch("call_handler.oscar_client.get_upcoming_appointments")
+    @patch("call_handler.oscar_client.get_patient_details")
+    def test_prefetch_serves_verification_and_appointments(self, mock_details, mock_upcoming):
+        from patient_index import PatientIndex
+        index = PatientIndex()
+        record = {"demographicNo": 7, "firstName": "John", "lastName": "Smith", "dob": LOCAL_DOB_MILLIS, "phone": "604-555-1234"}
+        index.upsert(record)
+        index.ready = True
+        mock_details.return_value = record
+        mock_upcoming.return_value = [{"id": 1}]
+        session = CallSession("stream123", "call123", AsyncMock(), AsyncMock(), "+16045551234")
+        with patch("call_handler.patient_index.index", index):
+            session._prefetch_caller()
+            assert session._verify_patient("John Smith", "1990-01-15", None)["success"] is True
+        assert session._execute_tool("get_my_appointments", {}) == {"appointments": [{"id": 1}]}
+        assert mock_details.call_count == 1 and mock_upcoming.call_count == 1
+
+    @patch("call_handler.oscar_client.get_upcoming_appointments")
+    @patch("call_handler.oscar_client.get_patient_details", return_value=None)
+    def test_prefetch_does_not_restore_appointments_changed_meanwhile(self, mock_details, mock_upcoming):
+        session = CallSession("stream123", "call123", AsyncMock(), AsyncMock(), "+16045551234")
+
+        def stale_history(no):
+            session._forget_upcoming(no)  # a cancellation lands while the prefetch is reading
+            return [{"id": 1}]
+        mock_upcoming.side_effect = stale_history
+        session._prefetch_candidates([{"demographicNo": 7}])
+        assert 7 not in session.upcoming_cache
+
+    @patch("call_handler.oscar_client.get_upcoming_appointments", return_value=None)
+    @patch("call_handler.oscar_client.get_patient_details", return_value=None)
+    def test_prefetch_failure_not_cached(self, mock_details, mock_upcoming):
+        session = CallSession("stream123", "call123", AsyncMock(), AsyncMock(), "+16045551234")
+        with patch("call_handler.oscar_logging.event") as event:
+            session._prefetch_candidates([{"demographicNo": 7}])
+        assert session.upcoming_cache == {}
+        event.assert_called_once_with("call.prefetched", patients=0, candidates=1)
+
+    @patch("call_handler.oscar_client.get_patient_details")
+    def test_unknown_caller_fetches_nothing(self, mock_details):
+        session = CallSession("stream123", "call123", AsyncMock(), AsyncMock(), "+16045550000")
+        session._prefetch_caller()
+        mock_details.assert_not_called()
+        assert session.patient_cache == {}
+
 
 class TestExecuteTool:
     def test_unverified_blocks_protected_tools(self, session):
@@ -78,7 +187,56 @@ class TestExecuteTool:
         assert result["booked_appointments"] == [{"startTime": "10:00 AM"}]
         assert "9am-5pm" in result["note"]
 
-    @patch("call_handler.oscar_client.get_patient_appointments")
+    @patch("call_handler.oscar_client.get_day_appointments")
+    def test_get_available_slots(self, mock_get, session):
+        mock_get.return_value = [{"startTime": "9:00 AM", "duration": 15}]
+        result = session._execute_tool("get_available_slots", {"provider_no": "123", "date": "2025-01-01"})
+        assert result["available_slots"][0] == "09:15"
+
+    @patch("call_handler.oscar_client.get_day_appointments")
+    def test_get_available_slots_unavailable(self, mock_get, session):
+        for unreadable in (None, {"content": [{"startTime": "9:00 AM"}]}):
+            mock_get.return_value = unreadable
+            result = session._execute_tool("get_available_slots", {"provider_no": "123", "date": "2025-01-01"})
+            assert "error" in result
+
+    def test_day_appointments_unwraps_content(self):
+        import oscar_client
+        import schedule_cache
+        schedule_cache.clear()
+        resp = MagicMock(ok=True)
+        resp.json.return_value = {"content": [{"startTime": "9:00 AM"}]}
+        with patch("oscar_client._get_auth", return_value=object()), \
+             patch("oscar_client.oscar_http.request", return_value=resp), \
+             patch("oscar_client.oscar_logging.log_response"):
+            assert oscar_client.get_day_appointments("123", "2099-01-05") == [{"startTime": "9:00 AM"}]
+            resp.json.return_value = {"error": "boom"}
+            assert oscar_client.get_day_appointments("123", "2099-01-06") is None
+        schedule_cache.clear()
+
+    @patch("call_handler.oscar_client.get_day_appointments")
+    @patch("call_handler.oscar_client.get_providers")
+    def test_find_available_slots(self, mock_providers, mock_day, session):
+        import schedule_cache
+        schedule_cache.clear()
+        mock_providers.return_value = [{"providerNo": "123", "firstName": "Jane", "lastName": "Smith"}]
+        mock_day.return_value = []
+        result = session._execute_tool("find_available_slots", {"start_date": "2099-01-05", "end_date": "2099-01-05", "limit": 1})
+        assert result["slots"] == [{"date": "2099-01-05", "time": "09:00", "provider_no": "123", "provider_name": "Jane Smith"}]
+
+    @patch("call_handler.oscar_client.get_providers", return_value=[])
+    def test_find_available_slots_without_providers(self, mock_providers, session):
+        result = session._execute_tool("find_available_slots", {"start_date": "2099-01-05", "end_date": "2099-01-05"})
+        assert "providers" in result["error"]
+
+    @patch("call_handler.oscar_client.get_providers")
+    def test_find_available_slots_bad_date(self, mock_providers, session):
+        mock_providers.return_value = [{"providerNo": "123"}]
+        result = session._execute_tool("find_available_slots", {"start_date": "next Monday", "end_date": "next Friday"})
+        assert "YYYY-MM-DD" in result["error"]
+        assert "YYYY-MM-DD" in session._execute_tool("get_available_slots", {"provider_no": "123", "date": "soon"})["error"]
+
+    @patch("call_handler.oscar_client.get_upcoming_appointments")
     def test_get_my_appointments_verified(self, mock_get, session):
         session.verified_demographic_no = 42
         mock_get.return_value = [{"id": 1}]
@@ -86,6 +244,63 @@ class TestExecuteTool:
         assert result["appointments"] == [{"id": 1}]
         mock_get.assert_called_with(42)
 
+    @patch("call_handler.oscar_client.cancel_appointment", return_value=True)
+    @patch("call_handler.oscar_client.get_upcoming_appointments")
+    def test_get_my_appointments_cached_until_change(self, mock_get, mock_cancel, session):
+        session.verified_demographic_no = 42
+        mock_get.return_value = [{"id": 1}]
+        session._execute_tool("get_my_appointments", {})
+        session._execute_tool("get_my_appointments", {})
+        assert mock_get.call_count == 1
+        session._execute_tool("cancel_appointment", {"appointment_id": 1})
+        session._execute_tool("get_my_appointments", {})
+        assert mock_get.call_count == 2
+
+    @patch("call_handler.oscar_client.get_upcoming_appointments")
+    def test_get_my_appointments_failure_not_cached(self, mock_get, session):
+        session.verified_demographic_no = 42
+        mock_get.return_value = None
+        assert "error" in session._execute_tool("get_my_appointments", {})
+        mock_get.return_value = [{"id": 1}]
+        assert session._execute_tool("get_my_appointments", {})["appointments"] == [{"id": 1}]
+        assert mock_get.call_count == 2
+
+    @patch("call_handler.oscar_client.get_patient_appointments", return_value=None)
+    def test_upcoming_appointments_history_failure(self, mock_history):
+        import oscar_client
+        assert oscar_client.get_upcoming_appointments(42) is None
+
+    @patch("call_handler.oscar_client.get_patient_appointments")
+    def test_upcoming_appointments_history_shapes(self, mock_history):
+        import oscar_client
+        row = {"id": 1, "appointmentDate": "2099-01-01", "startTime": "09:00:00"}
+        for history in ({"content": [row, "junk"]}, {"appointments": [row]}):
+            mock_history.return_value = history
+            assert [a["id"] for a in oscar_client.get_upcoming_appointments(42)] == [1]
+        for history in ({"error": "boom"}, "junk"):
+            mock_history.return_value = history
+            assert oscar_client.get_upcoming_appointments(42) is None
+
+    @patch("call_handler.oscar_client.get_patient_appointments")
+    def test_upcoming_appointments_millis_in_clinic_timezone(self, mock_history):
+        import oscar_client
+        local_midnight = datetime(2099, 1, 1, tzinfo=availability.TZ).timestamp() * 1000
+        mock_history.return_value = [{"id": 1, "appointmentDate": local_midnight, "startTime": "09:00:00"}]
+        assert oscar_client.get_upcoming_appointments(42)[0]["date"] == "2099-01-01"
+
+    @patch("call_handler.oscar_client.get_patient_appointments")
+    def test_upcoming_appointments_filtered_and_sorted(self, mock_history):
+        import oscar_client
+        mock_history.return_value = [
+            {"id": 1, "appointmentDate": "2000-01-01", "startTime": "09:00:00"},
+            {"id": 2, "appointmentDate": "2099-02-01", "startTime": "10:00:00", "providerName": "Dr. Smith"},
+            {"id": 3, "appointmentDate": "2099-01-01", "startTime": "2:30 PM"},
+            {"id": 4, "appointmentDate": "2099-01-01", "startTime": "09:00:00", "status": "C"},
+        ]
+        result = oscar_client.get_upcoming_appointments(42)
+        assert [(a["id"], a["date"], a["time"]) for a in result] == [(3, "2099-01-01", "14:30"), (2, "2099-02-01", "10:00")]
+        assert result[1]["provider"] == "Dr. Smith"
+
     @patch("call_handler.oscar_client.create_appointment")
     def test_book_appointment_success(self, mock_create, session):
         session.verified_demographic_no = 42
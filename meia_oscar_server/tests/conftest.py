@@ -33,6 +33,7 @@ def mock_oscar_response():
         resp.ok = ok
         resp.status_code = status_code
         resp.text = text
+        resp.content = text.encode()
         resp.json.return_value = json_data or {}
         return resp
     return _make_response
@@ -0,0 +1,85 @@
+"""Tests for admission.py"""
+
+import threading
+import time
+import pytest
+import admission
+from admission import AdmissionController, REALTIME, INTERACTIVE, BACKGROUND
+
+
+def _wait_for(predicate):
+    deadline = time.monotonic() + 2
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+class TestAdmissionController:
+    def test_global_cap_and_timeout(self):
+        c = AdmissionController(max_in_flight=1, per_scope_max=5)
+        assert c.acquire("a")
+        assert not c.acquire("b", timeout=0.01)
+        c.release("a")
+        assert c.acquire("b")
+
+    def test_per_scope_cap(self):
+        c = AdmissionController(max_in_flight=5, per_scope_max=1)
+        assert c.acquire("a")
+        assert not c.acquire("a", timeout=0.01)
+        assert c.acquire("b")
+
+    def test_priority_order(self):
+        c = AdmissionController(max_in_flight=1, per_scope_max=5)
+        assert c.acquire("holder")
+        admitted = []
+
+        def wait(scope, level):
+            assert c.acquire(scope, level, timeout=2)
+            admitted.append(scope)
+            c.release(scope)
+
+        threads = [threading.Thread(target=wait, args=("batch", BACKGROUND)),
+                   threading.Thread(target=wait, args=("chat", INTERACTIVE))]
+        for t in threads:
+            t.start()
+        _wait_for(lambda: c.stats()["waiting"] == 2)
+        phone = threading.Thread(target=wait, args=("phone", REALTIME))
+        phone.start()
+        _wait_for(lambda: c.stats()["waiting"] == 3)
+        c.release("holder")
+        for t in threads + [phone]:
+            t.join()
+        assert admitted == ["phone", "chat", "batch"]
+
+    def test_capped_scope_does_not_block_others(self):
+        c = AdmissionController(max_in_flight=2, per_scope_max=1)
+        assert c.acquire("a", REALTIME)
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(c.acquire("a", REALTIME, timeout=2)))
+        waiter.start()
+        _wait_for(lambda: c.stats()["waiting"] == 1)
+        # "a" is capped, so a lower-priority request for "b" is still admitted
+        assert c.acquire("b", BACKGROUND, timeout=0.1)
+        c.release("a")
+        waiter.join()
+        assert result == [True]
+
+    def test_owner_keys_per_session_cap(self):
+        c = AdmissionController(max_in_flight=5, per_scope_max=1)
+        with admission.owner("call:1"), c.slot("service") as first:
+            with admission.owner("call:2"), c.slot("service") as second:
+                assert first and second
+            with c.slot("service", timeout=0.01) as third:
+                assert not third
+
+
+class TestPriorityContext:
+    def test_priority_context_manager(self):
+        assert admission.current_priority() == INTERACTIVE
+        with admission.priority(REALTIME):
+            assert admission.current_priority() == REALTIME
+        assert admission.current_priority() == INTERACTIVE
+
+    def test_map_keyed_runs_in_background(self):
+        import parallel
+        assert parallel.map_keyed(lambda k: admission.current_priority(), [1]) == {"1": BACKGROUND}
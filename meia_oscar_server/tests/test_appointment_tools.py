@@ -20,6 +20,9 @@ def setup_tools_module(mock_sessions):
     tools.CONSUMER_SECRET = "secret"
     tools.sessions = mock_sessions
     
+    import schedule_cache
+    schedule_cache.clear()
+    
     yield mock_tools
     
     # Cleanup
@@ -57,7 +60,119 @@ class TestGetDailyAppointments:
         )
 
 
+class TestScheduleCaching:
+    def test_repeat_read_served_from_cache_until_own_write(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.return_value = mock_oscar_response({"success": True})
+        setup_tools_module.handle_response.side_effect = [
+            [{"id": 1, "startTime": "09:00:00", "status": "t"}], {"ok": True}]
+        
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        appointment_tools.get_daily_appointments("2099-01-05", mock_tool_context, "101")
+        appointment_tools.update_appointment_status(1, "H", mock_tool_context)
+        result = appointment_tools.get_daily_appointments("2099-01-05", mock_tool_context, "101")
+        
+        assert result == [{"id": 1, "startTime": "09:00:00", "status": "H"}]
+        gets = [c for c in setup_tools_module.oscar_request.call_args_list if c.args[0] == "GET"]
+        assert len(gets) == 1
+
+    def test_delete_removes_from_cached_day(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.return_value = mock_oscar_response({})
+        setup_tools_module.handle_response.return_value = [{"id": 1, "startTime": "09:00:00"}]
+        
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        appointment_tools.get_daily_appointments("2099-01-05", mock_tool_context, "101")
+        appointment_tools.delete_appointment(1, mock_tool_context)
+        
+        assert appointment_tools.get_daily_appointments("2099-01-05", mock_tool_context, "101") == []
+
+
+class TestGetAvailableSlots:
+    def test_get_available_slots(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.handle_response.return_value = [
+            {"startTime": "09:00:00", "duration": 15}, {"startTime": "09:30:00", "duration": 60, "status": "C"}]
+        
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        with patch("availability.CLINIC_CLOSE", "10:00"):
+            result = appointment_tools.get_available_slots("101", "2020-01-15", mock_tool_context)
+        
+        setup_tools_module.oscar_request.assert_called_once_with(
+            "GET", "/ws/services/schedule/101/day/2020-01-15", "test-session-123"
+        )
+        assert result["slots"] == ["09:15", "09:30", "09:45"]
+
+    def test_get_available_slots_error(self, mock_tool_context, setup_tools_module):
+        setup_tools_module.handle_response.return_value = {"error": 500, "text": "boom"}
+        
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        assert appointment_tools.get_available_slots("101", "2020-01-15", mock_tool_context)["error"] == 500
+
+    def test_no_slots_on_weekends(self, mock_tool_context, setup_tools_module):
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        result = appointment_tools.get_available_slots("101", "2020-01-18", mock_tool_context)
+        
+        assert result["slots"] == [] and "closed" in result["note"]
+        setup_tools_module.oscar_request.assert_not_called()
+
+
+class TestSearchAvailableSlots:
+    def test_defaults_to_all_doctors(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.return_value = mock_oscar_response(
+            [{"providerNo": "1", "providerType": "doctor"}, {"providerNo": "2", "providerType": "admin"}])
+        setup_tools_module.handle_response.return_value = []
+        
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        import schedule_cache
+        schedule_cache.clear()
+        
+        result = appointment_tools.search_available_slots("2099-01-05", "2099-01-06", mock_tool_context, limit=2)
+        
+        assert result["searched"]["provider_nos"] == ["1"]
+        assert result["slots"] == [{"date": "2099-01-05", "time": "09:00", "provider_no": "1"},
+                                   {"date": "2099-01-05", "time": "09:15", "provider_no": "1"}]
+
+
 class TestCreateAppointment:
+    def test_write_that_may_have_applied_drops_cached_day(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        import resilience
+        import schedule_cache
+        timed_out = resilience.unavailable_response("u", "ReadTimeout", sent=True)
+        never_sent = resilience.unavailable_response("u", "circuit open")
+        setup_tools_module.oscar_request.return_value = mock_oscar_response(ok=False, status_code=503, text=timed_out.text)
+        
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        schedule_cache.put("999", "2099-01-05", [{"id": 1, "startTime": "09:00:00", "status": "t"}])
+        appointment_tools.create_appointment(1, "999", "2099-01-05", "10:00", 15, mock_tool_context)
+        assert schedule_cache.get("999", "2099-01-05") is None
+        
+        schedule_cache.put("999", "2099-01-05", [{"id": 1, "startTime": "09:00:00", "status": "t"}])
+        setup_tools_module.oscar_request.return_value = mock_oscar_response(ok=False, status_code=503, text=never_sent.text)
+        appointment_tools.delete_appointment(1, mock_tool_context)
+        assert schedule_cache.get("999", "2099-01-05") is not None
+        setup_tools_module.oscar_request.return_value = mock_oscar_response(ok=False, status_code=503, text=timed_out.text)
+        appointment_tools.update_appointment_status(1, "H", mock_tool_context)
+        assert schedule_cache.get("999", "2099-01-05") is None
+        schedule_cache.clear()
+
     def test_create_appointment_time_conversion_pm(self, mock_tool_context, mock_oscar_response, setup_tools_module):
         setup_tools_module.oscar_request.return_value = mock_oscar_response({"id": 1})
         
@@ -128,6 +243,67 @@ class TestUpdateAppointmentStatus:
         )
 
 
+class TestBulkStatusUpdate:
+    def _setup(self, mock_oscar_response, setup_tools_module, failing_id=None, day=None):
+        def fake(method, endpoint, session_id, **kwargs):
+            if "/day/" in endpoint:
+                return mock_oscar_response(day or [])
+            if str(failing_id) in endpoint.split("/"):
+                return mock_oscar_response(ok=False, status_code=500, text="boom")
+            return mock_oscar_response({"ok": True})
+        setup_tools_module.oscar_request.side_effect = fake
+        setup_tools_module.handle_response.side_effect = \
+            lambda resp, name: resp.json() if resp.ok else {"error": resp.status_code, "text": resp.text}
+
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        return appointment_tools
+
+    def test_explicit_updates(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        appointment_tools = self._setup(mock_oscar_response, setup_tools_module, failing_id=2)
+        
+        result = appointment_tools.update_appointment_statuses_bulk(
+            mock_tool_context, updates=[{"appointment_id": 1, "status": "B"}, {"appointment_id": 2, "status": "B"}])
+        
+        assert result["updated"] == 1 and result["failed"] == 1
+        assert result["results"][0] == {"appointment_id": 1, "status": "B", "success": True}
+        assert result["results"][1]["error"] == {"error": 500, "text": "boom"}
+
+    def test_day_filter(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        day = [{"id": 1, "status": "t"}, {"id": 2, "status": "H"}, {"id": 3, "status": "tS"}, {"id": 4, "status": "C"}]
+        appointment_tools = self._setup(mock_oscar_response, setup_tools_module, day=day)
+        import schedule_cache
+        schedule_cache.put("101", "2099-01-05", [dict(a, status="t") for a in day])  # stale: arrivals not seen yet
+        
+        result = appointment_tools.update_appointment_statuses_bulk(
+            mock_tool_context, status="N", date="2099-01-05", provider_no="101", from_statuses=["t"])
+        
+        setup_tools_module.oscar_request.assert_any_call("GET", "/ws/services/schedule/101/day/2099-01-05", "test-session-123")
+        assert [r["appointment_id"] for r in result["results"]] == [1, 3]
+        assert result["updated"] == 2
+        assert [a["status"] for a in schedule_cache.get("101", "2099-01-05")] == ["N", "H", "N", "C"]
+
+    def test_day_filter_requires_current_statuses(self, mock_tool_context, setup_tools_module):
+        if 'appointment_tools' in sys.modules:
+            del sys.modules['appointment_tools']
+        import appointment_tools
+        
+        result = appointment_tools.update_appointment_statuses_bulk(mock_tool_context, status="N", date="2099-01-05")
+        
+        assert "error" in result
+        setup_tools_module.oscar_request.assert_not_called()
+
+    def test_day_filter_accepts_full_status_codes(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        appointment_tools = self._setup(mock_oscar_response, setup_tools_module,
+                                        day=[{"id": 1, "status": "t"}, {"id": 2, "status": "H"}])
+        
+        result = appointment_tools.update_appointment_statuses_bulk(
+            mock_tool_context, status="N", date="2099-01-06", provider_no="101", from_statuses=["tS"])
+        
+        assert [r["appointment_id"] for r in result["results"]] == [1]
+
+
 class TestDeleteAppointment:
     def test_delete_appointment_success(self, mock_tool_context, mock_oscar_response, setup_tools_module):
         setup_tools_module.oscar_request.return_value = mock_oscar_response(status_code=200)
@@ -0,0 +1,95 @@
+"""Tests for availability.py"""
+
+import pytest
+from unittest.mock import MagicMock
+import availability
+from availability import parse_time, busy_intervals, free_slots
+
+
+class TestParseTime:
+    @pytest.mark.parametrize("value,minutes", [
+        ("10:00 AM", 600), ("1:30 PM", 810), ("12:15 AM", 15), ("12:00 PM", 720),
+        ("10:00", 600), ("14:45:00", 885), ("09:05:00.0", 545),
+    ])
+    def test_formats(self, value, minutes):
+        assert parse_time(value) == minutes
+
+    def test_unreadable(self):
+        assert parse_time("noon") is None
+        assert parse_time(None) is None
+
+
+class TestBusyIntervals:
+    def test_merges_and_skips_cancelled(self):
+        appts = [
+            {"startTime": "10:00", "duration": 15},
+            {"startTime": "10:15", "duration": 30},
+            {"startTime": "11:00", "endTime": "11:14", "status": "t"},
+            {"startTime": "13:00", "duration": 15, "status": "C"},
+        ]
+        assert busy_intervals(appts) == [(600, 645), (660, 675)]
+
+    def test_unreadable_duration_falls_back(self):
+        appts = [{"startTime": "10:00", "duration": "15 min", "endTime": "10:29"}, {"startTime": "11:00", "duration": "abc"}]
+        assert busy_intervals(appts) == [(600, 630), (660, 675)]
+
+
+class TestFreeSlots:
+    def test_slots_between_bookings(self):
+        appts = [{"startTime": "9:00 AM", "duration": 15}, {"startTime": "9:30 AM", "duration": 15}]
+        slots = free_slots(appts, open_time="09:00", close_time="10:00")
+        assert slots == ["09:15", "09:45"]
+
+    def test_longer_duration_must_fit(self):
+        appts = [{"startTime": "09:30", "duration": 15}]
+        assert free_slots(appts, duration=30, open_time="09:00", close_time="10:30") == ["09:00", "09:45", "10:00"]
+
+    def test_overlapping_long_appointment(self):
+        appts = [{"startTime": "09:05", "duration": 60}]
+        assert free_slots(appts, open_time="09:00", close_time="10:30") == ["10:15"]
+
+    def test_not_before(self):
+        assert free_slots([], open_time="09:00", close_time="10:00", not_before=580) == ["09:45"]
+
+
+class TestSearch:
+    def test_earliest_slots_across_providers_and_days(self):
+        # 2099-01-02 is a Friday; the weekend is skipped and Monday is 2099-01-05
+        booked = {("1", "2099-01-02"): [{"startTime": "09:00", "duration": 480}],
+                  ("2", "2099-01-02"): [{"startTime": "09:00", "duration": 465}]}
+        fetch = MagicMock(side_effect=lambda p, d: booked.get((p, d), []))
+        result = availability.search(fetch, ["1", "2"], "2099-01-02", "2099-01-05", limit=3)
+        assert result["slots"] == [
+            {"date": "2099-01-02", "time": "16:45", "provider_no": "2"},
+            {"date": "2099-01-05", "time": "09:00", "provider_no": "1"},
+            {"date": "2099-01-05", "time": "09:00", "provider_no": "2"},
+        ]
+        assert result["searched"]["dates"] == ["2099-01-02", "2099-01-05"]
+        assert fetch.call_count == 4
+
+    def test_unavailable_days_reported(self):
+        fetch = MagicMock(side_effect=lambda p, d: None if p == "1" else [])
+        result = availability.search(fetch, ["1", "2"], "2099-01-05", "2099-01-05", limit=1)
+        assert result["unavailable"] == [{"provider_no": "1", "date": "2099-01-05"}]
+        assert result["slots"][0]["provider_no"] == "2"
+
+    @pytest.mark.parametrize("start,end", [("next Monday", "2099-01-05"), (None, None), ("2099-01-05", "")])
+    def test_invalid_dates(self, start, end):
+        fetch = MagicMock()
+        assert availability.search(fetch, ["1"], start, end) == {"error": availability.DATE_ERROR}
+        fetch.assert_not_called()
+
+    def test_tomorrow_and_limit_clamped(self):
+        result = availability.search(MagicMock(return_value=[]), ["1"], "tomorrow", "tomorrow", limit=1000)
+        assert len(result["slots"]) <= availability.MAX_RESULTS
+
+    def test_too_many_provider_days(self):
+        result = availability.search(MagicMock(), [str(i) for i in range(30)], "2099-01-05", "2099-01-09")
+        assert "error" in result
+
+
+class TestClinicDay:
+    def test_weekdays_only(self):
+        assert availability.is_clinic_day("2020-01-17")  # Friday
+        assert not availability.is_clinic_day("2020-01-18")
+        assert not availability.is_clinic_day("2020-01-19")
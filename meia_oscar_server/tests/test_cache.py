@@ -0,0 +1,52 @@
+"""Tests for cache.py"""
+
+import pytest
+from unittest.mock import patch
+from cache import TTLCache
+
+
+class TestTTLCache:
+    def test_hit_and_miss_counters(self):
+        c = TTLCache(maxsize=4)
+        assert c.get("a") is None
+        c.set("a", 1)
+        assert c.get("a") == 1
+        assert c.stats()["hits"] == 1
+        assert c.stats()["misses"] == 1
+
+    def test_entries_expire(self):
+        c = TTLCache()
+        with patch("cache.time.monotonic", return_value=0):
+            c.set("a", 1, ttl=10)
+        with patch("cache.time.monotonic", return_value=9):
+            assert c.get("a") == 1
+        with patch("cache.time.monotonic", return_value=11):
+            assert c.get("a") is None
+        assert len(c) == 0
+
+    def test_lru_eviction(self):
+        c = TTLCache(maxsize=2)
+        c.set("a", 1)
+        c.set("b", 2)
+        c.get("a")  # a is now most recently used
+        c.set("c", 3)
+        assert c.get("b") is None
+        assert c.get("a") == 1
+        assert c.stats()["evictions"] == 1
+
+    def test_invalidate(self):
+        c = TTLCache()
+        c.set(("x", 1), 1)
+        c.set(("y", 1), 2)
+        c.invalidate(("x", 1))
+        assert c.get(("x", 1)) is None
+        c.invalidate_where(lambda k: k[0] == "y")
+        assert len(c) == 0
+
+    def test_items_skips_expired(self):
+        c = TTLCache()
+        with patch("cache.time.monotonic", return_value=0):
+            c.set("a", 1, ttl=10)
+            c.set("b", 2, ttl=100)
+        with patch("cache.time.monotonic", return_value=11):
+            assert c.items() == [("b", 2)]
@@ -0,0 +1,40 @@
+"""Tests for chart_tools.py"""
+
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture
+def mock_sections():
+    with patch("chart_tools.get_patient_details", return_value={"demographicNo": 1}) as details, \
+         patch("chart_tools.get_patient_allergies", return_value=[{"description": "Penicillin"}]) as allergies, \
+         patch("chart_tools.get_patient_medications", return_value=[{"brandName": "Metformin"}]) as meds, \
+         patch("chart_tools.get_patient_measurements", return_value=[{"type": "BP"}]) as measurements, \
+         patch("chart_tools.get_patient_appointment_history", return_value=[{"id": 9}]) as appts:
+        yield {"details": details, "allergies": allergies, "meds": meds, "measurements": measurements, "appts": appts}
+
+
+class TestChartSnapshot:
+    def test_merges_all_sections(self, mock_tool_context, mock_sections):
+        from chart_tools import get_patient_chart_snapshot
+        result = get_patient_chart_snapshot(1, mock_tool_context)
+        assert result == {
+            "patient_id": 1,
+            "demographics": {"demographicNo": 1},
+            "allergies": [{"description": "Penicillin"}],
+            "medications": [{"brandName": "Metformin"}],
+            "measurements": [{"type": "BP"}],
+            "appointments": [{"id": 9}],
+        }
+        assert "BP" in mock_sections["measurements"].call_args[0][1]
+
+    def test_partial_failure(self, mock_tool_context, mock_sections):
+        mock_sections["meds"].return_value = {"error": 500, "text": "boom"}
+        mock_sections["appts"].side_effect = RuntimeError("timeout")
+        from chart_tools import get_patient_chart_snapshot
+        result = get_patient_chart_snapshot(1, mock_tool_context, measurement_types=["A1C"])
+        assert "medications" not in result and "appointments" not in result
+        assert result["errors"]["medications"] == {"error": 500, "text": "boom"}
+        assert result["errors"]["appointments"] == {"error": "timeout"}
+        assert result["allergies"] == [{"description": "Penicillin"}]
+        mock_sections["measurements"].assert_called_once_with(1, ["A1C"], mock_tool_context)
@@ -88,3 +88,29 @@ class TestCreatePatient:
             assert json_data["address"]["city"] == "Toronto"
             assert json_data["address"]["province"] == "ON"
             assert json_data["address"]["postal"] == "M5V 1A1"
+
+
+class TestBatchTools:
+    def test_get_patient_details_batch(self, mock_tool_context):
+        with patch("demographic_tools.get_patient_details", side_effect=lambda pid, ctx: {"demographicNo": pid}) as mock_get:
+            from demographic_tools import get_patient_details_batch
+            result = get_patient_details_batch([1, 2, 2], mock_tool_context)
+
+            assert result == {"1": {"demographicNo": 1}, "2": {"demographicNo": 2}}
+            assert mock_get.call_count == 2
+
+    def test_get_patient_allergies_batch_partial_error(self, mock_tool_context):
+        def fake(pid, ctx):
+            return {"error": 404, "text": "Not found"} if pid == 2 else [{"description": "Latex"}]
+
+        with patch("demographic_tools.get_patient_allergies", side_effect=fake):
+            from demographic_tools import get_patient_allergies_batch
+            result = get_patient_allergies_batch([1, 2], mock_tool_context)
+
+            assert result["1"] == [{"description": "Latex"}]
+            assert result["2"]["error"] == 404
+
+    def test_batch_size_limit(self, mock_tool_context):
+        from demographic_tools import get_patient_details_batch
+        result = get_patient_details_batch(list(range(101)), mock_tool_context)
+        assert "At most 100" in result["error"]
@@ -0,0 +1,106 @@
+"""Tests for hedging.py"""
+
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import hedging
+import oscar_http
+from hedging import Hedger, MIN_SAMPLES
+
+
+def _warm(hedger, key="quickSearch", seconds=0.01):
+    for _ in range(MIN_SAMPLES):
+        hedger.windows[key].record(seconds)
+
+
+class TestEligibility:
+    def test_only_listed_gets(self):
+        h = Hedger(enabled=True)
+        assert h.eligible("GET", "/ws/services/demographics/quickSearch") == "quickSearch"
+        assert h.eligible("GET", "/ws/services/schedule/999998/day/2025-01-15") == "schedule_day"
+        assert h.eligible("GET", "/ws/services/schedule/day/today") == "schedule_day"
+        assert h.eligible("POST", "/ws/services/demographics/quickSearch") is None
+        assert h.eligible("GET", "/ws/services/demographics/1") is None
+
+    def test_disabled(self):
+        assert Hedger(enabled=False).eligible("GET", "/ws/services/demographics/quickSearch") is None
+
+
+class TestRun:
+    def test_no_hedge_without_enough_samples(self):
+        h = Hedger(enabled=True, budget=1.0)
+        fn = MagicMock(return_value="ok")
+        assert h.run("quickSearch", fn) == "ok"
+        assert fn.call_count == 1
+        assert h.hedges == 0
+
+    def test_failed_attempts_recorded(self):
+        h = Hedger(enabled=True)
+        fn = MagicMock(side_effect=TimeoutError())
+        try:
+            h.run("quickSearch", fn)
+        except TimeoutError:
+            pass
+        assert len(h.windows["quickSearch"]._samples) == 1
+
+    def test_fast_primary_not_hedged(self):
+        h = Hedger(enabled=True, budget=1.0)
+        _warm(h, seconds=1.0)
+        fn = MagicMock(return_value="ok")
+        assert h.run("quickSearch", fn) == "ok"
+        assert fn.call_count == 1
+
+    def test_slow_primary_hedged_and_hedge_wins(self):
+        h = Hedger(enabled=True, budget=1.0)
+        _warm(h)
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(2)
+                return "primary"
+            return "hedge"
+
+        assert h.run("quickSearch", fn) == "hedge"
+        release.set()
+        assert len(calls) == 2
+        assert h.stats()["hedged"] == 1
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        h = Hedger(enabled=True, budget=1.0)
+        _warm(h)
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return "primary"
+            raise ConnectionError("boom")
+
+        assert h.run("quickSearch", fn) == "primary"
+
+    def test_budget_caps_hedges(self):
+        h = Hedger(enabled=True, budget=0.0)
+        _warm(h)
+
+        def slow():
+            time.sleep(0.05)
+            return "ok"
+
+        assert h.run("quickSearch", slow) == "ok"
+        assert h.hedges == 0
+
+
+class TestTransport:
+    def test_send_routes_eligible_gets_through_hedger(self, mock_oscar_response):
+        session = MagicMock()
+        session.request.return_value = mock_oscar_response([])
+        h = Hedger(enabled=True)
+        with patch.object(hedging, "hedger", h), patch.object(oscar_http.pool, "get", return_value=session):
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/quickSearch", "s1",
+                               params={"query": "smith"})
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1")
+        assert h.requests == 1
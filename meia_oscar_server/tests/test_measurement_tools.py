@@ -31,3 +31,12 @@ class TestSaveMeasurement:
             assert json_data["dataField"] == "75.5"
             assert json_data["dateObserved"] == "2025-01-15"
             assert json_data["comments"] == "Morning weight"
+
+
+class TestGetPatientMeasurementsBatch:
+    def test_get_patient_measurements_batch(self, mock_tool_context):
+        with patch("measurement_tools.get_patient_measurements", side_effect=lambda pid, types, ctx: [{"type": types[0], "pid": pid}]):
+            from measurement_tools import get_patient_measurements_batch
+            result = get_patient_measurements_batch([1, 2], ["A1C"], mock_tool_context)
+
+            assert result == {"1": [{"type": "A1C", "pid": 1}], "2": [{"type": "A1C", "pid": 2}]}
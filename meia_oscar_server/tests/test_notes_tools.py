@@ -0,0 +1,159 @@
+"""Tests for notes_tools.py"""
+
+import pytest
+import time
+from unittest.mock import MagicMock, patch
+import sys
+
+
+@pytest.fixture(autouse=True)
+def setup_tools_module(mock_sessions):
+    """Setup tools module before importing notes_tools"""
+    mock_tools = MagicMock()
+    mock_tools.oscar_request = MagicMock()
+    mock_tools.current_provider_no = MagicMock(return_value="999")
+    sys.modules['tools'] = mock_tools
+    
+    import tools
+    tools.sessions = mock_sessions
+    
+    yield mock_tools
+    
+    if 'notes_tools' in sys.modules:
+        del sys.modules['notes_tools']
+
+
+@pytest.fixture(autouse=True)
+def temp_ticklers(tmp_path, monkeypatch):
+    import tickler_reaper
+    log = tickler_reaper.TempTicklerLog(str(tmp_path / "temp_ticklers.jsonl"))
+    monkeypatch.setattr(tickler_reaper, "temp_ticklers", log)
+    return log
+
+
+def _fake_oscar(mock_oscar_response, pages):
+    """oscar_request stand-in: tickler/search returns `pages` (lists of ticklers), with the
+    created temp tickler (id 77) placed on the last page"""
+    state = {}
+
+    def fake(method, endpoint, session_id, **kwargs):
+        if endpoint.endswith("tickler/add"):
+            state["marker"] = kwargs["json"]["message"]
+            return mock_oscar_response({"success": True})
+        if endpoint.endswith("tickler/search"):
+            index = kwargs["params"]["startIndex"] // 50
+            page = list(pages[index])
+            if index == len(pages) - 1:
+                page.append({"id": 77, "message": state["marker"]})
+            return mock_oscar_response({"content": page, "total": sum(map(len, pages)) + 1})
+        if endpoint.endswith("ticklerSaveNote"):
+            return mock_oscar_response({"noteId": 5})
+        return mock_oscar_response({"success": True})
+    return fake
+
+
+def _wait_for_complete(mock_request):
+    deadline = time.monotonic() + 2
+    while not any(c.args[1].endswith("tickler/complete") for c in mock_request.call_args_list):
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+class TestSaveNote:
+    def test_save_note_uses_cached_provider(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.side_effect = _fake_oscar(mock_oscar_response, [[]])
+        import notes_tools
+
+        result = notes_tools.save_note(1, "== Meia AI generated note ==", mock_tool_context)
+
+        assert result == {"noteId": 5}
+        endpoints = [c.args[1] for c in setup_tools_module.oscar_request.call_args_list]
+        assert "/ws/services/providerService/provider/me" not in endpoints
+        search = next(c for c in setup_tools_module.oscar_request.call_args_list if c.args[1].endswith("search"))
+        assert search.kwargs["json"]["assignee"] == "999"
+        _wait_for_complete(setup_tools_module.oscar_request)
+
+    def test_temp_tickler_tracked_until_completed(self, mock_tool_context, mock_oscar_response, setup_tools_module, temp_ticklers):
+        setup_tools_module.oscar_request.side_effect = _fake_oscar(mock_oscar_response, [[]])
+        import notes_tools
+
+        with patch.object(notes_tools, "_complete_in_background") as complete:
+            notes_tools.save_note(1, "note", mock_tool_context)
+        assert len(temp_ticklers) == 1
+        session_id, tickler_id, marker = complete.call_args.args
+        assert tickler_id == 77
+
+        notes_tools._complete_in_background(session_id, tickler_id, marker)
+        deadline = time.monotonic() + 2
+        while len(temp_ticklers):
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+
+    def test_save_note_pages_past_first_50(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        first_page = [{"id": i, "message": "other"} for i in range(50)]
+        setup_tools_module.oscar_request.side_effect = _fake_oscar(mock_oscar_response, [first_page, []])
+        import notes_tools
+
+        result = notes_tools.save_note(1, "note", mock_tool_context)
+
+        assert result == {"noteId": 5}
+        save = next(c for c in setup_tools_module.oscar_request.call_args_list if c.args[1].endswith("ticklerSaveNote"))
+        assert save.kwargs["json"]["tickler"]["id"] == 77
+        _wait_for_complete(setup_tools_module.oscar_request)
+
+    def test_save_note_tickler_not_found(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.side_effect = lambda m, e, s, **kw: mock_oscar_response(
+            {"success": True} if e.endswith("add") else {"content": [], "total": 0})
+        import notes_tools
+
+        result = notes_tools.save_note(1, "note", mock_tool_context)
+
+        assert result["error"] == "Could not find created tickler"
+
+    def test_save_note_without_provider(self, mock_tool_context, setup_tools_module):
+        setup_tools_module.current_provider_no.return_value = None
+        import notes_tools
+
+        assert notes_tools.save_note(1, "note", mock_tool_context) == {"error": "Failed to get current provider"}
+        setup_tools_module.oscar_request.assert_not_called()
+
+    def test_save_note_queued_when_write_queue_enabled(self, mock_tool_context, setup_tools_module):
+        import notes_tools
+        with patch.object(notes_tools.write_queue, "ENABLED", True), \
+             patch.object(notes_tools.write_queue.queue, "enqueue", return_value={"queued": True}) as enqueue:
+            assert notes_tools.save_note(1, "note", mock_tool_context) == {"queued": True}
+        kind, patient_id, session_id, payload = enqueue.call_args.args
+        assert (kind, patient_id, session_id) == ("note", 1, "test-session-123")
+        assert payload["note_text"] == "note" and payload["marker"].startswith("_temp_")
+        setup_tools_module.oscar_request.assert_not_called()
+
+    def test_queued_retry_reuses_temp_tickler(self, mock_oscar_response, setup_tools_module):
+        marker = "_temp_0123abcd_"
+        setup_tools_module.oscar_request.side_effect = lambda m, e, s, **kw: mock_oscar_response(
+            {"content": [{"id": 77, "message": marker}], "total": 1} if e.endswith("search") else {"noteId": 5})
+        import notes_tools
+
+        with patch.object(notes_tools, "_complete_in_background") as background:
+            result = notes_tools._write_note("test-session-123", {"patient_id": 1, "note_text": "note", "marker": marker})
+
+        assert result == {"noteId": 5}
+        endpoints = [c.args[1] for c in setup_tools_module.oscar_request.call_args_list]
+        assert "/ws/services/tickler/add" not in endpoints
+        # completed before returning, while the queue's detached credentials are still registered
+        assert endpoints[-1] == "/ws/services/tickler/complete"
+        background.assert_not_called()
+
+    def test_queued_unsent_save_keeps_temp_tickler(self, mock_oscar_response, setup_tools_module):
+        import json
+        marker = "_temp_0123abcd_"
+        unsent = mock_oscar_response(ok=False, status_code=503)
+        unsent.text = json.dumps({"error": "OSCAR unavailable", "reason": "ConnectTimeout", "sent": False})
+        setup_tools_module.oscar_request.side_effect = lambda m, e, s, **kw: (
+            mock_oscar_response({"content": [{"id": 77, "message": marker}], "total": 1}) if e.endswith("search") else unsent)
+        import notes_tools
+
+        result = notes_tools._write_note("test-session-123", {"patient_id": 1, "note_text": "note", "marker": marker})
+
+        assert result["error"] == 503
+        endpoints = [c.args[1] for c in setup_tools_module.oscar_request.call_args_list]
+        assert "/ws/services/tickler/complete" not in endpoints
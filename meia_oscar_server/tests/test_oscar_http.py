@@ -0,0 +1,190 @@
+"""Tests for oscar_http.py pooled transport"""
+
+import threading
+import time
+import pytest
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+import oscar_http
+from singleflight import SingleFlight
+
+
+@pytest.fixture
+def pool():
+    return oscar_http.SessionPool(pool_size=2, idle_timeout=60)
+
+
+class TestSessionPool:
+    def test_reuses_session_for_same_host_and_scope(self, pool):
+        a = pool.get("https://oscar:8443/oscar/ws/services/a", "s1")
+        b = pool.get("https://oscar:8443/oscar/ws/services/b", "s1")
+        assert a is b
+        assert a.verify is False
+
+    def test_separate_sessions_per_scope(self, pool):
+        a = pool.get("https://oscar:8443/oscar/x", "s1")
+        b = pool.get("https://oscar:8443/oscar/x", "s2")
+        assert a is not b
+
+    def test_separate_sessions_per_host(self, pool):
+        a = pool.get("https://oscar-a/x", "s1")
+        b = pool.get("https://oscar-b/x", "s1")
+        assert a is not b
+
+    def test_idle_sessions_are_replaced(self, pool):
+        with patch("oscar_http.time.monotonic", return_value=0):
+            a = pool.get("https://oscar/x", "s1")
+        with patch("oscar_http.time.monotonic", return_value=61):
+            b = pool.get("https://oscar/x", "s1")
+        assert a is not b
+
+    def test_close_scope(self, pool):
+        a = pool.get("https://oscar/x", "s1")
+        b = pool.get("https://oscar/x", "s2")
+        pool.close("s1")
+        assert pool.get("https://oscar/x", "s1") is not a
+        assert pool.get("https://oscar/x", "s2") is b
+
+
+class TestRequest:
+    def test_request_uses_pooled_session(self):
+        session = MagicMock()
+        with patch.object(oscar_http.pool, "get", return_value=session) as mock_get:
+            oscar_http.request("GET", "https://oscar/x", "s1", params={"a": 1})
+        mock_get.assert_called_once_with("https://oscar/x", "s1")
+        session.request.assert_called_once_with("GET", "https://oscar/x", params={"a": 1}, verify=False,
+                                                timeout=oscar_http.resilience.timeout_for("/x"))
+
+
+class TestReferenceCache:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        oscar_http.reference_cache.clear()
+        yield
+        oscar_http.reference_cache.clear()
+
+    def test_reference_get_served_from_cache(self, mock_oscar_response):
+        with patch("oscar_http._send", return_value=mock_oscar_response([{"status": "t"}])) as mock_send:
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/schedule/statuses", "s1")
+            resp = oscar_http.request("GET", "https://oscar/oscar/ws/services/schedule/statuses", "s2")
+        assert mock_send.call_count == 1
+        assert resp.json() == [{"status": "t"}]
+
+    def test_per_session_reference_data(self, mock_oscar_response):
+        with patch("oscar_http._send", return_value=mock_oscar_response({"providerNo": "1"})) as mock_send:
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/providerService/provider/me", "s1")
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/providerService/provider/me", "s2")
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/providerService/provider/me", "s1")
+        assert mock_send.call_count == 2
+
+    def test_errors_not_cached(self, mock_oscar_response):
+        with patch("oscar_http._send", return_value=mock_oscar_response(ok=False, status_code=500)) as mock_send:
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/schedule/types", "s1")
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/schedule/types", "s1")
+        assert mock_send.call_count == 2
+
+    def test_non_reference_not_cached(self, mock_oscar_response):
+        with patch("oscar_http._send", return_value=mock_oscar_response({})) as mock_send:
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1")
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1")
+        assert mock_send.call_count == 2
+
+    def test_invalidate_endpoint(self, mock_oscar_response):
+        with patch("oscar_http._send", return_value=mock_oscar_response([])) as mock_send:
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/schedule/types", "s1")
+            oscar_http.invalidate_reference("/ws/services/schedule/types")
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/schedule/types", "s1")
+        assert mock_send.call_count == 2
+
+
+class TestCoalescing:
+    def test_concurrent_identical_gets_share_request(self, mock_oscar_response):
+        release = threading.Event()
+
+        def slow_send(*args, **kwargs):
+            release.wait(2)
+            return mock_oscar_response([{"id": 1}])
+
+        url = "https://oscar/oscar/ws/services/schedule/1/day/2025-01-15"
+        inflight = SingleFlight()
+        with patch.object(oscar_http, "inflight", inflight), \
+             patch("oscar_http._send", side_effect=slow_send) as mock_send:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [executor.submit(oscar_http.request, "GET", url, "s1") for _ in range(3)]
+                while inflight.stats()["shared"] < 2:
+                    time.sleep(0.001)
+                release.set()
+                results = [f.result() for f in futures]
+        assert all(r.json() == [{"id": 1}] for r in results)
+        assert mock_send.call_count == 1
+
+    def test_different_scopes_not_shared(self, mock_oscar_response):
+        with patch("oscar_http.inflight.do", side_effect=lambda key, fn: fn()) as mock_do, \
+             patch("oscar_http._send", return_value=mock_oscar_response({})):
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1", params={"a": 1})
+            oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s2", params={"a": 1})
+        keys = [c.args[0] for c in mock_do.call_args_list]
+        assert keys[0] != keys[1]
+
+    def test_writes_not_coalesced(self, mock_oscar_response):
+        with patch("oscar_http.inflight.do") as mock_do, \
+             patch("oscar_http._send", return_value=mock_oscar_response({})):
+            oscar_http.request("POST", "https://oscar/oscar/ws/services/schedule/add", "s1", json={})
+        mock_do.assert_not_called()
+
+
+class TestResilience:
+    @pytest.fixture(autouse=True)
+    def fresh_breakers(self):
+        oscar_http.breakers.clear()
+        with patch("oscar_http.time.sleep"):
+            yield
+        oscar_http.breakers.clear()
+
+    def _session(self, *outcomes):
+        session = MagicMock()
+        session.request.side_effect = list(outcomes)
+        return patch.object(oscar_http.pool, "get", return_value=session), session
+
+    def test_get_retried_after_timeout(self, mock_oscar_response):
+        patcher, session = self._session(requests.Timeout(), mock_oscar_response({"ok": 1}))
+        with patcher:
+            resp = oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1")
+        assert resp.json() == {"ok": 1}
+        assert session.request.call_count == 2
+
+    def test_post_not_retried(self):
+        patcher, session = self._session(requests.ConnectionError(), None)
+        with patcher:
+            resp = oscar_http.request("POST", "https://oscar/oscar/ws/services/schedule/add", "s1", json={})
+        assert resp.status_code == 503
+        assert resp.json()["error"] == "OSCAR unavailable"
+        assert session.request.call_count == 1
+
+    def test_gateway_errors_retried_then_returned(self, mock_oscar_response):
+        bad = mock_oscar_response(ok=False, status_code=502)
+        patcher, session = self._session(bad, bad, bad)
+        with patcher:
+            resp = oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1")
+        assert resp.status_code == 502
+        assert session.request.call_count == 3
+
+    def test_breaker_fails_fast_when_open(self):
+        breaker = oscar_http.breaker_for("https://oscar/x")
+        for _ in range(breaker.threshold):
+            breaker.record_failure()
+        session = MagicMock()
+        with patch.object(oscar_http.pool, "get", return_value=session):
+            resp = oscar_http.request("GET", "https://oscar/oscar/ws/services/demographics/1", "s1")
+        assert resp.status_code == 503
+        assert resp.json()["reason"] == "circuit open"
+        session.request.assert_not_called()
+
+    def test_admission_timeout_releases_half_open_trial(self):
+        breaker = oscar_http.breaker_for("https://oscar/x")
+        breaker.state = oscar_http.resilience.HALF_OPEN
+        with patch("oscar_http._attempt", side_effect=oscar_http.admission.AdmissionTimeout()):
+            resp = oscar_http.request("POST", "https://oscar/oscar/ws/services/schedule/add", "s1", json={})
+        assert resp.status_code == 503
+        assert breaker.allow()
@@ -0,0 +1,88 @@
+"""Tests for oscar_logging.py"""
+
+import json
+import logging
+import pytest
+from unittest.mock import patch, MagicMock
+import oscar_logging
+
+
+@pytest.fixture
+def mock_log():
+    with patch.object(oscar_logging.log, "log") as mock:
+        yield mock
+
+
+def _fields(mock_log):
+    return mock_log.call_args[1]["extra"]["fields"]
+
+
+def _response(ok=True, status_code=200, content=b""):
+    resp = MagicMock()
+    resp.ok = ok
+    resp.status_code = status_code
+    resp.content = content
+    return resp
+
+
+class TestRedaction:
+    def test_redact_phi_keys(self):
+        result = oscar_logging.redact({"demographicNo": 5, "firstName": "Jane", "contacts": [{"phone": "555"}]})
+        assert result == {"demographicNo": 5, "firstName": "[REDACTED]", "contacts": [{"phone": "[REDACTED]"}]}
+
+    def test_redact_text_json_fields_and_digits(self):
+        text = '{"lastName":"Doe","hin":"9876543210","id":12,"notes":"call 604-555-1234"'
+        redacted = oscar_logging.redact_text(text)
+        assert "Doe" not in redacted
+        assert "9876543210" not in redacted
+        assert "604-555-1234" not in redacted
+        assert '"id":12' in redacted
+
+    def test_redact_text_value_cut_by_truncation(self):
+        assert oscar_logging.redact_text('{"id":12,"firstName":"Jonath...') == '{"id":12,"firstName":"[REDACTED]"'
+
+    def test_redact_patient_name_and_alternative_phone(self):
+        redacted = oscar_logging.redact_text('{"patientName":"DOE, JANE","alternativePhone":"555-0100"}')
+        assert "JANE" not in redacted and "0100" not in redacted
+
+
+class TestLogResponse:
+    def test_metadata_only(self, mock_log):
+        with patch.object(oscar_logging, "BODY_CHARS", 0):
+            oscar_logging.log_response("oscar_request", _response(content=b'{"a": 1}'), "GET", "/ws/x")
+        fields = _fields(mock_log)
+        assert fields == {"method": "GET", "endpoint": "/ws/x", "status": 200, "bytes": 8}
+
+    def test_body_truncated(self, mock_log):
+        with patch.object(oscar_logging, "BODY_CHARS", 5):
+            oscar_logging.log_response("oscar_request", _response(content=b"abcdefghij"))
+        assert _fields(mock_log)["body"] == "abcde..."
+
+    def test_sampling_skips_success_but_not_errors(self, mock_log):
+        with patch.object(oscar_logging, "SAMPLE_RATE", 0.0):
+            oscar_logging.log_response("oscar_request", _response())
+            mock_log.assert_not_called()
+            oscar_logging.log_response("oscar_request", _response(ok=False, status_code=500))
+        assert mock_log.call_args[0][0] == logging.WARNING
+
+
+class TestLogResult:
+    def test_preview_bounded_and_redacted(self, mock_log):
+        result = [{"firstName": f"Name{i}", "id": i} for i in range(50)]
+        with patch.object(oscar_logging, "BODY_CHARS", 1000):
+            oscar_logging.log_result("search_patients", result)
+        fields = _fields(mock_log)
+        assert fields["items"] == 50
+        body = json.loads(fields["body"])
+        assert len(body) == 4 and body[-1] == "..."
+        assert "Name0" not in fields["body"]
+
+    def test_error_result_is_warning(self, mock_log):
+        oscar_logging.log_result("get_patient_details", {"error": 404, "text": "Not found"})
+        assert mock_log.call_args[0][0] == logging.WARNING
+
+
+class TestEvent:
+    def test_event_redacts_phi_fields(self, mock_log):
+        oscar_logging.event("oscar_client.search_patients", query="Doe,John", provider_no="1")
+        assert _fields(mock_log) == {"query": "[REDACTED]", "provider_no": "1"}
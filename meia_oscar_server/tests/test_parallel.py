@@ -0,0 +1,36 @@
+"""Tests for parallel.py"""
+
+import threading
+from parallel import gather, map_keyed
+
+
+class TestGather:
+    def test_runs_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def call(i):
+            barrier.wait()
+            return i
+
+        assert gather({k: (lambda k=k: call(k)) for k in "abc"}) == {"a": "a", "b": "b", "c": "c"}
+
+    def test_exceptions_become_errors(self):
+        def boom():
+            raise ValueError("bad")
+
+        assert gather({"ok": lambda: 1, "bad": boom}) == {"ok": 1, "bad": {"error": "bad"}}
+
+    def test_empty(self):
+        assert gather({}) == {}
+
+
+class TestMapKeyed:
+    def test_dedupes_and_keys_by_string(self):
+        calls = []
+
+        def fn(k):
+            calls.append(k)
+            return k * 2
+
+        assert map_keyed(fn, [1, 2, 1]) == {"1": 2, "2": 4}
+        assert sorted(calls) == [1, 2]
@@ -0,0 +1,101 @@
+"""Tests for patient_index.py"""
+
+from datetime import datetime
+from unittest.mock import patch
+import availability
+import patient_index
+from patient_index import PatientIndex
+
+
+def _demo(no, first, last, dob="1990-01-15", phone=""):
+    return {"demographicNo": no, "firstName": first, "lastName": last, "dob": dob, "phone": phone}
+
+
+def _index(*records):
+    index = PatientIndex()
+    for record in records:
+        index.upsert(record)
+    index.ready = True
+    return index
+
+
+class TestKeys:
+    def test_normalize_strips_accents_and_punctuation(self):
+        assert patient_index.normalize("José O'Neil-Smith") == ["jose", "oneil", "smith"]
+
+    def test_soundex(self):
+        assert patient_index.soundex("robert") == patient_index.soundex("rupert") == "r163"
+        assert patient_index.soundex("ashcraft") == "a261"
+        assert patient_index.soundex("lee") == "l000"
+
+    def test_dob_formats(self):
+        local_midnight = datetime(1990, 1, 15, tzinfo=availability.TZ).timestamp() * 1000
+        assert patient_index.dob_of({"dob": local_midnight}) == "1990-01-15"
+        assert patient_index.dob_of({"dateOfBirth": "1990-01-15T00:00:00"}) == "1990-01-15"
+        assert patient_index.dob_of({"dobYear": "1990", "dobMonth": "1", "dobDay": "5"}) == "1990-01-05"
+        assert patient_index.dob_of({}) is None
+
+    def test_name_matches(self):
+        assert patient_index.name_matches("Jon Smyth", "John", "Smith")
+        assert patient_index.name_matches("Jose Oneil", "José", "O'Neil-Smith")
+        assert not patient_index.name_matches("Maria Garcia", "John", "Smith")
+        assert not patient_index.name_matches("John Smith", None, None)
+
+    def test_name_matches_each_field_separately(self):
+        assert not patient_index.name_matches("Jane Smith", "John", "Smith")  # same Soundex, different person
+        assert not patient_index.name_matches("Smith John", "John", "Smith")
+        assert not patient_index.name_matches("John", "John", "Smith")
+
+    def test_phone_digits(self):
+        assert patient_index.phone_digits("+1 (604) 555-1234") == "6045551234"
+
+
+class TestSearch:
+    def test_exact_and_misspelled_names(self):
+        index = _index(_demo(1, "John", "Smith"), _demo(2, "Jane", "Doe"))
+        assert [p["demographicNo"] for p in index.search("John Smith")] == [1]
+        assert [p["demographicNo"] for p in index.search("Jon Smyth")] == [1]
+        assert [p["demographicNo"] for p in index.search("smith")] == [1]
+
+    def test_unrelated_name_not_matched(self):
+        assert _index(_demo(1, "John", "Smith")).search("Maria Garcia") == []
+
+    def test_by_phone(self):
+        index = _index(_demo(1, "John", "Smith", phone="604-555-1234"), _demo(2, "Mary", "Smith", phone="(604) 555-1234"),
+                       _demo(3, "Jane", "Doe", phone="604-555-9999"))
+        assert [p["demographicNo"] for p in index.by_phone("+16045551234")] == [1, 2]
+        index.upsert(_demo(2, "Mary", "Smith", phone="778-555-0000"))
+        assert [p["demographicNo"] for p in index.by_phone("6045551234")] == [1]
+        assert index.by_phone("") == []
+
+    def test_upsert_replaces_entry(self):
+        index = _index(_demo(1, "John", "Smith"))
+        index.upsert(_demo(1, "John", "Smithers", dob="1980-02-02"))
+        assert index.search("John Smith")[0]["dob"] == "1980-02-02"
+        assert index.get(1)["lastName"] == "Smithers"
+        assert index.stats()["patients"] == 1
+
+
+class TestRefresh:
+    def test_incremental_continues_from_offset(self):
+        index = PatientIndex()
+        pages = [{"content": [_demo(i, "P", f"Name{i}") for i in range(3)], "total": 3},
+                 {"content": [_demo(3, "New", "Patient")], "total": 4}]
+        with patch("patient_index.oscar_client.list_demographics", side_effect=pages) as fetch, \
+             patch.object(patient_index, "PAGE", 500):
+            assert index.refresh(full=True) == 3
+            assert index.refresh() == 1
+        assert [c.args[0] for c in fetch.call_args_list] == [0, 3]
+        assert index.ready and index.stats()["patients"] == 4
+
+    def test_full_refresh_drops_removed_patients(self):
+        index = _index(_demo(1, "John", "Smith"), _demo(2, "Jane", "Doe"))
+        with patch("patient_index.oscar_client.list_demographics", return_value={"content": [_demo(2, "Jane", "Doe")], "total": 1}):
+            index.refresh(full=True)
+        assert index.get(1) is None and index.get(2)
+
+    def test_failure_leaves_index_unready(self):
+        index = PatientIndex()
+        with patch("patient_index.oscar_client.list_demographics", return_value=None):
+            assert index.refresh() is None
+        assert not index.ready
@@ -0,0 +1,57 @@
+"""Tests for projection.py"""
+
+import pytest
+from datetime import datetime
+import availability
+from projection import project, compact
+
+
+def _millis(*args) -> int:
+    return int(datetime(*args, tzinfo=availability.TZ).timestamp() * 1000)
+
+
+class TestCompact:
+    def test_drops_empty_values(self):
+        assert compact({"a": None, "b": "", "c": [], "d": {}, "e": 0, "f": {"g": None}}) == {"e": 0}
+
+    def test_epoch_millis_to_iso(self):
+        # clinic-local midnight collapses to a date; other times keep the clinic's UTC offset
+        result = compact({"dateOfBirth": _millis(1990, 1, 15), "lastUpdateDate": _millis(2025, 1, 15, 14, 30),
+                          "demographicNo": 12345678901})
+        assert result["dateOfBirth"] == "1990-01-15" and result["demographicNo"] == 12345678901
+        assert result["lastUpdateDate"].startswith("2025-01-15T14:30")
+        assert datetime.fromisoformat(result["lastUpdateDate"]).timestamp() * 1000 == _millis(2025, 1, 15, 14, 30)
+
+    def test_pre_1970_dates(self):
+        assert compact({"dob": _millis(1960, 1, 1)}) == {"dob": "1960-01-01"}
+
+
+class TestProject:
+    def test_keeps_documented_fields(self):
+        result = project("get_patient_details", {"demographicNo": 1, "firstName": "Jane", "lastUpdateUser": "x", "hin": None})
+        assert result == {"demographicNo": 1, "firstName": "Jane"}
+
+    def test_caps_lists_with_marker(self):
+        history = [{"id": i, "status": "t", "creator": "x"} for i in range(25)]
+        result = project("get_patient_appointment_history", history)
+        assert len(result) == 21
+        assert result[0] == {"id": 0, "status": "t"}
+        assert result[-1]["more_available"] == 5
+
+    def test_content_wrapper(self):
+        result = project("get_my_inbox", {"total": 2, "content": [{"id": 1, "segmentID": "x"}, {"id": 2}]})
+        assert result == {"total": 2, "content": [{"id": 1}, {"id": 2}]}
+
+    def test_unknown_shape_kept(self):
+        assert project("get_patient_medications", [{"foo": 1, "bar": None}]) == [{"foo": 1}]
+
+    def test_full_detail_passthrough(self):
+        raw = [{"id": i, "creator": None} for i in range(25)]
+        assert project("get_patient_appointment_history", raw, full=True) is raw
+
+    def test_unregistered_tool_passthrough(self):
+        raw = {"a": None}
+        assert project("search_patients", raw) is raw
+
+    def test_error_passthrough(self):
+        assert project("get_patient_details", {"error": 500, "text": "x"}) == {"error": 500, "text": "x"}
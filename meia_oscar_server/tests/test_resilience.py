@@ -0,0 +1,93 @@
+"""Tests for resilience.py"""
+
+import pytest
+from unittest.mock import patch
+import metrics
+import requests
+import resilience
+from resilience import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+
+
+class TestTimeouts:
+    def test_endpoint_override(self):
+        assert resilience.timeout_for("/ws/services/schedule/1/day/2025-01-01") == (resilience.CONNECT_TIMEOUT, 8)
+
+    def test_schedule_override_is_for_reads_only(self):
+        assert resilience.timeout_for("/ws/services/schedule/add", "POST") == (resilience.CONNECT_TIMEOUT, resilience.READ_TIMEOUT)
+
+    def test_default(self):
+        assert resilience.timeout_for("/ws/services/rx/drugs/current/1") == (resilience.CONNECT_TIMEOUT, resilience.READ_TIMEOUT)
+
+    def test_never_sent(self):
+        from urllib3.exceptions import MaxRetryError, NewConnectionError
+        refused = requests.ConnectionError(MaxRetryError(None, "/", NewConnectionError(None, "refused")))
+        assert resilience.never_sent(requests.ConnectTimeout())
+        assert resilience.never_sent(refused)
+        assert not resilience.never_sent(requests.ReadTimeout())
+        assert not resilience.never_sent(requests.ConnectionError("Connection aborted"))
+
+    def test_was_sent(self):
+        unsent = resilience.unavailable_response("u", "circuit open")
+        assert not resilience.was_sent({"error": 503, "text": unsent.text})
+        assert resilience.was_sent({"error": 503, "text": resilience.unavailable_response("u", "ReadTimeout", sent=True).text})
+        assert resilience.was_sent({"error": 500, "text": "oops"})
+        assert not resilience.response_sent(unsent)
+        assert resilience.response_sent(resilience.unavailable_response("u", "ReadTimeout", sent=True))
+
+    def test_backoff_is_bounded(self):
+        assert all(0 <= resilience.backoff(2) <= resilience.BACKOFF_BASE * 4 for _ in range(20))
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        b = CircuitBreaker("oscar", threshold=3, reset_timeout=30)
+        for _ in range(3):
+            assert b.allow()
+            b.record_failure()
+        assert b.state == OPEN
+        assert not b.allow()
+        assert metrics.get("oscar.breaker.closed_to_open") == 1
+        assert metrics.get("oscar.breaker.rejected") == 1
+
+    def test_success_resets_failures(self):
+        b = CircuitBreaker("oscar", threshold=2)
+        b.record_failure()
+        b.record_success()
+        b.record_failure()
+        assert b.state == CLOSED
+
+    def test_half_open_trial(self):
+        b = CircuitBreaker("oscar", threshold=1, reset_timeout=30)
+        with patch("resilience.time.monotonic", return_value=0):
+            b.record_failure()
+        with patch("resilience.time.monotonic", return_value=31):
+            assert b.allow()
+            assert b.state == HALF_OPEN
+            assert not b.allow()  # only one trial request
+            b.record_success()
+        assert b.state == CLOSED
+        assert metrics.get("oscar.breaker.half_open_to_closed") == 1
+
+    def test_half_open_failure_reopens(self):
+        b = CircuitBreaker("oscar", threshold=1, reset_timeout=30)
+        with patch("resilience.time.monotonic", return_value=0):
+            b.record_failure()
+        with patch("resilience.time.monotonic", return_value=31):
+            assert b.allow()
+            b.record_failure()
+        assert b.state == OPEN
+
+    def test_abandoned_trial_frees_half_open(self):
+        b = CircuitBreaker("oscar", threshold=1, reset_timeout=30)
+        with patch("resilience.time.monotonic", return_value=0):
+            b.record_failure()
+        with patch("resilience.time.monotonic", return_value=31):
+            assert b.allow()
+            b.record_abandoned()
+            assert b.allow()
+        assert b.state == HALF_OPEN
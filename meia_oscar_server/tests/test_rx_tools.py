@@ -44,3 +44,12 @@ class TestGetDrugHistory:
             get_drug_history(100, 1, mock_tool_context)
             
             mock_req.assert_called_once_with("GET", "/ws/services/rx/history", "test-session-123", params={"id": 100, "demographicNo": 1})
+
+
+class TestGetPatientMedicationsBatch:
+    def test_get_patient_medications_batch(self, mock_tool_context):
+        with patch("rx_tools.get_patient_medications", side_effect=lambda pid, ctx, status: [{"id": pid, "status": status}]):
+            from rx_tools import get_patient_medications_batch
+            result = get_patient_medications_batch([5, 6], mock_tool_context, status="all")
+
+            assert result == {"5": [{"id": 5, "status": "all"}], "6": [{"id": 6, "status": "all"}]}
@@ -0,0 +1,71 @@
+"""Tests for schedule_cache.py"""
+
+import pytest
+from unittest.mock import patch
+import schedule_cache
+
+
+@pytest.fixture(autouse=True)
+def clear():
+    schedule_cache.clear()
+    yield
+    schedule_cache.clear()
+
+
+DAY = [{"id": 1, "startTime": "09:00:00", "status": "t"}, {"id": 2, "startTime": "10:00:00", "status": "t"}]
+
+
+class TestScheduleCache:
+    def test_put_get_returns_copies(self):
+        schedule_cache.put("101", "2099-01-05", DAY)
+        day = schedule_cache.get("101", "2099-01-05")
+        day[0]["status"] = "mutated"
+        assert schedule_cache.get("101", "2099-01-05") == DAY
+        assert schedule_cache.get("102", "2099-01-05") is None
+
+    def test_add_patches_provider_and_all_provider_days(self):
+        schedule_cache.put("101", "2099-01-05", DAY)
+        schedule_cache.put(None, "2099-01-05", DAY)
+        schedule_cache.add("101", "2099-01-05", {"id": 3, "startTime": "11:00:00"})
+        assert [a["id"] for a in schedule_cache.get("101", "2099-01-05")] == [1, 2, 3]
+        assert [a["id"] for a in schedule_cache.get(None, "2099-01-05")] == [1, 2, 3]
+
+    def test_add_without_details_invalidates(self):
+        schedule_cache.put("101", "2099-01-05", DAY)
+        schedule_cache.add("101", "2099-01-05", {"success": True})
+        assert schedule_cache.get("101", "2099-01-05") is None
+
+    def test_update_and_remove_by_id(self):
+        schedule_cache.put("101", "2099-01-05", DAY)
+        schedule_cache.update(1, status="H")
+        schedule_cache.remove(2)
+        assert schedule_cache.get("101", "2099-01-05") == [{"id": 1, "startTime": "09:00:00", "status": "H"}]
+
+    def test_drop_forgets_days_listing_the_appointment(self):
+        schedule_cache.put("101", "2099-01-05", DAY)
+        schedule_cache.put("102", "2099-01-05", [{"id": 9, "startTime": "09:00:00"}])
+        read_version = schedule_cache.version(None, "2099-01-06")
+        schedule_cache.drop(1)
+        assert schedule_cache.get("101", "2099-01-05") is None
+        assert schedule_cache.get("102", "2099-01-05") is not None
+        schedule_cache.put(None, "2099-01-06", DAY, read_version)
+        assert schedule_cache.get(None, "2099-01-06") is None
+
+    def test_read_racing_a_write_is_not_stored(self):
+        read_version = schedule_cache.version("101", "2099-01-05")
+        schedule_cache.invalidate("101", "2099-01-05")  # our write lands while the read is in flight
+        schedule_cache.put("101", "2099-01-05", DAY, read_version)
+        assert schedule_cache.get("101", "2099-01-05") is None
+
+    def test_status_change_voids_read_of_uncached_day(self):
+        read_version = schedule_cache.version(None, "2099-01-05")
+        schedule_cache.update(1, status="N")  # lands while the all-provider read is in flight
+        schedule_cache.put(None, "2099-01-05", DAY, read_version)
+        assert schedule_cache.get(None, "2099-01-05") is None
+
+    def test_expired_days_hold_no_appointment_state(self):
+        with patch("schedule_cache._days.default_ttl", 0):
+            schedule_cache.put("101", "2099-01-05", DAY)
+        schedule_cache.update(1, status="H")
+        schedule_cache.remove(2)
+        assert schedule_cache._days.items() == []
@@ -83,3 +83,10 @@ class TestChat:
         with patch("server.sessions", {"test": {}}):
             response = client.post("/chat", json={"session_id": "test", "message": "hi"})
             assert response.status_code == 400
+
+
+class TestCallIncoming:
+    def test_passes_caller_number_to_stream(self, client):
+        response = client.post("/call/incoming", data={"From": "+16045551234", "CallSid": "CA1"})
+        assert response.status_code == 200
+        assert '<Parameter name="from" value="+16045551234" />' in response.text
@@ -0,0 +1,35 @@
+"""Tests for signing.py"""
+
+import requests
+from signing import SignerCache
+
+
+class TestSignerCache:
+    def test_reused_for_same_credentials(self):
+        cache = SignerCache()
+        first = cache.get("s1", "ck", "cs", "t", "ts")
+        assert cache.get("s1", "ck", "cs", "t", "ts") is first
+        assert cache.stats() == {"signers": 1, "built": 1}
+
+    def test_rebuilt_when_token_changes(self):
+        cache = SignerCache()
+        first = cache.get("s1", "ck", "cs", "t", "ts")
+        assert cache.get("s1", "ck", "cs", "t2", "ts2") is not first
+        assert cache.stats()["built"] == 2
+
+    def test_separate_per_scope(self):
+        cache = SignerCache()
+        assert cache.get("s1", "ck", "cs", "t", "ts") is not cache.get("s2", "ck", "cs", "t", "ts")
+
+    def test_drop(self):
+        cache = SignerCache()
+        cache.get("s1", "ck", "cs", "t", "ts")
+        cache.drop("s1")
+        assert cache.stats()["signers"] == 0
+
+    def test_each_request_gets_fresh_nonce(self):
+        signer = SignerCache().get("s1", "ck", "cs", "t", "ts")
+        headers = [signer(requests.Request("GET", "https://oscar/ws/x").prepare()).headers["Authorization"]
+                   for _ in range(2)]
+        assert headers[0] != headers[1]
+        assert b'oauth_signature_method="HMAC-SHA1"' in headers[0]
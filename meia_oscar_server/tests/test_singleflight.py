@@ -0,0 +1,44 @@
+"""Tests for singleflight.py"""
+
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        sf = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(2)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(sf.do, "key", slow) for _ in range(5)]
+            while sf.stats()["shared"] < 4:
+                pass
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert sf.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+    def test_sequential_calls_run_again(self):
+        sf = SingleFlight()
+        assert sf.do("key", lambda: 1) == 1
+        assert sf.do("key", lambda: 2) == 2
+
+    def test_error_propagates_and_clears(self):
+        sf = SingleFlight()
+
+        def boom():
+            raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            sf.do("key", boom)
+        assert sf.do("key", lambda: "ok") == "ok"
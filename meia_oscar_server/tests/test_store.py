@@ -10,6 +10,7 @@ def reset_store():
     """Reset store initialization state before each test"""
     store._initialized = False
     store.table = None
+    store.invalidate_clinic_config()
 
 
 @pytest.fixture
@@ -110,3 +111,31 @@ class TestClinicConfig:
     def test_save_clinic_config(self, mock_resources):
         store.save_clinic_config({"phone_number": "+1555"})
         mock_resources["table"].update_item.assert_called_once()
+
+    def test_get_clinic_config_cached(self, mock_resources):
+        mock_resources["table"].get_item.return_value = {"Item": {"config": {"instructions": "hi"}}}
+        store.get_clinic_config()
+        store.get_clinic_config()["instructions"] = "mutated"
+        assert store.get_clinic_config() == {"instructions": "hi"}
+        assert mock_resources["table"].get_item.call_count == 1
+
+    def test_clinic_config_cache_expires(self, mock_resources):
+        mock_resources["table"].get_item.return_value = {"Item": {"config": {"instructions": "hi"}}}
+        with patch.object(store, "CLINIC_CONFIG_TTL", 0):
+            store.get_clinic_config()
+            store.get_clinic_config()
+        assert mock_resources["table"].get_item.call_count == 2
+
+    def test_save_clinic_config_refreshes_cache(self, mock_resources):
+        mock_resources["table"].get_item.return_value = {"Item": {"config": {"instructions": "old"}}}
+        store.get_clinic_config()
+        store.save_clinic_config({"instructions": "new"})
+        assert store.get_clinic_config() == {"instructions": "new"}
+        assert mock_resources["table"].get_item.call_count == 1
+
+    def test_invalidate_clinic_config(self, mock_resources):
+        mock_resources["table"].get_item.return_value = {"Item": {"config": {"instructions": "hi"}}}
+        store.get_clinic_config()
+        store.invalidate_clinic_config()
+        store.get_clinic_config()
+        assert mock_resources["table"].get_item.call_count == 2
@@ -0,0 +1,80 @@
+"""Tests for tickler_reaper.py"""
+
+import time
+import pytest
+from unittest.mock import patch
+import metrics
+import tickler_reaper
+from tickler_reaper import TempTicklerLog
+
+
+@pytest.fixture(autouse=True)
+def log(tmp_path, monkeypatch):
+    log = TempTicklerLog(str(tmp_path / "temp_ticklers.jsonl"))
+    monkeypatch.setattr(tickler_reaper, "temp_ticklers", log)
+    metrics.reset()
+    return log
+
+
+def _track(log, marker, minutes_ago, patient_id=1, provider_no="999"):
+    with patch("tickler_reaper.time.time", return_value=time.time() - minutes_ago * 60):
+        log.track(marker, patient_id, provider_no)
+
+
+class TestTempTicklerLog:
+    def test_survives_restart(self, log):
+        _track(log, "_temp_0000000a_", 60)
+        _track(log, "_temp_0000000b_", 60)
+        log.resolve("_temp_0000000a_")
+        assert [r["marker"] for r in TempTicklerLog(log.path).due(0)] == ["_temp_0000000b_"]
+
+    def test_journal_emptied_when_nothing_outstanding(self, log):
+        _track(log, "_temp_0000000a_", 60)
+        log.resolve("_temp_0000000a_")
+        assert open(log.path).read() == ""
+        assert len(log) == 0
+
+
+class TestReaper:
+    def test_completes_only_old_active_temp_ticklers(self, log):
+        _track(log, "_temp_0000000a_", 60)
+        _track(log, "_temp_0000000b_", 60)  # already completed by save_note's background call
+        _track(log, "_temp_0000000c_", 1)  # too recent
+        page = {"content": [{"id": 1, "message": "_temp_0000000a_"}, {"id": 3, "message": "Follow up"}], "total": 2}
+        with patch("tickler_reaper.oscar_client.search_ticklers", return_value=page) as search, \
+             patch("tickler_reaper.oscar_client.complete_ticklers", return_value=True) as complete:
+            assert tickler_reaper.reap_once(max_age=600) == 1
+        complete.assert_called_once_with([1])
+        query = search.call_args.args[0]
+        assert (query["demographicNo"], query["assignee"], query["status"]) == ("1", "999", "A")
+        assert [r["marker"] for r in log.due(0)] == ["_temp_0000000c_"]
+        assert metrics.get("tickler_reaper.reclaimed") == 1
+
+    def test_one_search_per_patient_provider_day(self, log):
+        for i in range(3):
+            _track(log, f"_temp_{i:08x}_", 60)
+        _track(log, "_temp_000000ff_", 60, patient_id=2)
+        with patch("tickler_reaper.oscar_client.search_ticklers", return_value={"content": [], "total": 0}) as search:
+            tickler_reaper.find_orphans(max_age=600)
+        assert sorted(c.args[0]["demographicNo"] for c in search.call_args_list) == ["1", "2"]
+
+    def test_pages_and_batches(self, log):
+        for i in range(120):
+            _track(log, f"_temp_{i:08x}_", 60)
+        everything = [{"id": i, "message": f"_temp_{i:08x}_"} for i in range(120)]
+        pages = [{"content": everything[start:start + 50], "total": 120} for start in range(0, 120, 50)]
+        with patch("tickler_reaper.oscar_client.search_ticklers", side_effect=pages) as search, \
+             patch("tickler_reaper.oscar_client.complete_ticklers", return_value=True) as complete:
+            assert tickler_reaper.reap_once(max_age=600) == 120
+        assert [c.args[1] for c in search.call_args_list] == [0, 50, 100]
+        assert [len(c.args[0]) for c in complete.call_args_list] == [50, 50, 20]
+        assert len(log) == 0
+
+    def test_search_failure_keeps_records(self, log):
+        _track(log, "_temp_0000000a_", 60)
+        with patch("tickler_reaper.oscar_client.search_ticklers", return_value=None), \
+             patch("tickler_reaper.oscar_client.complete_ticklers") as complete:
+            assert tickler_reaper.reap_once() == 0
+        complete.assert_not_called()
+        assert len(log) == 1
+        assert metrics.get("tickler_reaper.search_failed") == 1
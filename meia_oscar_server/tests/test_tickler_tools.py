@@ -1,6 +1,7 @@
 """Tests for tickler_tools.py"""
 
 import pytest
+import requests
 from unittest.mock import MagicMock
 import sys
 
@@ -64,6 +65,74 @@ class TestSearchTicklers:
         assert json_data["demographicNo"] == "1"
 
 
+class TestTicklerPagination:
+    def _pages(self, mock_oscar_response, total):
+        def fake(method, endpoint, session_id, params, json):
+            start, limit = params["startIndex"], params["limit"]
+            content = [{"id": i, "priority": "High" if i % 2 else "Normal", "taskAssignedTo": "999"}
+                       for i in range(start, min(start + limit, total))]
+            return mock_oscar_response({"content": content, "total": total})
+        return fake
+
+    def test_search_returns_next_cursor(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.side_effect = self._pages(mock_oscar_response, 120)
+        setup_tools_module.handle_response.side_effect = lambda resp, name: resp.json()
+        import tickler_tools
+
+        first = tickler_tools.search_ticklers(mock_tool_context, limit=50)
+        assert first["next_cursor"] == "50"
+        last = tickler_tools.search_ticklers(mock_tool_context, limit=50, cursor="100")
+        assert len(last["content"]) == 20
+        assert last["next_cursor"] is None
+        assert setup_tools_module.oscar_request.call_args[1]["params"] == {"startIndex": 100, "limit": 50}
+
+    def test_iter_ticklers_streams_all_pages(self, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.side_effect = self._pages(mock_oscar_response, 120)
+        import tickler_tools
+
+        ticklers = tickler_tools.iter_ticklers("test-session-123", {"status": "A"}, page_size=50)
+        assert next(ticklers)["id"] == 0
+        assert setup_tools_module.oscar_request.call_count == 1
+        assert len(list(ticklers)) == 119
+        assert setup_tools_module.oscar_request.call_count == 3
+
+    def test_summary(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.oscar_request.side_effect = self._pages(mock_oscar_response, 150)
+        import tickler_tools
+
+        result = tickler_tools.search_ticklers(mock_tool_context, summary=True)
+        assert result == {"total": 150, "by_priority": {"Normal": 75, "High": 75}, "by_assignee": {"999": 150}}
+
+    def test_summary_error(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        resp = mock_oscar_response(ok=False, status_code=500, text="boom")
+        resp.raise_for_status.side_effect = requests.HTTPError(response=resp)
+        setup_tools_module.oscar_request.return_value = resp
+        import tickler_tools
+
+        assert tickler_tools.search_ticklers(mock_tool_context, summary=True) == {"error": 500, "text": "boom"}
+
+    def test_my_ticklers_summary_filters_by_current_provider(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        setup_tools_module.current_provider_no.return_value = "999"
+        setup_tools_module.oscar_request.side_effect = self._pages(mock_oscar_response, 3)
+        import tickler_tools
+
+        assert tickler_tools.get_my_ticklers(mock_tool_context, summary=True)["total"] == 3
+        assert setup_tools_module.oscar_request.call_args[1]["json"] == {"status": "A", "assignee": "999"}
+
+    def test_my_ticklers_summary_without_provider(self, mock_tool_context, setup_tools_module):
+        setup_tools_module.current_provider_no.return_value = None
+        import tickler_tools
+
+        assert tickler_tools.get_my_ticklers(mock_tool_context, summary=True) == {"error": "Failed to get current provider"}
+        setup_tools_module.oscar_request.assert_not_called()
+
+    def test_malformed_cursor(self, mock_tool_context, setup_tools_module):
+        import tickler_tools
+
+        assert "Invalid cursor" in tickler_tools.search_ticklers(mock_tool_context, cursor="abc")["error"]
+        setup_tools_module.oscar_request.assert_not_called()
+
+
 class TestCreateTickler:
     def test_create_tickler(self, mock_tool_context, mock_oscar_response, setup_tools_module):
         setup_tools_module.oscar_request.return_value = mock_oscar_response({"success": True})
@@ -82,6 +151,34 @@ class TestCreateTickler:
         assert json_data["status"] == "A"
 
 
+class TestCreateTicklersBulk:
+    def test_per_row_report(self, mock_tool_context, mock_oscar_response, setup_tools_module):
+        def fake(method, endpoint, session_id, json):
+            if json["demographicNo"] == 2:
+                return mock_oscar_response(ok=False, status_code=500, text="boom")
+            return mock_oscar_response({"success": True})
+        setup_tools_module.oscar_request.side_effect = fake
+        setup_tools_module.handle_response.side_effect = \
+            lambda resp, name: resp.json() if resp.ok else {"error": resp.status_code, "text": resp.text}
+        import tickler_tools
+
+        rows = [{"patient_id": pid, "task_assigned_to": "999", "service_date": "2025-10-01", "message": "Flu shot"}
+                for pid in (1, 2, 3)] + [{"patient_id": 4, "message": "no assignee"}]
+        result = tickler_tools.create_ticklers_bulk(rows, mock_tool_context)
+
+        assert result["created"] == 2 and result["failed"] == 2
+        assert [r["success"] for r in result["results"]] == [True, False, True, False]
+        assert result["results"][1]["error"] == {"error": 500, "text": "boom"}
+        assert "task_assigned_to" in result["results"][3]["error"]["error"]
+        assert setup_tools_module.oscar_request.call_count == 3
+
+    def test_too_many_rows(self, mock_tool_context, setup_tools_module):
+        import tickler_tools
+        rows = [{}] * (tickler_tools.MAX_BULK + 1)
+        assert "error" in tickler_tools.create_ticklers_bulk(rows, mock_tool_context)
+        setup_tools_module.oscar_request.assert_not_called()
+
+
 class TestCompleteTicklers:
     def test_complete_ticklers(self, mock_tool_context, mock_oscar_response, setup_tools_module):
         setup_tools_module.oscar_request.return_value = mock_oscar_response({"success": True})
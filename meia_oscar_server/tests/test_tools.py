@@ -0,0 +1,83 @@
+"""Tests for tools.py request plumbing"""
+
+import inspect
+import sys
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+
+
+@pytest.fixture
+def tools_module(mock_sessions):
+    """Load the real tools module (other test files replace it with a mock)"""
+    sys.modules.pop("tools", None)
+    import tools
+    tools.init("http://oscar", "key", "secret", mock_sessions)
+    yield tools
+    sys.modules.pop("tools", None)
+
+
+class TestOscarRequest:
+    def test_not_authenticated(self, tools_module):
+        with pytest.raises(ValueError):
+            tools_module.oscar_request("GET", "/ws/x", "unknown")
+
+    def test_sends_with_session_cookie(self, tools_module, mock_oscar_response):
+        with patch("tools.oscar_http.request", return_value=mock_oscar_response({})) as mock_req:
+            tools_module.oscar_request("GET", "/ws/x", "test-session-123", params={"a": 1})
+        args, kwargs = mock_req.call_args
+        assert args == ("GET", "http://oscar/ws/x", "test-session-123")
+        assert kwargs["cookies"] == {"JSESSIONID": "test_jsession"}
+        assert kwargs["params"] == {"a": 1}
+
+    def test_signer_reused_across_requests(self, tools_module, mock_oscar_response):
+        with patch("tools.oscar_http.request", return_value=mock_oscar_response({})) as mock_req:
+            tools_module.oscar_request("GET", "/ws/x", "test-session-123")
+            tools_module.oscar_request("GET", "/ws/y", "test-session-123")
+        first, second = (c.kwargs["auth"] for c in mock_req.call_args_list)
+        assert first is second
+
+
+class TestCurrentProvider:
+    def test_uses_provider_recorded_at_login(self, tools_module):
+        with patch("tools.oscar_http.request") as mock_req:
+            assert tools_module.current_provider_no("test-session-123") == "999"
+        mock_req.assert_not_called()
+
+    def test_falls_back_to_provider_me(self, tools_module, mock_sessions, mock_oscar_response):
+        del mock_sessions["test-session-123"]["provider_id"]
+        with patch("tools.oscar_http.request", return_value=mock_oscar_response({"providerNo": "42"})):
+            assert tools_module.current_provider_no("test-session-123") == "42"
+        assert mock_sessions["test-session-123"]["provider_id"] == "42"
+
+
+class TestAsync:
+    @pytest.mark.asyncio
+    async def test_oscar_request_async_runs_off_loop(self, tools_module, mock_oscar_response):
+        threads = []
+
+        def fake_request(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return mock_oscar_response({"ok": True})
+
+        with patch("tools.oscar_http.request", side_effect=fake_request):
+            resp = await tools_module.oscar_request_async("GET", "/ws/x", "test-session-123")
+        assert resp.json() == {"ok": True}
+        assert threads[0] is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_as_async_tool_preserves_signature(self, tools_module):
+        def my_tool(patient_id: int, tool_context, limit: int = 5) -> dict:
+            """Docstring"""
+            return {"patient_id": patient_id, "limit": limit}
+
+        wrapped = tools_module.as_async_tool(my_tool)
+        assert inspect.iscoroutinefunction(wrapped)
+        assert wrapped.__name__ == "my_tool"
+        assert wrapped.__doc__ == "Docstring"
+        assert list(inspect.signature(wrapped).parameters) == ["patient_id", "tool_context", "limit"]
+        assert await wrapped(1, MagicMock(), limit=2) == {"patient_id": 1, "limit": 2}
+
+    def test_agent_tools_are_async(self, tools_module):
+        assert len(tools_module.TOOLS) == len(tools_module.SYNC_TOOLS)
+        assert all(inspect.iscoroutinefunction(t) for t in tools_module.TOOLS)
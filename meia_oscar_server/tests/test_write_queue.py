@@ -0,0 +1,159 @@
+"""Tests for write_queue.py"""
+
+import json
+import os
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+import write_queue
+from write_queue import WriteQueue
+
+
+@pytest.fixture(autouse=True)
+def tools_sessions(mock_sessions, monkeypatch):
+    mock_tools = MagicMock()
+    mock_tools.sessions = mock_sessions
+    mock_tools.detached_sessions = {}
+    monkeypatch.setitem(sys.modules, "tools", mock_tools)
+    return mock_sessions
+
+
+UNSENT = {"error": 503, "text": json.dumps({"error": "OSCAR unavailable", "reason": "ConnectTimeout", "sent": False})}
+TIMED_OUT = {"error": 503, "text": json.dumps({"error": "OSCAR unavailable", "reason": "ReadTimeout", "sent": True})}
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    calls = []
+    results = []
+
+    def fake(session_id, payload):
+        calls.append((session_id, payload))
+        return results.pop(0) if results else {"ok": True}
+    monkeypatch.setitem(write_queue.HANDLERS, "test", fake)
+    return calls, results
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = WriteQueue(path=str(tmp_path / "journal.jsonl"), max_attempts=3)
+    yield q
+    q.stop()
+
+
+def _wait_for(predicate):
+    deadline = time.monotonic() + 2
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+class TestEnqueue:
+    def test_journaled_before_ack(self, queue):
+        ack = queue.enqueue("test", 1, "test-session-123", {"x": 1})
+        assert ack["queued"] and ack["status"] == "pending"
+        record = json.loads(open(queue.path).readline())
+        assert record["op"] == "add" and record["entry"]["id"] == ack["id"]
+        assert record["entry"]["credentials"]["access_token"] == "test_token"
+        assert oct(os.stat(queue.path).st_mode & 0o777) == "0o600"
+
+    def test_unauthenticated_session_rejected(self, queue):
+        with pytest.raises(ValueError, match="Not authenticated"):
+            queue.enqueue("test", 1, "expired", {})
+        assert queue.status()["pending"] == 0
+
+    def test_status_scoped_to_session(self, queue, tools_sessions):
+        tools_sessions["other"] = {"access_token": "t", "access_token_secret": "s"}
+        queue.enqueue("test", 1, "test-session-123", {})
+        queue.enqueue("test", 1, "other", {})
+        assert queue.status("test-session-123")["pending"] == 1
+        assert queue.status()["pending"] == 2
+
+
+class TestWorker:
+    def test_flushes_and_compacts_journal(self, queue, handler):
+        calls, _ = handler
+        queue.start()
+        ack = queue.enqueue("test", 1, "test-session-123", {"x": 1})
+        _wait_for(lambda: queue.status()["entries"][0]["status"] == "synced")
+        assert calls == [("test-session-123", {"x": 1})]
+        assert queue.status()["entries"][0]["id"] == ack["id"]
+        assert open(queue.path).read() == ""
+
+    def test_retries_unsent_requests(self, queue, handler):
+        calls, results = handler
+        results.extend([UNSENT, {"ok": True}])
+        with patch("write_queue.resilience.backoff", return_value=0):
+            queue.start()
+            queue.enqueue("test", 1, "test-session-123", {})
+            _wait_for(lambda: queue.status()["entries"][0]["status"] == "synced")
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize("error", [{"error": 400, "text": "bad"}, {"error": 500, "text": "oops"}, TIMED_OUT])
+    def test_possibly_sent_failures_not_retried(self, queue, handler, error):
+        calls, results = handler
+        results.append(error)
+        queue.start()
+        queue.enqueue("test", 1, "test-session-123", {})
+        _wait_for(lambda: queue.status()["failed"] == 1)
+        assert len(calls) == 1
+
+    def test_per_patient_order(self, queue, handler):
+        calls, results = handler
+        results.extend([UNSENT, {"ok": True}, {"ok": True}, {"ok": True}])
+        with patch("write_queue.resilience.backoff", return_value=0.1):
+            queue.enqueue("test", 1, "test-session-123", {"n": "p1-first"})
+            queue.enqueue("test", 1, "test-session-123", {"n": "p1-second"})
+            queue.enqueue("test", 2, "test-session-123", {"n": "p2"})
+            queue.start()
+            _wait_for(lambda: queue.status()["pending"] == 0)
+        order = [payload["n"] for _, payload in calls]
+        assert order == ["p1-first", "p2", "p1-first", "p1-second"]
+
+
+class TestRestart:
+    def test_pending_writes_replayed_with_journaled_credentials(self, tmp_path, monkeypatch, tools_sessions):
+        import tools
+        seen = []
+        monkeypatch.setitem(write_queue.HANDLERS, "test",
+                            lambda scope, payload: seen.append((scope, dict(tools.detached_sessions[scope]))) or {"ok": True})
+        path = str(tmp_path / "journal.jsonl")
+        WriteQueue(path=path).enqueue("test", 1, "test-session-123", {"x": 1})
+        tools_sessions.clear()  # process restarted: login sessions are gone
+
+        restarted = WriteQueue(path=path)
+        restarted.start()
+        try:
+            _wait_for(lambda: restarted.status()["entries"][0]["status"] == "synced")
+        finally:
+            restarted.stop()
+        scope, credentials = seen[0]
+        assert scope == "write-queue:test-session-123"
+        assert credentials["access_token"] == "test_token"
+        assert tools_sessions == {} and tools.detached_sessions == {}
+
+    def test_write_interrupted_mid_send_not_resent(self, tmp_path, handler):
+        calls, _ = handler
+        path = str(tmp_path / "journal.jsonl")
+        entry_id = WriteQueue(path=path).enqueue("test", 1, "test-session-123", {})["id"]
+        with open(path, "a") as f:
+            f.write(json.dumps({"op": "attempt", "id": entry_id}) + "\n")  # crashed while sending
+        restarted = WriteQueue(path=path)
+        restarted.load()
+        status = restarted.status()
+        assert status["pending"] == 0 and status["failed"] == 1
+        assert "Interrupted" in status["entries"][0]["last_error"]["error"]
+        assert not calls
+
+    def test_finished_writes_not_replayed(self, tmp_path, handler):
+        calls, _ = handler
+        path = str(tmp_path / "journal.jsonl")
+        q = WriteQueue(path=path)
+        entry_id = q.enqueue("test", 1, "test-session-123", {})["id"]
+        with open(path, "a") as f:
+            f.write(json.dumps({"op": "done", "id": entry_id, "status": "synced"}) + "\n")
+            f.write('{"op": "add", "entry"')  # torn write
+        restarted = WriteQueue(path=path)
+        restarted.load()
+        assert restarted.status()["pending"] == 0
@@ -0,0 +1,163 @@
+"""Reaper for temp ticklers left behind by save_note
+
+save_note creates a `_temp_xxxxxxxx_` tickler, saves the note against it and
+then completes it. If the process dies or OSCAR fails in between, the temp
+tickler stays active forever. save_note records each temp tickler in a small
+journal before creating it and clears the record once the tickler is completed;
+this periodically looks up records older than OSCAR_TEMP_TICKLER_MAX_AGE with
+the same narrow search save_note uses (patient, assignee and service day) and
+completes what is still active, using the phone-system service tokens.
+
+    OSCAR_TICKLER_REAPER_INTERVAL  seconds between sweeps, 0 to disable (default 900)
+    OSCAR_TEMP_TICKLER_MAX_AGE     seconds before a temp tickler counts as orphaned (default 600)
+    OSCAR_TEMP_TICKLER_JOURNAL     journal of temp ticklers not yet completed (default temp_ticklers.jsonl)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import admission
+import metrics
+import oscar_client
+import oscar_logging
+
+INTERVAL = float(os.getenv("OSCAR_TICKLER_REAPER_INTERVAL", "900"))
+MAX_AGE = float(os.getenv("OSCAR_TEMP_TICKLER_MAX_AGE", "600"))
+JOURNAL_PATH = os.getenv("OSCAR_TEMP_TICKLER_JOURNAL", "temp_ticklers.jsonl")
+PAGE = 50
+BATCH = 50
+
+
+class TempTicklerLog:
+    """Temp ticklers created by save_note and not yet completed, persisted so a restart can reap them"""
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self._pending: dict[str, dict] | None = None  # marker -> record, loaded on first use
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, dict]:
+        if self._pending is None:
+            self._pending = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # torn final line from a crash mid-append
+                        if record.get("op") == "add":
+                            self._pending[record["marker"]] = record
+                        else:
+                            self._pending.pop(record.get("marker"), None)
+        return self._pending
+
+    def _append(self, record: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def track(self, marker: str, patient_id, provider_no: str):
+        """Record a temp tickler about to be created"""
+        record = {"op": "add", "marker": marker, "patient_id": str(patient_id),
+                  "provider_no": str(provider_no), "created": time.time()}
+        with self._lock:
+            if marker not in self._load():
+                self._append(record)
+                self._pending[marker] = record
+
+    def resolve(self, marker: str):
+        """Forget a temp tickler that has been completed (or was never created)"""
+        with self._lock:
+            if self._load().pop(marker, None) is None:
+                return
+            if self._pending:
+                self._append({"op": "done", "marker": marker})
+            else:
+                open(self.path, "w").close()  # nothing outstanding; keep the journal from growing
+
+    def due(self, max_age: float) -> list[dict]:
+        """Records older than max_age seconds"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            return [r for r in self._load().values() if r["created"] <= cutoff]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+
+temp_ticklers = TempTicklerLog()
+
+
+def _search_query(patient_id: str, provider_no: str, day) -> dict:
+    return {"demographicNo": patient_id, "status": "A", "assignee": provider_no,
+            "serviceStartDate": day.isoformat(), "serviceEndDate": (day + timedelta(days=1)).isoformat()}
+
+
+def find_orphans(max_age: float = MAX_AGE) -> tuple[dict[str, int], list[str]]:
+    """Look up tracked temp ticklers older than max_age.
+
+    Returns ({marker: tickler id} still active, [markers no longer active]). Records whose
+    search failed are in neither and are tried again on the next sweep.
+    """
+    groups: dict[tuple, set[str]] = {}
+    for record in temp_ticklers.due(max_age):
+        day = datetime.fromtimestamp(record["created"]).date()
+        groups.setdefault((record["patient_id"], record["provider_no"], day), set()).add(record["marker"])
+    active, gone = {}, []
+    for (patient_id, provider_no, day), markers in groups.items():
+        query, start, found = _search_query(patient_id, provider_no, day), 0, {}
+        while True:
+            data = oscar_client.search_ticklers(query, start, PAGE)
+            if data is None:
+                metrics.incr("tickler_reaper.search_failed")
+                found = None
+                break
+            page = data.get("content", [])
+            found.update({t["message"]: int(t["id"]) for t in page if t.get("message") in markers})
+            start += len(page)
+            if len(page) < PAGE or start >= data.get("total", float("inf")):
+                break
+        if found is not None:
+            active.update(found)
+            gone.extend(markers - found.keys())
+    return active, gone
+
+
+def reap_once(max_age: float = MAX_AGE) -> int:
+    """Complete orphaned temp ticklers in batches; returns how many were reclaimed"""
+    with admission.priority(admission.BACKGROUND), admission.owner("tickler-reaper"):
+        orphans, gone = find_orphans(max_age)
+        for marker in gone:
+            temp_ticklers.resolve(marker)
+        reclaimed = 0
+        items = list(orphans.items())
+        for i in range(0, len(items), BATCH):
+            batch = items[i:i + BATCH]
+            if oscar_client.complete_ticklers([tickler_id for _, tickler_id in batch]):
+                reclaimed += len(batch)
+                for marker, _ in batch:
+                    temp_ticklers.resolve(marker)
+            else:
+                metrics.incr("tickler_reaper.complete_failed")
+    metrics.incr("tickler_reaper.sweeps")
+    metrics.incr("tickler_reaper.reclaimed", reclaimed)
+    if orphans:
+        oscar_logging.event("tickler_reaper.swept", found=len(orphans), reclaimed=reclaimed)
+    return reclaimed
+
+
+async def run(interval: float = INTERVAL):
+    """Sweep every `interval` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reap_once)
+        except Exception as e:
+            oscar_logging.event("tickler_reaper.error", level=logging.WARNING, error=str(e))
@@ -1,28 +1,80 @@
 """OSCAR Tickler/Task Tools"""
 
-from typing import Optional
-from tools import oscar_request, handle_response
-
-
-def get_my_ticklers(tool_context, limit: int = 20) -> dict:
+from collections import Counter
+from typing import List, Optional
+import requests
+from tools import oscar_request, handle_response, current_provider_no
+import admission
+import oscar_logging
+import parallel
+
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_BULK = 200
+BULK_FIELDS = ("patient_id", "task_assigned_to", "service_date", "message")
+
+
+def iter_ticklers(session_id: str, query: dict, page_size: int = PAGE_SIZE, start: int = 0):
+    """Yield ticklers matching `query`, fetching search pages lazily. Raises requests.HTTPError on a failed page."""
+    while True:
+        resp = oscar_request("POST", "/ws/services/tickler/search", session_id,
+                             params={"startIndex": start, "limit": page_size}, json=query)
+        resp.raise_for_status()
+        data = resp.json()
+        page = data.get("content", [])
+        yield from page
+        start += len(page)
+        if len(page) < page_size or start >= data.get("total", float("inf")):
+            return
+
+
+def summarize_ticklers(ticklers) -> dict:
+    """Counts by priority and assignee instead of the ticklers themselves"""
+    by_priority, by_assignee, total = Counter(), Counter(), 0
+    for t in ticklers:
+        total += 1
+        by_priority[t.get("priority") or "Unknown"] += 1
+        by_assignee[t.get("taskAssignedToName") or t.get("taskAssignedTo") or "Unassigned"] += 1
+    return {"total": total, "by_priority": dict(by_priority), "by_assignee": dict(by_assignee)}
+
+
+def _summary(session_id: str, query: dict, name: str) -> dict:
+    try:
+        result = summarize_ticklers(iter_ticklers(session_id, query, MAX_PAGE_SIZE))
+    except requests.HTTPError as e:
+        result = {"error": e.response.status_code, "text": e.response.text}
+    oscar_logging.log_result(name, result)
+    return result
+
+
+def get_my_ticklers(tool_context, limit: int = 20, summary: bool = False) -> dict:
     """Get active ticklers/tasks assigned to the current provider.
 
     Args:
         limit: Maximum ticklers to return (default 20)
+        summary: Return only counts by priority and assignee across all of them (default False)
 
     Returns:
         dict with array of ticklers, each containing:
         id, demographicNo, demographicName, message, priority, status,
-        serviceDate, creator, creatorName, taskAssignedTo, taskAssignedToName
+        serviceDate, creator, creatorName, taskAssignedTo, taskAssignedToName.
+        With summary=True: dict with total, by_priority and by_assignee counts.
     """
-    resp = oscar_request("GET", "/ws/services/tickler/mine", tool_context.state.get("session_id"),
-                         params={"limit": limit})
+    session_id = tool_context.state.get("session_id")
+    if summary:
+        provider_no = current_provider_no(session_id)
+        if not provider_no:
+            return {"error": "Failed to get current provider"}
+        return _summary(session_id, {"status": "A", "assignee": provider_no}, "get_my_ticklers")
+    resp = oscar_request("GET", "/ws/services/tickler/mine", session_id, params={"limit": limit})
     return handle_response(resp, "get_my_ticklers")
 
 
 def search_ticklers(tool_context, status: Optional[str] = "A", priority: Optional[str] = None,
-                    assignee: Optional[str] = None, patient_id: Optional[int] = None) -> dict:
-    """Search ticklers with filters.
+                    assignee: Optional[str] = None, patient_id: Optional[int] = None,
+                    limit: int = PAGE_SIZE, cursor: Optional[str] = None, summary: bool = False) -> dict:
+    """Search ticklers with filters, one page at a time.
 
     Args:
         status: Tickler status filter:
@@ -32,9 +84,13 @@ def search_ticklers(tool_context, status: Optional[str] = "A", priority: Optiona
         priority: Priority filter - "Low", "Normal", "High" (optional)
         assignee: Provider ID to filter by assignee (optional)
         patient_id: Patient demographic ID to filter (optional)
+        limit: Page size (default 50, max 100)
+        cursor: next_cursor from a previous call to fetch the following page (optional)
+        summary: Return only counts by priority and assignee over every match (default False)
 
     Returns:
-        dict with content array of matching ticklers and total count
+        dict with content array of matching ticklers, total count and next_cursor
+        (null on the last page). With summary=True: dict with total, by_priority and by_assignee counts.
     """
     data = {}
     if status:
@@ -46,9 +102,22 @@ def search_ticklers(tool_context, status: Optional[str] = "A", priority: Optiona
     if patient_id:
         data["demographicNo"] = str(patient_id)
 
-    resp = oscar_request("POST", "/ws/services/tickler/search", tool_context.state.get("session_id"),
-                         params={"startIndex": 0, "limit": 50}, json=data)
-    return handle_response(resp, "search_ticklers")
+    session_id = tool_context.state.get("session_id")
+    if summary:
+        return _summary(session_id, data, "search_ticklers")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        start = max(0, int(cursor)) if cursor else 0
+    except ValueError:
+        return {"error": "Invalid cursor; pass next_cursor from the previous result"}
+    resp = oscar_request("POST", "/ws/services/tickler/search", session_id,
+                         params={"startIndex": start, "limit": limit}, json=data)
+    result = handle_response(resp, "search_ticklers")
+    if resp.ok and isinstance(result, dict):
+        end = start + len(result.get("content", []))
+        more = len(result.get("content", [])) == limit and end < result.get("total", float("inf"))
+        result["next_cursor"] = str(end) if more else None
+    return result
 
 
 def create_tickler(patient_id: int, task_assigned_to: str, service_date: str, message: str, tool_context,
@@ -77,6 +146,41 @@ def create_tickler(patient_id: int, task_assigned_to: str, service_date: str, me
     return handle_response(resp, "create_tickler")
 
 
+def create_ticklers_bulk(ticklers: List[dict], tool_context) -> dict:
+    """Create many ticklers in one call, e.g. a recall campaign.
+
+    Args:
+        ticklers: List of rows (up to 200), each a dict with patient_id, task_assigned_to,
+            service_date (YYYY-MM-DD), message and optionally priority ("Low", "Normal", "High")
+
+    Returns:
+        dict with created and failed counts and results: one entry per row, in input order,
+        with row, patient_id, success and error details for failed rows
+    """
+    if len(ticklers) > MAX_BULK:
+        return {"error": f"At most {MAX_BULK} ticklers per call"}
+
+    def create(row: dict) -> dict:
+        missing = [f for f in BULK_FIELDS if not row.get(f)]
+        if missing:
+            return {"error": f"Missing {', '.join(missing)}"}
+        return create_tickler(row["patient_id"], row["task_assigned_to"], row["service_date"], row["message"],
+                              tool_context, priority=row.get("priority") or "Normal")
+
+    with admission.priority(admission.BACKGROUND):
+        outcomes = parallel.gather({str(i): (lambda row=row: create(row)) for i, row in enumerate(ticklers)})
+    results = []
+    for i, row in enumerate(ticklers):
+        outcome = outcomes[str(i)]
+        ok = isinstance(outcome, dict) and "error" not in outcome and outcome.get("success", True) is not False
+        entry = {"row": i, "patient_id": row.get("patient_id"), "success": ok}
+        if not ok:
+            entry["error"] = outcome
+        results.append(entry)
+    created = sum(r["success"] for r in results)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
 def complete_ticklers(tickler_ids: list, tool_context) -> dict:
     """Mark ticklers as completed.
 
@@ -91,11 +195,12 @@ def complete_ticklers(tickler_ids: list, tool_context) -> dict:
     return handle_response(resp, "complete_ticklers")
 
 
-TICKLER_TOOLS = [get_my_ticklers, search_ticklers, create_tickler, complete_ticklers]
+TICKLER_TOOLS = [get_my_ticklers, search_ticklers, create_tickler, create_ticklers_bulk, complete_ticklers]
 
 TICKLER_TOOL_DESCRIPTIONS = {
     "get_my_ticklers": "Fetching my ticklers...",
     "search_ticklers": "Searching ticklers...",
     "create_tickler": "Creating tickler...",
+    "create_ticklers_bulk": "Creating ticklers...",
     "complete_ticklers": "Completing ticklers...",
 }
@@ -1,8 +1,18 @@
 """OSCAR ADK Tools"""
 
-from requests_oauthlib import OAuth1
 import requests
-import sys
+import asyncio
+import functools
+import time
+import oscar_http
+import oscar_logging
+import projection
+import signing
+
+
+# Credentials for scopes that are not login sessions (write_queue entries replayed after a
+# restart). Only oscar_request reads them; HTTP endpoints authenticate against `sessions` alone.
+detached_sessions: dict[str, dict] = {}
 
 
 def init(oscar_url, consumer_key, consumer_secret, sessions_dict):
@@ -14,22 +24,54 @@ def init(oscar_url, consumer_key, consumer_secret, sessions_dict):
 
 
 def oscar_request(method: str, endpoint: str, session_id: str, **kwargs) -> requests.Response:
-    session = sessions.get(session_id)
+    session = sessions.get(session_id) or detached_sessions.get(session_id)
     if not session:
         raise ValueError("Not authenticated")
-    auth = OAuth1(CONSUMER_KEY, CONSUMER_SECRET, session["access_token"], session["access_token_secret"], signature_method='HMAC-SHA1')
+    auth = signing.signers.get(session_id, CONSUMER_KEY, CONSUMER_SECRET, session["access_token"], session["access_token_secret"])
     cookies = {"JSESSIONID": session.get("jsessionid")} if session.get("jsessionid") else {}
-    req = requests.Request(method, f"{OSCAR_URL}{endpoint}", auth=auth, cookies=cookies, **kwargs)
-    prepared = req.prepare()
-    resp = requests.Session().send(prepared, verify=False)
-    print(f"[response] {resp.status_code} {resp.text}", flush=True, file=sys.stderr)
+    started = time.monotonic()
+    resp = oscar_http.request(method, f"{OSCAR_URL}{endpoint}", session_id, auth=auth, cookies=cookies, **kwargs)
+    oscar_logging.log_response("oscar_request", resp, method, endpoint, started)
     return resp
 
 
-def handle_response(resp: requests.Response, name: str) -> dict:
-    """Standard response handling with logging."""
-    result = resp.json() if resp.ok else {"error": resp.status_code, "text": resp.text}
-    print(f"[{name}] {result}", flush=True, file=sys.stderr)
+def current_provider_no(session_id: str) -> str | None:
+    """Provider number of the logged-in user, as recorded at /auth/callback (falls back to provider/me)"""
+    session = sessions.get(session_id) or detached_sessions.get(session_id) or {}
+    if session.get("provider_id"):
+        return session["provider_id"]
+    resp = oscar_request("GET", "/ws/services/providerService/provider/me", session_id)
+    if not resp.ok:
+        return None
+    provider_no = resp.json().get("providerNo")
+    if provider_no and session:
+        session["provider_id"] = provider_no
+    return provider_no
+
+
+async def oscar_request_async(method: str, endpoint: str, session_id: str, **kwargs) -> requests.Response:
+    """Awaitable oscar_request. Runs the blocking call in a worker thread so the event loop stays free."""
+    return await asyncio.to_thread(oscar_request, method, endpoint, session_id, **kwargs)
+
+
+def as_async_tool(func):
+    """Wrap a sync tool as a coroutine function for ADK.
+
+    The wrapper keeps the tool's name, docstring and signature (ADK reads them for the
+    function declaration) and runs the sync tool off the event loop, so a slow OSCAR
+    response no longer stalls /chat streams, /recording/ or /call/ sockets.
+    The sync tool stays importable for tests and direct calls.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+def handle_response(resp: requests.Response, name: str, full: bool = False) -> dict:
+    """Standard response handling with logging. Results are compacted by projection unless full=True."""
+    result = projection.project(name, resp.json(), full) if resp.ok else {"error": resp.status_code, "text": resp.text}
+    oscar_logging.log_result(name, result)
     return result
 
 
@@ -44,8 +86,9 @@ from inbox_tools import INBOX_TOOLS, INBOX_TOOL_DESCRIPTIONS
 from notes_tools import NOTES_TOOLS, NOTES_TOOL_DESCRIPTIONS
 from util_tools import UTIL_TOOLS, UTIL_TOOL_DESCRIPTIONS
 from cpsbc_tools import CPSBC_TOOLS, CPSBC_TOOL_DESCRIPTIONS
+from chart_tools import CHART_TOOLS, CHART_TOOL_DESCRIPTIONS
 
-TOOLS = (
+SYNC_TOOLS = (
     DEMOGRAPHIC_TOOLS +
     APPOINTMENT_TOOLS +
     MEASUREMENT_TOOLS +
@@ -56,9 +99,12 @@ TOOLS = (
     INBOX_TOOLS +
     NOTES_TOOLS +
     UTIL_TOOLS +
-    CPSBC_TOOLS
+    CPSBC_TOOLS +
+    CHART_TOOLS
 )
 
+TOOLS = [as_async_tool(t) for t in SYNC_TOOLS]
+
 MCP_TOOL_DESCRIPTIONS = {
     "search-drugs": "Searching FDA drug database...",
     "get-drug-details": "Fetching drug details from FDA...",
@@ -90,5 +136,6 @@ TOOL_DESCRIPTIONS = {
     **NOTES_TOOL_DESCRIPTIONS,
     **UTIL_TOOL_DESCRIPTIONS,
     **CPSBC_TOOL_DESCRIPTIONS,
+    **CHART_TOOL_DESCRIPTIONS,
     **MCP_TOOL_DESCRIPTIONS,
 }
@@ -0,0 +1,256 @@
+"""Durable write-behind queue for chart writes (encounter notes, measurements)
+
+Opt-in (OSCAR_WRITE_QUEUE=1). A queued write is appended to a JSONL journal and
+fsynced before the tool returns, then flushed to OSCAR by a background worker,
+in order per patient. Writes are not idempotent, so an attempt is only retried
+(with backoff, up to OSCAR_WRITE_QUEUE_ATTEMPTS) when OSCAR never received it:
+connect failures, an open circuit breaker or no admission slot. A timeout after
+sending, a 5xx or any other error marks the write failed for a person to check.
+
+The journal is replayed at startup so pending writes survive a restart. A write
+that was being sent when the process died may have reached OSCAR, so it is
+marked failed rather than sent again. Each entry carries the OAuth tokens it
+was queued with, since the in-memory login session is gone after a restart;
+the journal file is created with mode 0600.
+
+    OSCAR_WRITE_QUEUE           1 to enable (default 0)
+    OSCAR_WRITE_QUEUE_PATH      journal file (default write_queue.jsonl)
+    OSCAR_WRITE_QUEUE_ATTEMPTS  attempts before a write is marked failed (default 8)
+"""
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+import admission
+import metrics
+import oscar_logging
+import resilience
+import signing
+
+ENABLED = os.getenv("OSCAR_WRITE_QUEUE", "0") == "1"
+JOURNAL_PATH = os.getenv("OSCAR_WRITE_QUEUE_PATH", "write_queue.jsonl")
+MAX_ATTEMPTS = int(os.getenv("OSCAR_WRITE_QUEUE_ATTEMPTS", "8"))
+MAX_BACKOFF = 60.0
+KEEP_DONE = 500  # finished entries kept in memory for status
+CREDENTIAL_KEYS = ("access_token", "access_token_secret", "jsessionid", "provider_id")
+PUBLIC_KEYS = ("id", "kind", "patient_id", "status", "attempts", "queued_at", "last_error", "result")
+
+# kind -> handler(session_id, payload) returning the tool result dict
+HANDLERS = {}
+
+
+def register(kind: str, handler):
+    """Register the function that performs a queued write of `kind` against OSCAR"""
+    HANDLERS[kind] = handler
+
+
+def _retryable(result) -> bool:
+    """Only failures where OSCAR never got the request; resending anything else could duplicate the write"""
+    return not resilience.was_sent(result)
+
+
+class WriteQueue:
+    def __init__(self, path: str = JOURNAL_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.entries: dict[str, dict] = {}
+        self._cond = threading.Condition()
+        self._journal_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+    # ---- journal ----
+
+    def _append(self, record: dict):
+        with self._journal_lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            with os.fdopen(fd, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _rewrite(self, pending: list[dict]):
+        """Replace the journal with just the pending entries"""
+        with self._journal_lock:
+            tmp = f"{self.path}.tmp"
+            fd = os.open(tmp, os.O_WRONLY | os.O_TRUNC | os.O_CREAT, 0o600)
+            with os.fdopen(fd, "w") as f:
+                for entry in pending:
+                    f.write(json.dumps({"op": "add", "entry": _persisted(entry)}, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+
+    def load(self):
+        """Replay the journal: entries added but never finished are pending again"""
+        pending: dict[str, dict] = {}
+        in_flight: set[str] = set()  # attempt started, outcome never journaled
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from a crash mid-append
+                    op = record.get("op")
+                    if op == "add":
+                        pending[record["entry"]["id"]] = record["entry"]
+                    elif op == "attempt":
+                        in_flight.add(record.get("id"))
+                    elif op == "retry":
+                        in_flight.discard(record.get("id"))
+                    elif op == "done":
+                        pending.pop(record.get("id"), None)
+        interrupted = [pending.pop(i) for i in in_flight if i in pending]
+        with self._cond:
+            for entry in pending.values():
+                entry.update(status="pending", next_attempt=0.0)
+                self.entries.setdefault(entry["id"], entry)
+            self._rewrite([e for e in self.entries.values() if e["status"] == "pending"])
+            self._cond.notify_all()
+        for entry in interrupted:
+            self.entries.setdefault(entry["id"], entry)
+            self._finish(entry, "failed", error={"error": "Interrupted by a restart while sending; "
+                                                          "check the chart before saving it again"})
+        if pending:
+            oscar_logging.event("write_queue.replayed", pending=len(pending))
+
+    # ---- producer ----
+
+    def enqueue(self, kind: str, patient_id, session_id: str, payload: dict) -> dict:
+        """Journal a write and return immediately; the worker sends it to OSCAR"""
+        import tools
+        session = tools.sessions.get(session_id)
+        if not session or not session.get("access_token"):
+            raise ValueError("Not authenticated")
+        entry = {
+            "id": uuid.uuid4().hex[:12], "kind": kind, "patient_id": str(patient_id), "session_id": session_id,
+            "credentials": {k: session.get(k) for k in CREDENTIAL_KEYS}, "payload": payload,
+            "queued_at": time.time(), "status": "pending", "attempts": 0, "last_error": None, "result": None,
+        }
+        with self._cond:
+            self._append({"op": "add", "entry": _persisted(entry)})
+            entry["next_attempt"] = 0.0
+            self.entries[entry["id"]] = entry
+            self._cond.notify_all()
+        metrics.incr("write_queue.enqueued")
+        return {"queued": True, "id": entry["id"], "status": "pending",
+                "message": "Saved locally; it will sync to OSCAR in the background."}
+
+    # ---- worker ----
+
+    def _next_ready(self, now: float):
+        """First pending entry that is due and has no earlier pending write for the same patient.
+        Returns (entry, seconds until the next retry is due)."""
+        blocked = set()
+        wait = None
+        for entry in self.entries.values():
+            if entry["status"] != "pending" or entry["patient_id"] in blocked:
+                continue
+            blocked.add(entry["patient_id"])
+            if entry["next_attempt"] <= now:
+                return entry, None
+            wait = min(wait or float("inf"), entry["next_attempt"] - now)
+        return None, wait
+
+    @contextlib.contextmanager
+    def _scope_for(self, entry: dict):
+        """Session to send as: the live login session if still present, else the journaled tokens,
+        registered as a detached session only for the duration of the attempt"""
+        import tools
+        if entry["session_id"] in tools.sessions:
+            yield entry["session_id"]
+            return
+        scope = f"write-queue:{entry['session_id']}"
+        tools.detached_sessions[scope] = dict(entry["credentials"])
+        try:
+            yield scope
+        finally:
+            tools.detached_sessions.pop(scope, None)
+            signing.signers.drop(scope)
+
+    def _flush(self, entry: dict):
+        handler = HANDLERS.get(entry["kind"])
+        if not handler:
+            return self._finish(entry, "failed", error={"error": f"No handler for {entry['kind']}"})
+        entry["attempts"] += 1
+        self._append({"op": "attempt", "id": entry["id"]})
+        try:
+            with admission.priority(admission.BACKGROUND), self._scope_for(entry) as scope:
+                result = handler(scope, entry["payload"])
+        except Exception as e:
+            result = {"error": str(e)}
+        if not isinstance(result, dict) or "error" not in result:
+            self._finish(entry, "synced", result=result)
+        elif _retryable(result) and entry["attempts"] < self.max_attempts:
+            self._append({"op": "retry", "id": entry["id"]})
+            metrics.incr("write_queue.retries")
+            with self._cond:
+                entry["last_error"] = result
+                entry["next_attempt"] = time.monotonic() + min(MAX_BACKOFF, resilience.backoff(entry["attempts"]))
+        else:
+            self._finish(entry, "failed", error=result)
+
+    def _finish(self, entry: dict, status: str, result=None, error=None):
+        self._append({"op": "done", "id": entry["id"], "status": status})
+        metrics.incr(f"write_queue.{status}")
+        if status == "failed":
+            oscar_logging.event("write_queue.failed", level=logging.WARNING, id=entry["id"], kind=entry["kind"], error=error)
+        with self._cond:
+            entry.update(status=status, result=result, last_error=error, credentials=None)
+            done = [k for k, e in self.entries.items() if e["status"] != "pending"]
+            for key in done[:max(0, len(done) - KEEP_DONE)]:
+                del self.entries[key]
+            if all(e["status"] != "pending" for e in self.entries.values()):
+                self._rewrite([])  # nothing left to replay; keep the journal from growing
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    entry, wait = self._next_ready(time.monotonic())
+                    if entry:
+                        break
+                    self._cond.wait(wait)
+            self._flush(entry)
+
+    def start(self):
+        """Replay the journal and start the background worker"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.load()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="oscar-write-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    # ---- status ----
+
+    def status(self, session_id: str | None = None) -> dict:
+        """Pending/failed counts and entries, optionally for one session only"""
+        with self._cond:
+            entries = [e for e in self.entries.values() if session_id is None or e["session_id"] == session_id]
+            return {
+                "pending": sum(e["status"] == "pending" for e in entries),
+                "failed": sum(e["status"] == "failed" for e in entries),
+                "entries": [{k: e[k] for k in PUBLIC_KEYS} for e in entries],
+            }
+
+
+def _persisted(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != "next_attempt"}
+
+
+queue = WriteQueue()